@@ -1,13 +1,13 @@
 import os
 import logging
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import JSONResponse
 from supabase import create_client, Client
-from uuid import uuid4
-from handlers.process_audio import AudioProcessor
+from api.ingest import UploadRejected
+from api.jobs_api import (cancelled_response, queue_transcription, receive_upload, rejected_response,
+                          result_response, task_links, timeout_response, wait_for_result)
 from typing import Dict
 from dotenv import load_dotenv
-from fastapi import BackgroundTasks
 
 load_dotenv()
 
@@ -33,112 +33,54 @@ logger = logging.getLogger(__name__)
 
 
 @router.post("/transcribe")
-async def transcribe_audio(
-    file: UploadFile = File(...),
-    user_id: str = Form(...),
-    duration: int = Form(...),  # duration in minutes
-    background_tasks: BackgroundTasks = BackgroundTasks()
-) -> Dict:
-    file_path = None  # define here for cleanup in except block
+async def transcribe_audio(request: Request) -> Dict:
+    """Transcribe a audio file and wait for the result. Long files should use /submit instead.
+
+    Form fields: file, user_id, duration (in minutes) and optionally engine
+    (whisper_timestamped or faster_whisper), profile (fast, balanced,
+    accurate or tiered) and output (words, or segments for a segment-level
+    SRT without word alignment). The body is streamed to disk.
+    """
     try:
-        logger.info(f"Received transcription request from user: {user_id} with file: {file.filename}")
-        
-        # --- Check user credits before processing ---
-        user_data = supabase.table("user_credits").select("*").eq("id", user_id).single().execute()
-        current_credits = user_data.data["credits_remaining"]
-
-        if duration > current_credits:
-            logger.warning(f"User {user_id} has insufficient credits: {current_credits} needed: {duration}")
-            return JSONResponse(
-                status_code=402,
-                content={
-                    "status": "error",
-                    "message": f"Insufficient credits. You have {current_credits}, but {duration} are required."
-                }
-            )
-
-        # 1. Save uploaded file locally
-        file_ext = file.filename.split(".")[-1].lower()
-        file_id = str(uuid4())
-        local_filename = f"{file_id}.{file_ext}"
-        upload_dir = "temp_uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, local_filename)
-
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        logger.info(f"File saved locally at {file_path}")
-
-        # 2. Process the file (transcribe + generate SRT)
-        processor = AudioProcessor()  # Instantiate per request
-        result = await processor.process_file(file_path, upload_dir)
-        logger.info(f"Processing result: {result}")
-
-        if result["status"] == "error":
-            logger.error(f"Processing error: {result['error']}")
-            raise Exception(result["error"])
-
-        # 3. Upload files to Supabase Storage
-        storage_path = f"{user_id}/{file_id}"
-        audio_storage_path = f"{storage_path}.{file_ext}"
-        srt_storage_path = f"{storage_path}.srt"
-
-        with open(file_path, "rb") as f:
-            upload_resp_audio = supabase.storage.from_(SUPABASE_BUCKET).upload(audio_storage_path, f)
-        logger.info(f"Audio file uploaded to Supabase at {audio_storage_path}")
-
-        with open(result["data"]["srt_path"], "rb") as f:
-            upload_resp_srt = supabase.storage.from_(SUPABASE_BUCKET).upload(srt_storage_path, f)
-        logger.info(f"SRT file uploaded to Supabase at {srt_storage_path}")
-
-        # 4. Get public URLs
-        audio_url = supabase.storage.from_(SUPABASE_BUCKET).get_public_url(audio_storage_path)
-        srt_url = supabase.storage.from_(SUPABASE_BUCKET).get_public_url(srt_storage_path)
-        logger.info(f"Obtained public URLs - Audio: {audio_url}, SRT: {srt_url}")
-
-        # 5. Store metadata in Supabase DB
-        upload_record = {
-            "user_id": user_id,
-            "file_id": file_id,
-            "filename": file.filename,
-            "type": "audio",
-            "audio_url": audio_url,
-            "srt_url": srt_url,
-            "duration": result["data"]["duration"],
-            "word_count": result["data"]["word_count"],
-            "language": result["data"].get("detected_language")
-        }
-
-        db_resp = supabase.table("uploads").insert(upload_record).execute()
-        logger.info(f"Metadata inserted in DB: {db_resp}")
-
-        user_data = supabase.table("user_credits").select("*").eq("id", user_id).single().execute()
-        current_credits = user_data.data["credits_remaining"]
-
-        new_credits = current_credits - duration
-        supabase.table("user_credits").update({"credits_remaining": new_credits}).eq("id", user_id).execute()
-
-        supabase.table("usage_logs").insert({
-        "user_id": user_id,
-        "description": f"Processed {duration} min file"
-        }).execute()
-
-        # 6. Clean up temporary files
-        background_tasks.add_task(os.remove, file_path)
-        background_tasks.add_task(os.remove, result["data"]["srt_path"])
-        background_tasks.add_task(os.remove, result["data"]["json_path"])
-        logger.info(f"Scheduled cleanup for {file_path} and {result['data']['srt_path']}")
-
-        return JSONResponse(status_code=200, content={
-            "status": "success",
-            "message": "File processed and uploaded successfully",
-            "data": upload_record
-        })
-
+        # --- Check user credits while the upload streams in ---
+        upload = await receive_upload(request, supabase)
+        logger.info(f"Received audio transcription request from user: {upload['user_id']} with file: {upload['filename']}")
+
+        # Queue for the inference workers, which transcribe, upload to Supabase and charge credits
+        task = await queue_transcription("audio", upload)
+        # A client that disconnects cancels its job rather than leave a worker transcribing for nobody
+        try:
+            job = await wait_for_result(task["task_id"], request)
+        except TimeoutError:
+            return timeout_response("audio", task["task_id"])
+        if job is None:
+            return cancelled_response()
+        logger.info(f"Job {task['task_id']} finished with status {job['status']}")
+
+        if job["status"] == "failed":
+            raise Exception(job["error"])
+        return result_response(job)
+
+    except UploadRejected as e:
+        return rejected_response(e)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Exception during transcription: {e}")
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"Cleaned up file after exception: {file_path}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/submit", status_code=202)
+async def submit_audio(request: Request) -> Dict:
+    """Queue a audio file and return its task id immediately; poll task-status/result for the outcome."""
+    try:
+        upload = await receive_upload(request, supabase)
+    except UploadRejected as e:
+        return rejected_response(e)
+
+    task = await queue_transcription("audio", upload)
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "task_id": task["task_id"],
+        **task_links("audio", task["task_id"]),
+    })
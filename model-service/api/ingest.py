@@ -0,0 +1,237 @@
+import os
+import asyncio
+import hashlib
+import logging
+from uuid import uuid4
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "2048")) * 1024 * 1024)
+MAX_MEDIA_SECONDS = float(os.getenv("MAX_MEDIA_MINUTES", "240")) * 60
+# Probe the partial file once this much has arrived, to reject over-long media early
+PROBE_AFTER_BYTES = 4 * 1024 * 1024
+# Pending bytes are written to disk in blocks of this size, off the event loop
+FLUSH_BYTES = 1024 * 1024
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """An upload was refused before or while it was streamed to disk."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class _MultipartState:
+    """Collects form fields and streams the file part to disk with bounded memory."""
+
+    def __init__(self, dest_dir: str, file_field: str, max_bytes: int):
+        self.dest_dir = dest_dir
+        self.file_field = file_field
+        self.max_bytes = max_bytes
+        self.fields: Dict[str, str] = {}
+        self.file_id = str(uuid4())
+        self.file_path: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.file_bytes = 0
+        self.sha256 = hashlib.sha256()
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.handle = None
+
+        self._headers: Dict[str, str] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part_name: Optional[str] = None
+        self._part_is_file = False
+        self._field_value = bytearray()
+
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._part_name = None
+        self._part_is_file = False
+        self._field_value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.decode("latin-1").lower()] = self._header_value.decode("latin-1")
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get("content-disposition"))
+        self._part_name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        filename = options.get(b"filename")
+        if self._part_name == self.file_field and filename is not None:
+            if self.file_path is not None:
+                raise UploadRejected(400, "Only one file may be uploaded per request")
+            self._part_is_file = True
+            self.filename = filename.decode("utf-8", errors="replace")
+            file_ext = self.filename.split(".")[-1].lower()
+            self.file_path = os.path.join(self.dest_dir, f"{self.file_id}.{file_ext}")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        if not self._part_is_file:
+            self._field_value += chunk
+            if len(self._field_value) > MAX_FIELD_BYTES:
+                raise UploadRejected(413, f"Form field '{self._part_name}' is too large")
+            return
+        self.file_bytes += len(chunk)
+        if self.file_bytes > self.max_bytes:
+            raise UploadRejected(413, f"File exceeds the {self.max_bytes // (1024 * 1024)} MB upload limit")
+        self.sha256.update(chunk)
+        self.pending.append(chunk)
+        self.pending_bytes += len(chunk)
+
+    def _on_part_end(self) -> None:
+        if not self._part_is_file and self._part_name:
+            self.fields[self._part_name] = self._field_value.decode("utf-8", errors="replace")
+
+    async def flush(self, force: bool = False) -> None:
+        """Write pending file bytes in a worker thread once a block has accumulated."""
+        if not self.pending or (not force and self.pending_bytes < FLUSH_BYTES):
+            return
+        block = b"".join(self.pending)
+        self.pending = []
+        self.pending_bytes = 0
+        if self.handle is None:
+            os.makedirs(self.dest_dir, exist_ok=True)
+            self.handle = await asyncio.to_thread(open, self.file_path, "wb")
+        await asyncio.to_thread(self.handle.write, block)
+
+    async def close(self) -> None:
+        if self.handle is not None:
+            await asyncio.to_thread(self.handle.close)
+            self.handle = None
+
+    async def discard(self) -> None:
+        await self.close()
+        if self.file_path and os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+
+async def probe_duration(path: str) -> Optional[float]:
+    """Best-effort duration of a (possibly partial) media file."""
+    from media_io import probe_media
+
+    try:
+        metadata = await asyncio.to_thread(probe_media, path)
+        return metadata["duration"] or None
+    except Exception:
+        # Containers with their index at the end cannot be probed before they are complete
+        return None
+
+
+def hash_file(path: str, chunk_size: int = FLUSH_BYTES) -> str:
+    """sha256 of a file on disk, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def ingest_upload(
+    request: Request,
+    dest_dir: str,
+    file_field: str = "file",
+    required_fields: Tuple[str, ...] = (),
+    validate_fields: Optional[Callable[[Dict[str, str]], Awaitable[None]]] = None,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    max_duration: float = MAX_MEDIA_SECONDS,
+) -> Dict:
+    """
+    Stream a multipart upload to disk without holding it in memory.
+
+    The file is hashed while it arrives. Oversized bodies are refused from
+    Content-Length or as soon as the limit is crossed, and the partial file
+    is probed after the first few MB so over-long media is rejected early.
+    validate_fields runs as soon as all required fields have arrived (before
+    the file, when the client sends them first) and may raise UploadRejected.
+
+    Returns:
+        Dict: fields, file_id, file_path, filename, size, sha256 and duration
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadRejected(415, "Expected a multipart/form-data upload")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MAX_FIELD_BYTES:
+        raise UploadRejected(413, f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+
+    state = _MultipartState(dest_dir, file_field, max_bytes)
+    parser = MultipartParser(options[b"boundary"], callbacks=state.callbacks())
+    validated = validate_fields is None
+    probed = False
+    duration = None
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            await state.flush()
+
+            if not validated and all(name in state.fields for name in required_fields):
+                await validate_fields(state.fields)
+                validated = True
+
+            if not probed and state.file_bytes >= PROBE_AFTER_BYTES:
+                await state.flush(force=True)
+                await asyncio.to_thread(state.handle.flush)
+                probed = True
+                duration = await probe_duration(state.file_path)
+                if duration and duration > max_duration:
+                    raise UploadRejected(413, f"Media exceeds the {max_duration / 60:.0f} minute limit")
+
+        parser.finalize()
+        await state.flush(force=True)
+        await state.close()
+
+        missing = [name for name in required_fields if name not in state.fields]
+        if missing:
+            raise UploadRejected(422, f"Missing form fields: {', '.join(missing)}")
+        if state.file_path is None or state.file_bytes == 0:
+            raise UploadRejected(422, f"Missing file field '{file_field}'")
+        if not validated:
+            await validate_fields(state.fields)
+
+        duration = await probe_duration(state.file_path)
+        if duration and duration > max_duration:
+            raise UploadRejected(413, f"Media exceeds the {max_duration / 60:.0f} minute limit")
+    except BaseException:
+        await state.discard()
+        raise
+
+    logger.info(f"[Ingest] Stored {state.filename} ({state.file_bytes} bytes) at {state.file_path}")
+    return {
+        "fields": state.fields,
+        "file_id": state.file_id,
+        "file_path": state.file_path,
+        "filename": state.filename,
+        "size": state.file_bytes,
+        "sha256": state.sha256.hexdigest(),
+        "duration": duration,
+    }
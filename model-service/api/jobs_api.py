@@ -0,0 +1,388 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from supabase import Client
+from job_queue import get_job_queue, wait_for_job, TERMINAL_STATUSES
+from api.ingest import ingest_upload, UploadRejected
+from api.persistence import get_credits
+from engines import ENGINES
+from profiles import OUTPUTS, PROFILES
+from publisher import stored_objects
+
+logger = logging.getLogger(__name__)
+
+# Mounted under /analyze/audio and /analyze/video; job ids are global
+router = APIRouter()
+
+UPLOAD_DIR = "temp_uploads"
+
+# How often a stream looks for new segments, and how long an idle SSE stream waits before a keep-alive comment
+STREAM_POLL_INTERVAL = 0.5
+STREAM_KEEPALIVE_SECONDS = 15.0
+# How long a synchronous /transcribe request waits before answering 504 with the task id to poll instead
+SYNC_WAIT_SECONDS = float(os.getenv("SYNC_WAIT_SECONDS", "600"))
+
+# Optional form fields that pick how a request is transcribed, with their allowed values
+# progressive=1 publishes a fast preview result before the final one
+OPTION_FIELDS = {"engine": list(ENGINES), "profile": list(PROFILES), "output": list(OUTPUTS),
+                 "progressive": ["0", "1"]}
+
+
+def check_options(fields: Dict[str, str]) -> None:
+    """Refuse unknown engine, profile, output or progressive values."""
+    for name, choices in OPTION_FIELDS.items():
+        if fields.get(name) and fields[name] not in choices:
+            raise UploadRejected(422, f"{name} must be one of: {', '.join(choices)}")
+
+
+async def receive_upload(request: Request, supabase: Client) -> Dict:
+    """
+    Stream a transcription upload to disk. The user's credits are checked as
+    soon as user_id and duration arrive, so a refused request stops reading
+    the body instead of storing the whole file first.
+
+    Optional engine, profile and output fields pick the transcription
+    engine, decoding profile and SRT granularity for this request;
+    progressive=1 asks for a preview result first.
+
+    Returns:
+        Dict: The ingested upload with user_id, duration (in minutes) and the option fields added
+
+    Raises:
+        UploadRejected: Bad form fields, limits exceeded or insufficient credits
+    """
+    async def check_credits(fields: Dict[str, str]) -> None:
+        check_options(fields)
+        try:
+            duration = int(fields["duration"])
+        except ValueError:
+            raise UploadRejected(422, "duration must be an integer number of minutes")
+        current_credits = await get_credits(supabase, fields["user_id"])
+        if duration > current_credits:
+            logger.warning(f"User {fields['user_id']} has insufficient credits: {current_credits} needed: {duration}")
+            raise UploadRejected(402, f"Insufficient credits. You have {current_credits}, but {duration} are required.")
+
+    upload = await ingest_upload(
+        request, UPLOAD_DIR,
+        required_fields=("user_id", "duration"),
+        validate_fields=check_credits,
+    )
+    upload["user_id"] = upload["fields"]["user_id"]
+    upload["duration"] = int(upload["fields"]["duration"])
+    try:
+        # Fields sent after the file could not be refused before the body was read
+        check_options(upload["fields"])
+    except UploadRejected:
+        os.remove(upload["file_path"])
+        raise
+    for name in OPTION_FIELDS:
+        upload[name] = upload["fields"].get(name) or None
+    return upload
+
+
+def rejected_response(e: UploadRejected) -> JSONResponse:
+    return JSONResponse(status_code=e.status_code, content={"status": "error", "message": e.message})
+
+
+async def queue_transcription(kind: str, upload: Dict) -> Dict:
+    """
+    Queue an ingested upload for the inference workers. The workers
+    transcribe it, publish the outputs to Supabase and charge the user.
+
+    Returns:
+        Dict: task_id and file_id of the queued job
+    """
+    payload = {
+        "file_path": upload["file_path"],
+        "output_dir": UPLOAD_DIR,
+        **{name: upload[name] for name in OPTION_FIELDS if upload.get(name)},
+        "publish": {
+            "user_id": upload["user_id"],
+            "file_id": upload["file_id"],
+            "filename": upload["filename"],
+            "duration": upload["duration"],
+            "file_path": upload["file_path"],
+            "content_sha256": upload["sha256"],
+        },
+    }
+    task_id = await asyncio.to_thread(get_job_queue().submit, kind, payload)
+    logger.info(f"[Jobs] Queued {kind} job {task_id} for user {upload['user_id']}")
+    return {"task_id": task_id, "file_id": upload["file_id"]}
+
+
+async def cancel_job(task_id: str) -> Optional[str]:
+    """
+    Cancel a job (see JobQueue.cancel). A job cancelled before a worker
+    claimed it never reaches cleanup_job_files, so its upload is removed here.
+
+    Returns:
+        Optional[str]: The job status after the request, or None if unknown
+    """
+    queue = get_job_queue()
+    status = await asyncio.to_thread(queue.cancel, task_id)
+    if status == "cancelled":
+        job = await asyncio.to_thread(queue.get, task_id)
+        file_path = job["payload"].get("file_path")
+        if job["started_at"] is None and file_path and os.path.exists(file_path):
+            os.remove(file_path)
+    return status
+
+
+async def wait_for_result(task_id: str, request: Request) -> Optional[Dict]:
+    """
+    Wait for a job queued by a synchronous /transcribe request. If the client
+    disconnects first, the job is cancelled so its worker stops at the next
+    window and nothing is published or charged; None is returned then.
+
+    Raises:
+        TimeoutError: The job is still running after SYNC_WAIT_SECONDS (see timeout_response)
+    """
+    job = await wait_for_job(task_id, is_disconnected=request.is_disconnected, timeout=SYNC_WAIT_SECONDS)
+    if job is None:
+        status = await cancel_job(task_id)
+        logger.info(f"[Jobs] Client disconnected; cancelled job {task_id} ({status})")
+    return job
+
+
+def cancelled_response() -> JSONResponse:
+    return JSONResponse(status_code=410, content={"status": "cancelled", "message": "Job was cancelled"})
+
+
+def timeout_response(kind: str, task_id: str) -> JSONResponse:
+    """The job outlived the synchronous wait; it keeps running and can be polled by its task id."""
+    return JSONResponse(status_code=504, content={
+        "status": "pending",
+        "message": f"Transcription did not finish within {SYNC_WAIT_SECONDS:g} seconds; poll the task for the result",
+        "task_id": task_id,
+        **task_links(kind, task_id),
+    })
+
+
+def task_links(kind: str, task_id: str) -> Dict:
+    prefix = f"/analyze/{kind}"
+    return {
+        "status_url": f"{prefix}/task-status/{task_id}",
+        "result_url": f"{prefix}/result/{task_id}",
+        "cancel_url": f"{prefix}/cancel/{task_id}",
+        "stream_url": f"{prefix}/stream/{task_id}",
+    }
+
+
+def job_stats(job: Dict) -> Dict:
+    """
+    Processing statistics of a finished job, such as the fraction of the
+    file that was speech and, for the tiered profile, the fraction re-decoded
+    with the larger model.
+    """
+    data = (job["result"] or {}).get("data") or {}
+    return {
+        "speech_ratio": data.get("speech_ratio"),
+        "escalated_ratio": data.get("escalated_ratio"),
+        "profile": data.get("profile"),
+        "output": data.get("output"),
+    }
+
+
+def outputs(result: Dict) -> Dict:
+    """SRT text and JSON document carried by the results of progressive jobs."""
+    return {"srt": result["srt"], "transcript": result["transcript"]} if "transcript" in result else {}
+
+
+def result_response(job: Dict) -> JSONResponse:
+    """Build the same response the synchronous /transcribe endpoints return."""
+    if job["status"] == "completed":
+        return JSONResponse(status_code=200, content={
+            "status": "success",
+            "version": "final",
+            "message": "File processed and uploaded successfully",
+            "data": job["result"].get("upload_record") or job["result"].get("data"),
+            "stats": job_stats(job),
+            **outputs(job["result"]),
+        })
+    if job["status"] == "cancelled":
+        return cancelled_response()
+    if job["status"] == "failed":
+        return JSONResponse(status_code=500, content={"status": "error", "message": job["error"]})
+    if job["preview"]:
+        # Still pending, but the preview can be shown until the final result replaces it
+        return preview_response(job, status_code=202)
+    return JSONResponse(status_code=202, content={"status": job["status"], "progress": job["progress"]})
+
+
+def preview_response(job: Dict, status_code: int = 200) -> JSONResponse:
+    """The preview result of a progressive job, in the same shape as its final result."""
+    return JSONResponse(status_code=status_code, content={
+        "status": job["status"],
+        "version": "preview",
+        "progress": job["progress"],
+        "data": job["preview"]["data"],
+        **outputs(job["preview"]),
+    })
+
+
+async def _get_job(task_id: str) -> Dict:
+    job = await asyncio.to_thread(get_job_queue().get, task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown task: {task_id}")
+    return job
+
+
+@router.get("/task-status/{task_id}")
+async def task_status(task_id: str) -> Dict:
+    job = await _get_job(task_id)
+    return {
+        "task_id": job["id"],
+        "type": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "cancel_requested": job["cancel_requested"],
+        "preview_ready": job["preview"] is not None,
+        "error": job["error"],
+        "stats": job_stats(job) if job["status"] == "completed" else None,
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+@router.get("/result/{task_id}")
+async def task_result(task_id: str, version: Optional[str] = None):
+    """
+    The final result once the job completed, until then its preview if it
+    has one. version=preview returns the preview of a progressive job, also
+    after the final result is in.
+    """
+    job = await _get_job(task_id)
+    if version not in (None, "preview", "final"):
+        raise HTTPException(status_code=422, detail="version must be preview or final")
+    if version == "preview":
+        if job["preview"]:
+            return preview_response(job)
+        if job["payload"].get("progressive") != "1" or job["status"] in TERMINAL_STATUSES:
+            raise HTTPException(status_code=404, detail="Task has no preview")
+        return JSONResponse(status_code=202, content={"status": job["status"], "progress": job["progress"]})
+    if version == "final" and job["status"] not in TERMINAL_STATUSES:
+        return JSONResponse(status_code=202, content={"status": job["status"], "progress": job["progress"]})
+    return result_response(job)
+
+
+def stream_event(fmt: str, event: str, data: Dict) -> str:
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, **data}) + "\n"
+
+
+def progress_event(job: Dict, window: Dict) -> Dict:
+    """Share of the audio's samples transcribed, and the time left at the job's rate so far."""
+    fraction = window["samples_done"] / window["samples_total"] if window["samples_total"] else 1.0
+    eta = None
+    if job["started_at"] and fraction > 0:
+        eta = round((window["created_at"] - job["started_at"]) * (1 - fraction) / fraction, 1)
+    return {
+        "samples_done": window["samples_done"],
+        "samples_total": window["samples_total"],
+        "percent": round(100.0 * fraction, 1),
+        "eta_seconds": eta,
+    }
+
+
+@router.get("/stream/{task_id}")
+async def stream_task(task_id: str, request: Request, fmt: str = Query("sse", alias="format"),
+                      cancel_on_disconnect: bool = False):
+    """
+    Stream a job's segments as each window is transcribed, as server-sent
+    events (format=sse) or NDJSON (format=ndjson). Every window gives a
+    "segments" event with its stitched segments on the file's timeline and a
+    "progress" event; a tiered job's re-decoded regions follow as "replace"
+    events, and an "end" event carries the job's final status.
+    With cancel_on_disconnect=true, closing the stream cancels the job.
+    """
+    if fmt not in ("sse", "ndjson"):
+        raise HTTPException(status_code=422, detail="format must be sse or ndjson")
+    job = await _get_job(task_id)
+    queue = get_job_queue()
+
+    async def events():
+        seq = 0
+        last_sent = time.monotonic()
+        while True:
+            # Status first: windows written before the job finished are then read below
+            current = await asyncio.to_thread(queue.get, task_id)
+            for window in await asyncio.to_thread(queue.segments_since, task_id, seq):
+                seq = window["seq"]
+                if window["replaces"]:
+                    # Re-decoded segments that supersede the streamed ones between start and end
+                    start, end = window["replaces"]
+                    yield stream_event(fmt, "replace", {"seq": seq, "start": start, "end": end,
+                                                        "segments": window["segments"]})
+                else:
+                    yield stream_event(fmt, "segments", {"seq": seq, "segments": window["segments"]})
+                yield stream_event(fmt, "progress", progress_event(current, window))
+                last_sent = time.monotonic()
+            if current is None or current["status"] in TERMINAL_STATUSES:
+                yield stream_event(fmt, "end", {
+                    "status": current["status"] if current else "unknown",
+                    "error": current["error"] if current else None,
+                    "result_url": task_links(job["kind"], task_id)["result_url"],
+                })
+                return
+            if await request.is_disconnected():
+                if cancel_on_disconnect:
+                    status = await cancel_job(task_id)
+                    logger.info(f"[Jobs] Stream closed; cancelled job {task_id} ({status})")
+                return
+            if fmt == "sse" and time.monotonic() - last_sent > STREAM_KEEPALIVE_SECONDS:
+                # Keeps proxies from closing the stream during model loading or language ID
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if fmt == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/cancel/{task_id}")
+async def cancel_task(task_id: str) -> Dict:
+    status = await cancel_job(task_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown task: {task_id}")
+    if status in TERMINAL_STATUSES and status != "cancelled":
+        raise HTTPException(status_code=409, detail=f"Task already {status}")
+    return {"task_id": task_id, "status": status, "cancel_requested": status == "running"}
+
+
+@router.post("/align/{task_id}", status_code=202)
+async def align_task(task_id: str):
+    """
+    Queue word alignment for a completed job transcribed with segment
+    output. The new task's result links the word-level SRT and JSON.
+    """
+    job = await _get_job(task_id)
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Task is {job['status']}")
+    data = job["result"].get("data") or {}
+    publish = job["payload"].get("publish")
+    if data.get("output") != "segments" or not publish:
+        raise HTTPException(status_code=409, detail="Task has no stored segment-level transcription to align")
+
+    payload = {
+        "objects": stored_objects(job["kind"], data, publish),
+        "output_dir": UPLOAD_DIR,
+        "model_name": data["model"],
+        "publish": {"user_id": publish["user_id"], "file_id": publish["file_id"]},
+    }
+    align_id = await asyncio.to_thread(get_job_queue().submit, "align", payload)
+    logger.info(f"[Jobs] Queued alignment {align_id} of job {task_id}")
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "task_id": align_id,
+        **task_links(job["kind"], align_id),
+    })
@@ -2,11 +2,13 @@ import pyaudio
 import numpy as np
 from fastapi import APIRouter, Query, Request, WebSocket
 from fastapi.responses import StreamingResponse
-from faster_whisper import WhisperModel
 import logging
 import ffmpeg
 from starlette.websockets import WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
 from .audio_api import supabase
+from engines import compute_type
+from model_registry import default_device, get_model_registry
 
 router = APIRouter()
 
@@ -29,7 +31,8 @@ def audio_stream(language="en"):
                     frames_per_buffer=CHUNK_SIZE)
     try:
         logger.info("Loading Whisper model...")
-        model = WhisperModel(model_size, device="cpu", compute_type="int8")
+        model = get_model_registry().get(model_size, engine="faster_whisper",
+                                         compute_type=compute_type("faster_whisper", default_device()))
         logger.info("Whisper model loaded successfully.")
     except Exception as e:
         logger.error(f"Failed to load Whisper model: {e}")
@@ -92,7 +95,11 @@ async def websocket_transcribe(websocket: WebSocket):
     credits = 0
     current_time = 0.0
     try:
-        model = WhisperModel(model_size, device="cpu", compute_type="int8")
+        model = await run_in_threadpool(
+            # The model preload_and_warm loaded, with the faster_whisper engine's compute type
+            get_model_registry().get, model_size, engine="faster_whisper",
+            compute_type=compute_type("faster_whisper", default_device())
+        )
         logger.info("Whisper model loaded successfully.")
     except Exception as e:
         logger.error(f"Failed to load Whisper model: {e}")
@@ -111,7 +118,9 @@ async def websocket_transcribe(websocket: WebSocket):
         logger.info(f"Backend: Received user_id: {user_id}")
 
         # 3. Fetch user credits
-        user_data = supabase.table("user_credits").select("*").eq("id", user_id).single().execute()
+        user_data = await run_in_threadpool(
+            lambda: supabase.table("user_credits").select("*").eq("id", user_id).single().execute()
+        )
         credits = user_data.data["credits_remaining"]
         max_seconds = credits * 60  # 1 credit = 1 minute
 
@@ -120,7 +129,7 @@ async def websocket_transcribe(websocket: WebSocket):
         while True:
             audio_bytes = await websocket.receive_bytes()
             logger.info(f"Backend: Received audio chunk of size {len(audio_bytes)} bytes")
-            audio = decode_audio_bytes(audio_bytes)
+            audio = await run_in_threadpool(decode_audio_bytes, audio_bytes)
             if audio is None:
                 await websocket.send_json({"error": "Could not decode audio."})
                 continue
@@ -136,8 +145,10 @@ async def websocket_transcribe(websocket: WebSocket):
                 logger.warning(f"User {user_id} exceeded credit limit. Closing connection.")
                 break
 
-            # Transcribe as usual
-            segments, info = model.transcribe(audio, beam_size=5, language=language)
+            # Transcribe off the event loop; segments is a lazy generator, so drain it there too
+            segments = await run_in_threadpool(
+                lambda: list(model.transcribe(audio, beam_size=5, language=language)[0])
+            )
             results = []
             for segment in segments:
                 seg_start = float(segment.start) + current_time
@@ -174,11 +185,14 @@ async def websocket_transcribe(websocket: WebSocket):
             if current_time % 60 > 40:
                 credits_used += 1
             if credits_used > 0:
-                # Fetch current credits again to avoid race conditions
-                user_data = supabase.table("user_credits").select("*").eq("id", user_id).single().execute()
-                current_credits = user_data.data["credits_remaining"]
-                new_credits = max(current_credits - credits_used, 0)
-                supabase.table("user_credits").update({"credits_remaining": new_credits}).eq("id", user_id).execute()
+                def deduct():
+                    # Fetch current credits again to avoid race conditions
+                    user_data = supabase.table("user_credits").select("*").eq("id", user_id).single().execute()
+                    current_credits = user_data.data["credits_remaining"]
+                    new_credits = max(current_credits - credits_used, 0)
+                    supabase.table("user_credits").update({"credits_remaining": new_credits}).eq("id", user_id).execute()
+                    return new_credits
+                new_credits = await run_in_threadpool(deduct)
                 logger.info(f"Deducted {credits_used} credits from user {user_id}. Remaining: {new_credits}")
         try:
             await websocket.close()
@@ -0,0 +1,13 @@
+from starlette.concurrency import run_in_threadpool
+from supabase import Client
+
+# The Supabase client is blocking; run its calls in the threadpool
+# so a slow call never stalls the event loop.
+
+
+async def get_credits(supabase: Client, user_id: str) -> int:
+    """Return the user's remaining credits."""
+    def _query():
+        return supabase.table("user_credits").select("*").eq("id", user_id).single().execute()
+    user_data = await run_in_threadpool(_query)
+    return user_data.data["credits_remaining"]
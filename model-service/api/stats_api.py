@@ -27,3 +27,14 @@ def get_stats():
         "files_transcribed": file_count,
         "active_users": len(unique_users)
     }
+
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    """Hit/miss counters and size of the whole-file and per-window transcription caches."""
+    from transcription_cache import get_transcription_cache, get_window_cache
+
+    stats = {}
+    for name, cache in (("transcriptions", get_transcription_cache()), ("windows", get_window_cache())):
+        stats[name] = {"enabled": True, **cache.stats()} if cache else {"enabled": False}
+    return stats
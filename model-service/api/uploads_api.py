@@ -0,0 +1,199 @@
+import os
+import asyncio
+import hashlib
+import logging
+from typing import Dict
+from fastapi import APIRouter, Form, HTTPException, Request
+from fastapi.responses import JSONResponse
+from api.ingest import FLUSH_BYTES, MAX_MEDIA_SECONDS, MAX_UPLOAD_BYTES, hash_file, probe_duration
+from api.jobs_api import UPLOAD_DIR, queue_transcription, task_links
+from api.persistence import get_credits
+from upload_sessions import get_upload_sessions
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+supabase: Client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+# Mounted under /analyze; the media kind is part of the path
+router = APIRouter()
+
+KINDS = ("audio", "video")
+SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")) * 3600
+
+
+def _check_kind(kind: str) -> None:
+    if kind not in KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown media kind: {kind}")
+
+
+async def _get_session(kind: str, upload_id: str) -> Dict:
+    _check_kind(kind)
+    session = await asyncio.to_thread(get_upload_sessions().get, upload_id)
+    if session is None or session["kind"] != kind:
+        raise HTTPException(status_code=404, detail=f"Unknown upload: {upload_id}")
+    return session
+
+
+def _session_state(session: Dict) -> Dict:
+    store = get_upload_sessions()
+    prefix = f"/analyze/{session['kind']}/uploads/{session['id']}"
+    return {
+        "upload_id": session["id"],
+        "status": session["status"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "part_size": session["part_size"],
+        "total_parts": session["total_parts"],
+        "bytes_received": session["bytes_received"],
+        "received_ranges": store.received_ranges(session),
+        "missing_parts": store.missing_parts(session),
+        "part_url": prefix + "/parts/{part_number}",
+        "complete_url": prefix + "/complete",
+    }
+
+
+@router.post("/{kind}/uploads", status_code=201)
+async def create_upload(
+    kind: str,
+    filename: str = Form(...),
+    size: int = Form(...),  # total file size in bytes
+    user_id: str = Form(...),
+    duration: int = Form(...),  # duration in minutes
+):
+    """
+    Start a resumable upload. Send the file as numbered parts of part_size
+    bytes (PUT .../parts/{n}, raw body), in any order and with retries, then
+    POST .../complete to queue the transcription.
+    """
+    _check_kind(kind)
+    if size <= 0:
+        raise HTTPException(status_code=422, detail="size must be positive")
+    if size > MAX_UPLOAD_BYTES:
+        return JSONResponse(status_code=413, content={
+            "status": "error",
+            "message": f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit",
+        })
+
+    current_credits = await get_credits(supabase, user_id)
+    if duration > current_credits:
+        logger.warning(f"User {user_id} has insufficient credits: {current_credits} needed: {duration}")
+        return JSONResponse(status_code=402, content={
+            "status": "error",
+            "message": f"Insufficient credits. You have {current_credits}, but {duration} are required.",
+        })
+
+    store = get_upload_sessions()
+    purged = await asyncio.to_thread(store.purge_stale, SESSION_TTL)
+    if purged:
+        logger.info(f"[Uploads] Purged {purged} stale upload sessions")
+
+    session = await asyncio.to_thread(store.create, kind, user_id, duration, filename, size, UPLOAD_DIR)
+    logger.info(f"[Uploads] Opened {kind} upload {session['id']} for user {user_id}: {filename} ({size} bytes)")
+    return _session_state(session)
+
+
+@router.get("/{kind}/uploads/{upload_id}")
+async def upload_status(kind: str, upload_id: str) -> Dict:
+    """Report which parts and byte ranges have been received, so a client can resume."""
+    return _session_state(await _get_session(kind, upload_id))
+
+
+@router.put("/{kind}/uploads/{upload_id}/parts/{part_number}")
+async def upload_part(kind: str, upload_id: str, part_number: int, request: Request) -> Dict:
+    """Write one part straight to its offset in the upload file."""
+    session = await _get_session(kind, upload_id)
+    if session["status"] != "open":
+        raise HTTPException(status_code=409, detail=f"Upload is {session['status']}")
+    if not 0 <= part_number < session["total_parts"]:
+        raise HTTPException(status_code=416, detail=f"Part number must be in [0, {session['total_parts']})")
+
+    offset, expected = get_upload_sessions().part_range(session, part_number)
+    digest = hashlib.sha256()
+    written = 0
+    pending = bytearray()
+    fd = await asyncio.to_thread(os.open, session["file_path"], os.O_WRONLY)
+    try:
+        async for chunk in request.stream():
+            if written + len(pending) + len(chunk) > expected:
+                raise HTTPException(status_code=400, detail=f"Part {part_number} must be {expected} bytes")
+            digest.update(chunk)
+            pending += chunk
+            if len(pending) >= FLUSH_BYTES:
+                await asyncio.to_thread(os.pwrite, fd, bytes(pending), offset + written)
+                written += len(pending)
+                pending.clear()
+        if pending:
+            await asyncio.to_thread(os.pwrite, fd, bytes(pending), offset + written)
+            written += len(pending)
+    finally:
+        await asyncio.to_thread(os.close, fd)
+
+    if written != expected:
+        # Incomplete part: leave it unrecorded so the client resends it
+        raise HTTPException(status_code=400, detail=f"Part {part_number} must be {expected} bytes, got {written}")
+
+    sha256 = digest.hexdigest()
+    await asyncio.to_thread(get_upload_sessions().record_part, upload_id, part_number, written, sha256)
+    return {"upload_id": upload_id, "part_number": part_number, "size": written, "sha256": sha256}
+
+
+@router.post("/{kind}/uploads/{upload_id}/complete", status_code=202)
+async def complete_upload(kind: str, upload_id: str):
+    """Verify every part arrived and queue the assembled file for transcription."""
+    session = await _get_session(kind, upload_id)
+    store = get_upload_sessions()
+    missing = store.missing_parts(session)
+    if missing:
+        return JSONResponse(status_code=409, content={
+            "status": "incomplete",
+            "message": f"{len(missing)} parts are missing",
+            **_session_state(session),
+        })
+    if not await asyncio.to_thread(store.mark, upload_id, "finalizing", "open"):
+        raise HTTPException(status_code=409, detail="Upload is already being finalized")
+
+    try:
+        duration = await probe_duration(session["file_path"])
+        if duration and duration > MAX_MEDIA_SECONDS:
+            await asyncio.to_thread(store.delete, upload_id)
+            return JSONResponse(status_code=413, content={
+                "status": "error",
+                "message": f"Media exceeds the {MAX_MEDIA_SECONDS / 60:.0f} minute limit",
+            })
+
+        # The parts were written in place, so the session file is the assembled upload
+        upload = {
+            "file_id": upload_id,
+            "file_path": session["file_path"],
+            "filename": session["filename"],
+            "size": session["size"],
+            "sha256": await asyncio.to_thread(hash_file, session["file_path"]),
+            "duration": session["duration"],
+            "user_id": session["user_id"],
+        }
+        task = await queue_transcription(kind, upload)
+    except Exception:
+        await asyncio.to_thread(store.mark, upload_id, "open")
+        raise
+
+    # The job owns the file now; the worker removes it when done
+    await asyncio.to_thread(store.delete, upload_id, False)
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "task_id": task["task_id"],
+        **task_links(kind, task["task_id"]),
+    })
+
+
+@router.delete("/{kind}/uploads/{upload_id}")
+async def abort_upload(kind: str, upload_id: str) -> Dict:
+    """Abandon an upload and delete what was received."""
+    session = await _get_session(kind, upload_id)
+    if session["status"] != "open":
+        raise HTTPException(status_code=409, detail=f"Upload is {session['status']}")
+    await asyncio.to_thread(get_upload_sessions().delete, upload_id)
+    return {"upload_id": upload_id, "status": "aborted"}
@@ -0,0 +1,125 @@
+import os
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from media_io import SAMPLE_RATE
+
+# Whisper decodes at most 30 s at a time
+WINDOW_SECONDS = 30.0
+# Window boundaries may move this far back from WINDOW_SECONDS to land in a pause
+BOUNDARY_TOLERANCE_SECONDS = float(os.getenv("CHUNK_BOUNDARY_TOLERANCE", "5"))
+
+FRAME_SECONDS = 0.03
+# Pauses are found on RMS smoothed over this long, so a single quiet frame inside a word does not win
+SMOOTH_SECONDS = 0.3
+
+
+def frame_rms(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """Root-mean-square energy of consecutive non-overlapping frames."""
+    frame = max(1, int(frame_seconds * sample_rate))
+    usable = len(audio) // frame * frame
+    if usable == 0:
+        return np.zeros(1, dtype=np.float32)
+    frames = audio[:usable].reshape(-1, frame).astype(np.float32)
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+def smoothed_rms(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    rms = frame_rms(audio, sample_rate, frame_seconds)
+    width = max(1, int(SMOOTH_SECONDS / frame_seconds))
+    return np.convolve(rms, np.ones(width) / width, mode="same")
+
+
+def split_at_silence(audio: np.ndarray, span_seconds: float, search_seconds: float = 10.0,
+                     sample_rate: int = SAMPLE_RATE, max_seconds: Optional[float] = None) -> List[Tuple[int, int]]:
+    """
+    Cut audio into spans of about span_seconds, each boundary placed at the
+    quietest point within search_seconds of its target.
+
+    Without max_seconds the last span may run to 1.5 spans rather than leave
+    a sliver; with it, no span is longer than max_seconds (which should be
+    at least span_seconds + search_seconds).
+
+    Returns:
+        List[Tuple[int, int]]: (start_sample, end_sample) of consecutive spans
+    """
+    frame = int(FRAME_SECONDS * sample_rate)
+    energy = smoothed_rms(audio, sample_rate)
+    span = int(span_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+
+    longest = int(max_seconds * sample_rate) if max_seconds else span * 1.5
+
+    spans = []
+    start = 0
+    while len(audio) - start > longest:
+        lo = max(start // frame + 1, (start + span - search) // frame)
+        hi = min(len(energy), (start + span + search) // frame)
+        # A search range shorter than a frame (e.g. no tolerance) leaves nothing to choose from
+        cut = (lo + int(np.argmin(energy[lo:hi]))) * frame if lo < hi else start + span
+        spans.append((start, cut))
+        start = cut
+    spans.append((start, len(audio)))
+    return spans
+
+
+class Window:
+    """
+    One decode window: its samples and where each stretch of them sits on
+    the original timeline. A plain slice has a single piece; a window
+    packed from several speech regions has one piece per region.
+    """
+
+    def __init__(self, audio: np.ndarray, pieces: List[Tuple[int, int, int]], sample_rate: int = SAMPLE_RATE):
+        """
+        Args:
+            audio (np.ndarray): Window samples
+            pieces (List[Tuple[int, int, int]]): (offset in window, start in source, length) in samples
+        """
+        self.audio = audio
+        self.pieces = pieces
+        self.sample_rate = sample_rate
+        self._offsets = [offset for offset, _, _ in pieces]
+
+    @property
+    def start(self) -> float:
+        """Start of the window on the original timeline, in seconds."""
+        return self.pieces[0][1] / self.sample_rate
+
+    def to_timeline(self, t: float, is_end: bool = False) -> float:
+        """
+        Map a window-relative time in seconds to the original timeline.
+        An end time that falls exactly on a junction stays with the earlier piece.
+        """
+        sample = t * self.sample_rate
+        index = (bisect_left if is_end else bisect_right)(self._offsets, sample) - 1
+        offset, source_start, length = self.pieces[max(0, index)]
+        return (source_start + min(max(sample - offset, 0), length)) / self.sample_rate
+
+
+def silence_aligned_spans(audio: np.ndarray, window_seconds: float = WINDOW_SECONDS,
+                          tolerance_seconds: float = BOUNDARY_TOLERANCE_SECONDS,
+                          sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """
+    Spans of at most window_seconds whose boundaries sit at the quietest
+    point within the last tolerance_seconds of each window.
+    """
+    half = tolerance_seconds / 2
+    return split_at_silence(audio, window_seconds - half, search_seconds=half,
+                            sample_rate=sample_rate, max_seconds=window_seconds)
+
+
+def adaptive_windows(audio: np.ndarray, window_seconds: float = WINDOW_SECONDS,
+                     tolerance_seconds: float = BOUNDARY_TOLERANCE_SECONDS,
+                     sample_rate: int = SAMPLE_RATE) -> List[Window]:
+    """
+    Consecutive decode windows cut at low-energy points instead of on a
+    fixed grid. Boundaries fall between words, so windows need no overlap
+    and no segment is decoded twice.
+    """
+    return [
+        Window(audio[start:end], [(0, start, end - start)], sample_rate)
+        for start, end in silence_aligned_spans(audio, window_seconds, tolerance_seconds, sample_rate)
+    ]
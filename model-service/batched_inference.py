@@ -0,0 +1,256 @@
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_FFT, N_SAMPLES, HOP_LENGTH, mel_filters
+from whisper.timing import add_word_timestamps
+from whisper.tokenizer import get_tokenizer
+
+from engines import unaligned_words
+from transcription_cache import TranscriptionCache, memoized_window
+
+DEFAULT_BATCH_SIZE = int(os.getenv("TRANSCRIBE_BATCH_SIZE", "1"))
+
+# Same thresholds whisper_timestamped applies before falling back
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def batched_log_mel(windows: List[np.ndarray], n_mels: int, device) -> torch.Tensor:
+    """
+    Log-mel spectrograms of up to 30 s windows in one batched STFT.
+
+    Matches whisper.log_mel_spectrogram(pad_or_trim(w)) per window: the
+    dynamic-range clamp uses each window's own maximum, not the batch's.
+
+    Returns:
+        torch.Tensor: (len(windows), n_mels, 3000)
+    """
+    batch = np.zeros((len(windows), N_SAMPLES), dtype=np.float32)
+    for row, window in enumerate(windows):
+        batch[row, :min(len(window), N_SAMPLES)] = window[:N_SAMPLES]
+    audio = torch.from_numpy(batch).to(device)
+
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=torch.hann_window(N_FFT).to(device), return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    log_spec = torch.clamp(mel_filters(device, n_mels) @ magnitudes, min=1e-10).log10()
+    log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+
+class _EncodedModel:
+    """
+    Stands in for the model during word alignment so the decoder attends to
+    the batch's encoder output instead of running the encoder a second time.
+    """
+
+    def __init__(self, model, audio_features: torch.Tensor):
+        self._model = model
+        self._audio_features = audio_features
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def __call__(self, mel: torch.Tensor, tokens: torch.Tensor) -> torch.Tensor:
+        return self._model.decoder(tokens, self._audio_features)
+
+
+def _split_segments(tokens: List[int], tokenizer, window_duration: float) -> List[Dict]:
+    """Split decoded tokens into segments at consecutive timestamp tokens, as whisper.transcribe does."""
+    time_precision = 0.02
+    timestamp_begin = tokenizer.timestamp_begin
+    is_timestamp = [t >= timestamp_begin for t in tokens]
+    boundaries = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+
+    pieces: List[Tuple[float, float, List[int]]] = []
+    if boundaries:
+        if is_timestamp[-2:] == [False, True]:
+            boundaries.append(len(tokens))
+        last = 0
+        for boundary in boundaries:
+            piece = tokens[last:boundary]
+            pieces.append(((piece[0] - timestamp_begin) * time_precision,
+                           (piece[-1] - timestamp_begin) * time_precision, piece))
+            last = boundary
+        # A trailing segment without a closing timestamp runs to the end of the window
+        rest = tokens[last:]
+        if any(t < tokenizer.eot for t in rest):
+            start = (rest[0] - timestamp_begin) * time_precision if is_timestamp[last] else pieces[-1][1]
+            pieces.append((start, window_duration, rest))
+    else:
+        timestamps = [t for t in tokens if t >= timestamp_begin]
+        end = window_duration
+        if timestamps and timestamps[-1] != timestamp_begin:
+            end = (timestamps[-1] - timestamp_begin) * time_precision
+        pieces.append((0.0, end, tokens))
+
+    segments = []
+    for start, end, piece in pieces:
+        text_tokens = [t for t in piece if t < tokenizer.eot]
+        if not text_tokens:
+            continue
+        segments.append({
+            "seek": 0,
+            "start": start,
+            "end": min(end, window_duration),
+            "text": tokenizer.decode(text_tokens),
+            "tokens": piece,
+        })
+    return segments
+
+
+def decode_windows(model, windows: List[np.ndarray], language: Optional[str],
+                   fallback: Callable[[int], Dict], word_timestamps: bool = True) -> List[Dict]:
+    """
+    Transcribe several windows together: one batched mel, one batched
+    encoder pass and one batched greedy decode, then word alignment per
+    window on the shared encoder output (skipped without word_timestamps).
+
+    Windows that fail whisper's quality checks (repetitive or low
+    log-probability output) go through fallback(index), the
+    single-window path with its temperature fallback.
+
+    Returns:
+        List[Dict]: One whisper_timestamped-style result per window
+            (segments with window-relative words and confidences, language)
+    """
+    with torch.inference_mode():
+        mel = batched_log_mel(windows, model.dims.n_mels, model.device)
+        audio_features = model.embed_audio(mel)
+        options = whisper.DecodingOptions(
+            task="transcribe",
+            language=language,
+            temperature=0.0,
+            without_timestamps=False,
+            fp16=audio_features.dtype == torch.float16,
+        )
+        # Features of the right shape are used as-is, so the encoder is not run again
+        decoded = whisper.decode(model, audio_features, options)
+
+    results = []
+    for index, (window, result) in enumerate(zip(windows, decoded)):
+        no_speech = result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+        if no_speech:
+            results.append({"segments": [], "language": result.language, "text": ""})
+            continue
+        if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+            results.append(fallback(index))
+            continue
+
+        tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                  language=result.language, task="transcribe")
+        window_duration = len(window) / whisper.audio.SAMPLE_RATE
+        segments = _split_segments(result.tokens, tokenizer, window_duration)
+        num_frames = min(len(window), N_SAMPLES) // HOP_LENGTH
+        if not word_timestamps:
+            confidence = round(float(np.exp(result.avg_logprob)), 3)
+            for segment in segments:
+                segment["text"] = segment["text"].strip()
+                segment["words"] = unaligned_words(segment["text"], segment["start"], segment["end"], confidence)
+                segment["confidence"] = confidence
+                segment["avg_logprob"] = result.avg_logprob
+                segment["no_speech_prob"] = result.no_speech_prob
+            results.append({
+                "segments": [s for s in segments if s["words"]],
+                "language": result.language,
+                "text": result.text,
+            })
+            continue
+        with torch.inference_mode():
+            add_word_timestamps(
+                segments=segments,
+                model=_EncodedModel(model, audio_features[index:index + 1]),
+                tokenizer=tokenizer,
+                mel=mel[index],
+                num_frames=num_frames,
+                last_speech_timestamp=0.0,
+            )
+
+        for segment in segments:
+            words = [
+                {
+                    "text": w["word"].strip(),
+                    "start": w["start"],
+                    "end": w["end"],
+                    "confidence": round(float(w["probability"]), 3),
+                }
+                for w in segment.pop("words", [])
+            ]
+            segment["words"] = words
+            segment["confidence"] = round(float(np.mean([w["confidence"] for w in words])), 3) if words else 0.0
+            segment["avg_logprob"] = result.avg_logprob
+            segment["no_speech_prob"] = result.no_speech_prob
+            segment["text"] = segment["text"].strip()
+        results.append({
+            "segments": [s for s in segments if s["words"]],
+            "language": result.language,
+            "text": result.text,
+        })
+    return results
+
+
+def iter_window_results(
+    model,
+    windows: List[np.ndarray],
+    window_params: Callable[[int], Dict],
+    transcribe_fn: Callable[[int], Dict],
+    cache: Optional[TranscriptionCache] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    word_timestamps: bool = True,
+) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield (index, result) for every window in order.
+
+    With batch_size 1 each window goes through transcribe_fn, exactly as
+    before. Larger batch sizes decode the windows that miss the window
+    cache K at a time with decode_windows; transcribe_fn remains the
+    per-window fallback.
+
+    Args:
+        model: Loaded Whisper model
+        windows (List[np.ndarray]): Window samples at 16 kHz
+        window_params (Callable): Cache parameters of window i; its
+            "language" entry is the decode language
+        transcribe_fn (Callable): Single-window transcription of window i
+        cache (TranscriptionCache, optional): Window store
+        batch_size (int): Windows per batched forward pass (K)
+        word_timestamps (bool): Align words in batched decodes; otherwise
+            words carry their segment's times
+    """
+    if batch_size <= 1:
+        for index, window in enumerate(windows):
+            yield index, memoized_window(cache, window, window_params(index), lambda: transcribe_fn(index))
+        return
+
+    for batch_start in range(0, len(windows), batch_size):
+        indices = list(range(batch_start, min(batch_start + batch_size, len(windows))))
+        keys = {}
+        results: Dict[int, Dict] = {}
+        for index in indices:
+            if cache is None:
+                continue
+            # Batched output differs slightly from the sequential decoder; keep them apart
+            keys[index] = cache.make_key(windows[index], batched=True, **window_params(index))
+            cached = cache.get(keys[index])
+            if cached is not None:
+                results[index] = cached
+
+        misses = [index for index in indices if index not in results]
+        if misses:
+            decoded = decode_windows(
+                model,
+                [windows[index] for index in misses],
+                window_params(misses[0])["language"],
+                fallback=lambda position: transcribe_fn(misses[position]),
+                word_timestamps=word_timestamps,
+            )
+            for index, result in zip(misses, decoded):
+                if cache is not None:
+                    cache.put(keys[index], result)
+                results[index] = result
+
+        for index in indices:
+            yield index, results[index]
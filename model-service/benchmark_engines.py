@@ -0,0 +1,186 @@
+import argparse
+import copy
+import difflib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Each configuration is an engine plus the environment its models are loaded with
+CONFIGS = {
+    "whisper_timestamped": ("whisper_timestamped", {}),
+    "whisper_timestamped-int8": ("whisper_timestamped", {"WHISPER_CPU_COMPUTE_TYPE": "int8"}),
+    "whisper_timestamped-compile": ("whisper_timestamped", {"TORCH_COMPILE_ENCODER": "1"}),
+    "whisper_timestamped-int8-compile": ("whisper_timestamped", {"WHISPER_CPU_COMPUTE_TYPE": "int8",
+                                                                 "TORCH_COMPILE_ENCODER": "1"}),
+    "whisper_timestamped-segments": ("whisper_timestamped", {"TRANSCRIBE_OUTPUT": "segments"}),
+    # Spans of the file decoded by separate processes; compare against whisper_timestamped for scaling
+    "whisper_timestamped-spans2": ("whisper_timestamped", {"PARALLEL_SPAN_WORKERS": "2"}),
+    "whisper_timestamped-spans4": ("whisper_timestamped", {"PARALLEL_SPAN_WORKERS": "4"}),
+    "faster_whisper": ("faster_whisper", {}),
+}
+
+
+def cpu_seconds() -> float:
+    """User plus system CPU time of this process, over all its threads."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_config(config: str, input_path: str, model_name: str, device: str, threads: int,
+               profile: str = None) -> dict:
+    """Load one configuration and transcribe the input; runs in its own process so peak memory is its own."""
+    from inference_worker import configure_torch_threads
+
+    configure_torch_threads(threads)
+    from media_io import load_media
+    from transcriber import Transcriber
+
+    audio, metadata = load_media(input_path)
+    started = time.perf_counter()
+    transcriber = Transcriber(model_name=model_name, device=device, engine=CONFIGS[config][0], profile=profile)
+    # A short warm-up, so a compiled encoder is not timed while compiling
+    transcriber.warmup()
+    ready_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cpu_started = cpu_seconds()
+    # Without caches, so every window is really decoded
+    result = transcriber.transcribe(audio, use_cache=False)
+    transcribe_seconds = time.perf_counter() - started
+    transcribe_cpu_seconds = cpu_seconds() - cpu_started
+
+    segments = result["transcription"]["segments"]
+    align_seconds = align_cpu_seconds = None
+    word_times = transcriber.profile["output"] != "segments"
+    if not word_times and CONFIGS[config][0] == "whisper_timestamped":
+        from word_alignment import align_segments
+
+        # What a later POST /align costs for this segment output, timed on its own
+        started = time.perf_counter()
+        cpu_started = cpu_seconds()
+        segments = align_segments(transcriber.model, audio, copy.deepcopy(segments), result["language"])
+        align_seconds = time.perf_counter() - started
+        align_cpu_seconds = cpu_seconds() - cpu_started
+        word_times = True
+    words = [word for segment in segments for word in segment["words"]]
+    return {
+        "config": config,
+        "duration": metadata["duration"],
+        "ready_seconds": round(ready_seconds, 2),
+        "transcribe_seconds": round(transcribe_seconds, 2),
+        "rtf": round(transcribe_seconds / metadata["duration"], 4) if metadata["duration"] else None,
+        "output": transcriber.profile["output"],
+        "cpu_seconds_per_audio_hour": round(transcribe_cpu_seconds / metadata["duration"] * 3600, 1)
+        if metadata["duration"] else None,
+        "align_seconds": round(align_seconds, 2) if align_seconds is not None else None,
+        "align_cpu_seconds_per_audio_hour": round(align_cpu_seconds / metadata["duration"] * 3600, 1)
+        if align_cpu_seconds is not None and metadata["duration"] else None,
+        "word_times": word_times,
+        # ru_maxrss is in KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "language": result["language"],
+        "mean_confidence": round(sum(w["confidence"] for w in words) / len(words), 3) if words else None,
+        "words": [[w["text"], w["start"], w["end"]] for w in words],
+    }
+
+
+def compare_words(reference: list, candidate: list) -> dict:
+    """Word error rate of candidate against reference, and timestamp drift over the words both contain."""
+    import jiwer
+
+    ref_text = " ".join(w[0] for w in reference).lower() or "-"
+    cand_text = " ".join(w[0] for w in candidate).lower() or "-"
+    matcher = difflib.SequenceMatcher(a=[w[0].lower() for w in reference], b=[w[0].lower() for w in candidate],
+                                      autojunk=False)
+    drifts = [
+        max(abs(reference[block.a + k][1] - candidate[block.b + k][1]),
+            abs(reference[block.a + k][2] - candidate[block.b + k][2]))
+        for block in matcher.get_matching_blocks()
+        for k in range(block.size)
+    ]
+    return {
+        "wer": jiwer.wer(ref_text, cand_text),
+        "matched_words": len(drifts),
+        "mean_drift": sum(drifts) / len(drifts) if drifts else 0.0,
+        "max_drift": max(drifts) if drifts else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare real-time factor, memory and word timestamps of transcription engines and CPU options on one file"
+    )
+    parser.add_argument("input", help="Path to input audio/video file")
+    parser.add_argument("--model", "-m", default=None,
+                        help="Whisper model size to use for every configuration (default: the profile's model)")
+    parser.add_argument("--profile", "-p", default=None, help="Decoding profile for every configuration")
+    parser.add_argument("--device", default="cpu", help="Device to run on")
+    parser.add_argument("--configs", nargs="+", default=["whisper_timestamped", "faster_whisper"],
+                        choices=list(CONFIGS),
+                        help="Configurations to run; the first one is the reference for parity")
+    parser.add_argument("--threads", "-t", type=int, default=os.cpu_count() or 1,
+                        help="torch intra-op threads (default: all cores)")
+    parser.add_argument("--max-wer", type=float, default=0.05,
+                        help="Largest word error rate against the reference that still passes parity")
+    parser.add_argument("--max-drift", type=float, default=0.2,
+                        help="Largest mean word start/end drift in seconds that still passes parity")
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_config(args.single, args.input, args.model, args.device, args.threads, args.profile)))
+        return 0
+
+    if not os.path.isfile(args.input):
+        print(f"Error: Input file '{args.input}' does not exist")
+        return 1
+
+    results = []
+    for config in args.configs:
+        print(f"Running {config}...")
+        # A fresh process per configuration, so one's peak memory does not count against another
+        options = [f"--{name}={value}" for name, value in (("model", args.model), ("profile", args.profile)) if value]
+        completed = subprocess.run(
+            [sys.executable, __file__, args.input, *options, "--device", args.device,
+             "--threads", str(args.threads), "--single", config],
+            capture_output=True, text=True, env=dict(os.environ, **CONFIGS[config][1]),
+        )
+        if completed.returncode != 0:
+            print(f"Error running {config}: {completed.stderr.strip()}")
+            return 1
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"\n{'config':<34}{'ready s':>9}{'decode s':>10}{'RTF':>8}{'CPU s/h':>10}{'peak MB':>10}{'words':>7}{'conf':>7}")
+    for r in results:
+        print(f"{r['config']:<34}{r['ready_seconds']:>9}{r['transcribe_seconds']:>10}{r['rtf']:>8}"
+              f"{r['cpu_seconds_per_audio_hour']:>10}{r['peak_rss_mb']:>10}{len(r['words']):>7}"
+              f"{r['mean_confidence'] or 0:>7}")
+
+    # Parity of every configuration against the first one
+    failed = False
+    for r in results[1:]:
+        parity = compare_words(results[0]["words"], r["words"])
+        # Segment output has no word times unless it was aligned, so only its text is compared then
+        timed = r["word_times"] and results[0]["word_times"]
+        passed = parity["wer"] <= args.max_wer and (not timed or parity["mean_drift"] <= args.max_drift)
+        failed = failed or not passed
+        drift = f"drift mean {parity['mean_drift']:.3f}s max {parity['max_drift']:.3f}s" if timed else "no word times"
+        saved = results[0]["cpu_seconds_per_audio_hour"] - r["cpu_seconds_per_audio_hour"]
+        print(f"{r['config']} vs {results[0]['config']}: WER {parity['wer']:.2%}, "
+              f"{parity['matched_words']} matched words, {drift}, "
+              f"{saved:+.0f} CPU s saved per audio hour - {'PASS' if passed else 'FAIL'}")
+    for r in results:
+        if r["align_seconds"] is not None:
+            saved = results[0]["cpu_seconds_per_audio_hour"] - r["cpu_seconds_per_audio_hour"]
+            print(f"{r['config']}: on-demand alignment took {r['align_seconds']}s, "
+                  f"{r['align_cpu_seconds_per_audio_hour']} CPU s per audio hour; segment output saves "
+                  f"{saved:+.0f} CPU s per audio hour for files never aligned, "
+                  f"{saved - r['align_cpu_seconds_per_audio_hour']:+.0f} for files aligned later")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,33 @@
+import threading
+from typing import Callable, Optional
+
+
+class JobCancelled(Exception):
+    """Raised inside the pipeline when the job was cancelled through the API."""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation of one job. The pipeline calls check() between
+    windows and between stages, and stops there once the token has fired:
+    after cancel(), or as soon as poll (e.g. the job queue's cancel flag)
+    returns True.
+    """
+
+    def __init__(self, poll: Optional[Callable[[], bool]] = None):
+        self._cancelled = threading.Event()
+        self._poll = poll
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._cancelled.is_set() and self._poll is not None and self._poll():
+            self._cancelled.set()
+        return self._cancelled.is_set()
+
+    def check(self) -> None:
+        """Raise JobCancelled if the token has fired."""
+        if self.cancelled:
+            raise JobCancelled("Job was cancelled")
@@ -0,0 +1,188 @@
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Per-deployment default; /transcribe and /submit accept an "engine" form field per request
+DEFAULT_ENGINE = os.getenv("TRANSCRIBE_ENGINE", "whisper_timestamped")
+# Empty picks int8 on CPU and float16 on CUDA
+FASTER_WHISPER_COMPUTE_TYPE = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "")
+# float32, or int8 for dynamically quantized Linear layers; applies to the PyTorch model on CPU only
+WHISPER_CPU_COMPUTE_TYPE = os.getenv("WHISPER_CPU_COMPUTE_TYPE", "float32")
+
+
+def unaligned_words(text: str, start: float, end: float, confidence: float) -> List[Dict]:
+    """
+    Words of a segment decoded without word alignment. Each carries its
+    segment's times and confidence, so SRTs and word counts still work.
+    """
+    return [{"text": word, "start": start, "end": end, "confidence": confidence} for word in text.split()]
+
+
+def compute_type(engine: str, device: str) -> str:
+    """Compute type an engine loads its models with on this device."""
+    if engine == "faster_whisper":
+        return FASTER_WHISPER_COMPUTE_TYPE or ("float16" if device == "cuda" else "int8")
+    return WHISPER_CPU_COMPUTE_TYPE if device == "cpu" else "float32"
+
+
+class WhisperTimestampedEngine:
+    """
+    PyTorch Whisper with whisper_timestamped word alignment. Its torch
+    model also serves batched decoding, span pools and encoder language ID.
+    """
+
+    name = "whisper_timestamped"
+    torch_model = True
+
+    def __init__(self, model_name: str, device: str, model=None):
+        # Imported here so HTTP workers do not pull in torch
+        from model_registry import get_model_registry
+
+        self.model_name = model_name
+        self.compute_type = compute_type(self.name, device)
+        # Quantized weights give slightly different results; keep them apart in the caches
+        self.cache_name = model_name if self.compute_type == "float32" else f"{model_name}:{self.compute_type}"
+        # Shared per worker process; only the first request pays the load cost
+        self.model = model if model is not None else get_model_registry().get(
+            model_name, device=device, compute_type=self.compute_type
+        )
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None,
+                   condition_on_previous_text: bool = True, beam_size: Optional[int] = None,
+                   best_of: Optional[int] = None, temperature=0.0, word_timestamps: bool = True) -> Dict:
+        import torch
+        import whisper
+        import whisper_timestamped as whisper_ts
+
+        # No autograd bookkeeping at all, cheaper than the no_grad whisper uses
+        with torch.inference_mode():
+            if word_timestamps:
+                return whisper_ts.transcribe(self.model, audio, language=language,
+                                             condition_on_previous_text=condition_on_previous_text,
+                                             beam_size=beam_size, best_of=best_of, temperature=temperature)
+            # Plain whisper skips the alignment pass over the cross-attention weights
+            result = whisper.transcribe(self.model, audio, language=language, verbose=None,
+                                        condition_on_previous_text=condition_on_previous_text,
+                                        beam_size=beam_size, best_of=best_of, temperature=temperature,
+                                        fp16=self.model.device.type == "cuda")
+        for segment in result["segments"]:
+            segment["text"] = segment["text"].strip()
+            segment["confidence"] = round(math.exp(segment["avg_logprob"]), 3)
+            segment["words"] = unaligned_words(segment["text"], round(segment["start"], 2),
+                                               round(segment["end"], 2), segment["confidence"])
+        return result
+
+    def identify_language(self, windows: List[np.ndarray], cache=None) -> Tuple[str, float]:
+        from language_id import identify_language
+
+        return identify_language(self.model, self.cache_name, windows, cache=cache)
+
+
+class FasterWhisperEngine:
+    """
+    CTranslate2 Whisper through faster-whisper, int8 on CPU by default.
+    Results are converted to the whisper_timestamped schema: segments with
+    words carrying text, start, end and confidence (the word probability).
+    """
+
+    name = "faster_whisper"
+    torch_model = False
+
+    def __init__(self, model_name: str, device: str, model=None):
+        from model_registry import get_model_registry
+
+        self.model_name = model_name
+        self.compute_type = compute_type(self.name, device)
+        # Kept apart from whisper_timestamped results in the caches, named like PRELOAD_MODELS entries
+        self.cache_name = f"{self.name}:{model_name}:{self.compute_type}"
+        self.model = model if model is not None else get_model_registry().get(
+            model_name, engine=self.name, device=device, compute_type=self.compute_type
+        )
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None,
+                   condition_on_previous_text: bool = True, beam_size: Optional[int] = None,
+                   best_of: Optional[int] = None, temperature=0.0, word_timestamps: bool = True) -> Dict:
+        # No beam size means greedy, as in whisper_timestamped
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            beam_size=beam_size or 1,
+            best_of=best_of or 1,
+            temperature=temperature,
+            condition_on_previous_text=condition_on_previous_text,
+            word_timestamps=word_timestamps,
+        )
+        result_segments = []
+        for segment in segments:
+            confidence = round(math.exp(segment.avg_logprob), 3)
+            words = unaligned_words(segment.text, round(segment.start, 2), round(segment.end, 2), confidence)
+            if word_timestamps:
+                words = [
+                    {
+                        "text": word.word.strip(),
+                        "start": round(word.start, 2),
+                        "end": round(word.end, 2),
+                        "confidence": round(word.probability, 3),
+                    }
+                    for word in segment.words or []
+                    if word.word.strip()
+                ]
+            result_segments.append({
+                "id": segment.id,
+                "seek": segment.seek,
+                "start": round(segment.start, 2),
+                "end": round(segment.end, 2),
+                "text": segment.text.strip(),
+                "tokens": segment.tokens,
+                "temperature": segment.temperature,
+                "avg_logprob": segment.avg_logprob,
+                "compression_ratio": segment.compression_ratio,
+                "no_speech_prob": segment.no_speech_prob,
+                "confidence": confidence,
+                "words": words,
+            })
+
+        result = {
+            "text": " ".join(segment["text"] for segment in result_segments),
+            "segments": result_segments,
+            "language": info.language,
+        }
+        if info.all_language_probs:
+            result["language_probs"] = dict(info.all_language_probs)
+        return result
+
+    def identify_language(self, windows: List[np.ndarray], cache=None) -> Tuple[str, float]:
+        from language_id import LANGUAGE_ID_WINDOWS, sample_windows
+
+        if not self.model.model.is_multilingual:
+            return "en", 1.0
+        chosen = sample_windows(len(windows), max(1, LANGUAGE_ID_WINDOWS))
+        totals: Dict[str, float] = {}
+        for index in chosen:
+            # Encoder plus one language-token step, as for the PyTorch engine
+            _, _, language_probs = self.model.detect_language(windows[index])
+            for code, p in language_probs:
+                totals[code] = totals.get(code, 0.0) + p / len(chosen)
+        language = max(totals, key=totals.get)
+        return language, round(totals[language], 4)
+
+
+ENGINES = {
+    WhisperTimestampedEngine.name: WhisperTimestampedEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+def load_engine(name: Optional[str], model_name: str, device: str, model=None):
+    """
+    Return the transcription engine called name (DEFAULT_ENGINE when None).
+
+    Raises:
+        ValueError: Unknown engine name
+    """
+    name = name or DEFAULT_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown transcription engine: {name}")
+    return ENGINES[name](model_name, device, model)
@@ -0,0 +1,115 @@
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cancellation import CancellationToken
+from media_io import SAMPLE_RATE
+from profiles import decode_options, profile_key
+from transcription_cache import TranscriptionCache, memoized_window
+
+# Seconds of context decoded on either side of a low-confidence run, never past its kept neighbours
+ESCALATION_PADDING = float(os.getenv("ESCALATION_PADDING", "0.5"))
+# One decoder window
+MAX_REGION_SECONDS = 30.0
+
+
+def mean_word_confidence(segment: Dict) -> float:
+    """Mean confidence of a segment's words, the value generate_srt filters on."""
+    words = segment["words"]
+    return sum(w["confidence"] for w in words) / len(words) if words else 0.0
+
+
+def escalation_regions(segments: List[Dict], threshold: float,
+                       duration: float) -> List[Tuple[float, float, int, int]]:
+    """
+    Stretches of audio to decode again with the larger model: runs of
+    consecutive segments whose mean word confidence is below threshold,
+    padded into the gaps to their neighbours and short enough for one window.
+
+    Args:
+        segments (List[Dict]): Segments on the audio's timeline, in order
+        threshold (float): Mean word confidence below which a segment is escalated
+        duration (float): Length of the audio in seconds
+
+    Returns:
+        List[Tuple[float, float, int, int]]: (start, end) in seconds and the
+            [first, last) range of segments each region replaces
+    """
+    longest_run = MAX_REGION_SECONDS - 2 * ESCALATION_PADDING
+    regions = []
+    index = 0
+    while index < len(segments):
+        segment = segments[index]
+        # Segments stretched past one window by the VAD timeline mapping keep their draft text
+        if mean_word_confidence(segment) >= threshold or segment["end"] - segment["start"] > longest_run:
+            index += 1
+            continue
+        first = index
+        while (index + 1 < len(segments) and mean_word_confidence(segments[index + 1]) < threshold
+               and segments[index + 1]["end"] - segments[first]["start"] <= longest_run):
+            index += 1
+        last = index + 1
+
+        previous_end = segments[first - 1]["end"] if first > 0 else 0.0
+        next_start = segments[last]["start"] if last < len(segments) else duration
+        start = max(previous_end, segments[first]["start"] - ESCALATION_PADDING)
+        end = min(next_start, segments[last - 1]["end"] + ESCALATION_PADDING)
+        regions.append((start, end, first, last))
+        index = last
+    return regions
+
+
+def escalate_segments(engine, audio: np.ndarray, segments: List[Dict], language: Optional[str],
+                      profile: Dict, cache: Optional[TranscriptionCache] = None,
+                      cancel_token: Optional[CancellationToken] = None,
+                      region_callback: Optional[Callable[[List[Dict], Tuple[float, float]], None]] = None
+                      ) -> Tuple[List[Dict], float]:
+    """
+    Decode the low-confidence regions of a draft transcription again with
+    a larger model and merge its segments in place of the draft's.
+
+    Args:
+        engine: Transcription engine of the larger model
+        audio (np.ndarray): The transcribed audio at 16 kHz
+        segments (List[Dict]): Draft segments on the audio's timeline
+        language (str, optional): Language of the draft
+        profile (Dict): Decoding profile with escalate_below
+        cache (TranscriptionCache, optional): Window store for the re-decoded regions
+        cancel_token (CancellationToken, optional): Checked before each region is decoded
+        region_callback (Callable, optional): Called with (segments, replaces) after each
+            region, where replaces is the (start, end) of the draft segments it superseded
+
+    Returns:
+        Tuple[List[Dict], float]: The merged segments and the seconds of audio re-decoded
+    """
+    regions = escalation_regions(segments, profile["escalate_below"], len(audio) / SAMPLE_RATE)
+    merged = []
+    kept = 0
+    for start, end, first, last in regions:
+        if cancel_token:
+            cancel_token.check()
+        merged.extend(segments[kept:first])
+        replaces = (segments[first]["start"], segments[last - 1]["end"])
+        region_audio = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        result = memoized_window(
+            cache, region_audio,
+            {"model": engine.cache_name, "language": language, "condition_on_previous_text": False,
+             **profile_key(profile)},
+            lambda: engine.transcribe(region_audio, language=language, condition_on_previous_text=False,
+                                      **decode_options(profile))
+        )
+        for segment in result["segments"]:
+            # Region-relative times back onto the original timeline
+            segment["start"] = round(min(start + segment["start"], end), 2)
+            segment["end"] = round(min(start + segment["end"], end), 2)
+            for word in segment["words"]:
+                word["start"] = round(min(start + word["start"], end), 2)
+                word["end"] = round(min(start + word["end"], end), 2)
+            segment["escalated"] = True
+            merged.append(segment)
+        if region_callback:
+            region_callback(result["segments"], replaces)
+        kept = last
+    merged.extend(segments[kept:])
+    return merged, sum(end - start for start, end, _, _ in regions)
@@ -0,0 +1,33 @@
+import json
+import os
+from typing import Dict
+
+# Model of the first pass of progressive jobs; add it to PRELOAD_MODELS so the preview does not wait for a load
+PREVIEW_MODEL = os.getenv("PREVIEW_MODEL", "tiny")
+
+# Local paths in a processor's data block; they are gone once a preview or job is finished
+LOCAL_PATHS = ("srt_path", "json_path", "audio_path")
+
+
+def read_outputs(srt_path: str, json_path: str) -> Dict:
+    """The SRT text and the JSON document of a transcription, for clients to render from the job result."""
+    with open(json_path, encoding="utf-8") as f:
+        transcript = json.load(f)
+    with open(srt_path, encoding="utf-8") as f:
+        srt = f.read()
+    return {"srt": srt, "transcript": transcript}
+
+
+def preview_result(data: Dict, keep: str) -> Dict:
+    """
+    Package a preview pass for the job queue and remove its files, except
+    keep (the uploaded file itself, which the final pass still needs).
+    """
+    try:
+        return {"data": {k: v for k, v in data.items() if k not in LOCAL_PATHS},
+                **read_outputs(data["srt_path"], data["json_path"])}
+    finally:
+        for name in LOCAL_PATHS:
+            path = data.get(name)
+            if path and path != keep and os.path.exists(path):
+                os.remove(path)
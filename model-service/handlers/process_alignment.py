@@ -0,0 +1,64 @@
+from typing import Callable, Dict, Optional
+import os
+from uuid import uuid4
+
+from cancellation import CancellationToken
+
+class AlignmentProcessor:
+    def run_job(self, objects: Dict, output_dir: str, model_name: str,
+                progress_callback: Optional[Callable[[int, int], None]] = None,
+                cancel_token: Optional[CancellationToken] = None) -> Dict:
+        """
+        Add word timestamps to a stored transcription that was made with
+        segment output. Runs inside an inference worker, never in the web process.
+
+        Args:
+            objects (Dict): Storage paths of the job's "media" (None without audible sound) and "json"
+            output_dir (str): Directory for the downloaded and aligned files
+            model_name (str): Model that decoded the segments; its tokens are aligned with it
+            cancel_token (CancellationToken, optional): Checked before each window is aligned
+        """
+        # Imported here so HTTP workers do not pull in torch
+        from publisher import fetch_from_storage
+        from transcriber import Transcriber
+
+        source_json_path = audio_path = None
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            base_path = os.path.join(output_dir, uuid4().hex)
+            source_json_path = fetch_from_storage(objects["json"], f"{base_path}.json")
+            if objects.get("media"):
+                audio_path = fetch_from_storage(objects["media"], f"{base_path}.{objects['media'].split('.')[-1]}")
+
+            print(f"Aligning words of {objects['json']}")
+            # Alignment needs the PyTorch model, whichever engine decoded the segments; nothing is
+            # decoded, the profile only has to keep word timestamps so the SRT filters aligned words
+            transcriber = Transcriber(model_name=model_name, engine="whisper_timestamped", profile="balanced",
+                                      output="words")
+            result = transcriber.align_media(audio_path, source_json_path, output_dir, min_confidence=0.5,
+                                             progress_callback=progress_callback, cancel_token=cancel_token)
+
+            return {
+                "status": "success",
+                "data": {
+                    "word_count": result["word_count"],
+                    "detected_language": result["language"],
+                    "audio_path": audio_path,
+                    "srt_path": result["srt_path"],
+                    "json_path": result["json_path"]
+                },
+                "error": None
+            }
+        except Exception as e:
+            print(f"Error aligning words: {str(e)}")
+            # No data is returned, so the worker cannot clean up the download itself
+            if audio_path and os.path.exists(audio_path):
+                os.remove(audio_path)
+            return {
+                "status": "error",
+                "data": None,
+                "error": str(e)
+            }
+        finally:
+            if source_json_path and os.path.exists(source_json_path):
+                os.remove(source_json_path)
@@ -8,32 +8,54 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../python')))
 
-from transcriber import Transcriber
-from typing import Dict
+from typing import Callable, Dict, List, Optional
 import os
 
+from cancellation import CancellationToken, JobCancelled
+from handlers.preview import PREVIEW_MODEL, preview_result, read_outputs
+
 class AudioProcessor:
-    async def process_file(self, file_path: str, output_dir: str) -> Dict:
+    def run_job(self, file_path: str, output_dir: str, model_name: Optional[str] = None,
+                progress_callback: Optional[Callable[[int, int], None]] = None,
+                engine: Optional[str] = None, profile: Optional[str] = None,
+                output: Optional[str] = None, progressive: Optional[str] = None,
+                preview_callback: Optional[Callable[[Dict], None]] = None,
+                segment_callback: Optional[Callable[[List[Dict], int, int], None]] = None,
+                cancel_token: Optional[CancellationToken] = None) -> Dict:
+        """
+        Transcribe a file. Runs inside an inference worker, never in the web process.
+
+        With progressive "1", a fast pass with PREVIEW_MODEL is handed to
+        preview_callback before the requested transcription starts.
+        segment_callback receives the requested transcription's segments
+        window by window. Both passes stop at the next window once
+        cancel_token fires, and leave no outputs behind.
+        """
+        # Imported here so HTTP workers do not pull in torch
+        from transcriber import Transcriber
+
         try:
+            if progressive == "1" and preview_callback:
+                self._preview(file_path, output_dir, engine, preview_callback, cancel_token)
+
             print(f"Processing audio file: {file_path}")
-            transcriber = Transcriber(model_name="turbo")  # Instantiate per request
+            transcriber = Transcriber(model_name=model_name, engine=engine, profile=profile, output=output)  # Model comes from the shared registry
             result = transcriber.process_media(
                 file_path,
                 output_dir,
-                min_confidence=0.5
+                min_confidence=0.5,
+                progress_callback=progress_callback,
+                segment_callback=segment_callback,
+                cancel_token=cancel_token
             )
             print(f"Transcription result: {result}")
 
+            data = self._data(file_path, result)
             return {
                 "status": "success",
-                "data": {
-                    "duration": result["duration"],
-                    "word_count": result["word_count"],
-                    "detected_language": result["language"],
-                    "srt_filename": os.path.basename(file_path),
-                    "srt_path": result["srt_path"],
-                    "json_path": result["json_path"]
-                },
+                "data": data,
+                # Progressive jobs carry their final outputs too, in the same shape as the preview's
+                **(read_outputs(data["srt_path"], data["json_path"]) if progressive == "1" else {}),
                 "error": None
             }
         except Exception as e:
@@ -43,3 +65,36 @@ class AudioProcessor:
                 "data": None,
                 "error": str(e)
             }
+
+    def _preview(self, file_path: str, output_dir: str, engine: Optional[str],
+                 preview_callback: Callable[[Dict], None],
+                 cancel_token: Optional[CancellationToken] = None) -> None:
+        """Hand a fast PREVIEW_MODEL pass to preview_callback; a failed preview only loses the preview."""
+        from transcriber import Transcriber
+
+        try:
+            print(f"Previewing audio file: {file_path}")
+            # Segment output, so the preview SRT is complete whatever the small model's confidence
+            preview = Transcriber(model_name=PREVIEW_MODEL, engine=engine, profile="fast", output="segments")
+            result = preview.process_media(file_path, os.path.join(output_dir, "preview"), min_confidence=0.5,
+                                           cancel_token=cancel_token)
+            preview_callback(preview_result(self._data(file_path, result), keep=file_path))
+        except JobCancelled:
+            raise
+        except Exception as e:
+            print(f"Error previewing audio: {str(e)}")
+
+    def _data(self, file_path: str, result: Dict) -> Dict:
+        return {
+            "duration": result["duration"],
+            "word_count": result["word_count"],
+            "detected_language": result["language"],
+            "srt_filename": os.path.basename(file_path),
+            "srt_path": result["srt_path"],
+            "json_path": result["json_path"],
+            "speech_ratio": result.get("speech_ratio"),
+            "escalated_ratio": result.get("escalated_ratio"),
+            "profile": result.get("profile"),
+            "model": result.get("model"),
+            "output": result.get("output")
+        }
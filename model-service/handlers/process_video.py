@@ -4,51 +4,62 @@
 # def transcribe_video_from_file(input_path: str, output_dir: str, model: str = "turbo", min_confidence: float = 0.5):
 #     transcriber = VideoTranscriber(model_name=model)
 #     return transcriber.process_video(input_path, output_dir, min_confidence)
-import moviepy.editor as mp
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../python')))
 
-from video_transcriber import VideoTranscriber
-from typing import Dict
+from typing import Callable, Dict, List, Optional
 import os
 
+from cancellation import CancellationToken, JobCancelled
+from handlers.preview import PREVIEW_MODEL, preview_result, read_outputs
+
 class VideoProcessor:
-    async def process_file(self, file_path: str, output_dir: str) -> Dict:
+    def run_job(self, file_path: str, output_dir: str, model_name: Optional[str] = None,
+                progress_callback: Optional[Callable[[int, int], None]] = None,
+                engine: Optional[str] = None, profile: Optional[str] = None,
+                output: Optional[str] = None, progressive: Optional[str] = None,
+                preview_callback: Optional[Callable[[Dict], None]] = None,
+                segment_callback: Optional[Callable[[List[Dict], int, int], None]] = None,
+                cancel_token: Optional[CancellationToken] = None) -> Dict:
+        """
+        Transcribe a video. Runs inside an inference worker, never in the web process.
+
+        With progressive "1", a fast pass with PREVIEW_MODEL is handed to
+        preview_callback before the requested transcription starts.
+        segment_callback receives the requested transcription's segments
+        window by window. Both passes stop at the next window once
+        cancel_token fires, and leave no outputs behind.
+        """
+        # Imported here so HTTP workers do not pull in torch
+        from video_transcriber import VideoTranscriber
+
         try:
+            if progressive == "1" and preview_callback:
+                self._preview(file_path, output_dir, engine, preview_callback, cancel_token)
+
             print(f"Processing video file: {file_path}") # Add logging
-            transcriber = VideoTranscriber(model_name="turbo")  # Instantiate per request
+            transcriber = VideoTranscriber(model_name=model_name, engine=engine, profile=profile, output=output)  # Model comes from the shared registry
             result = transcriber.process_video(
                 file_path,
                 output_dir,
-                min_confidence=0.5
+                min_confidence=0.5,
+                progress_callback=progress_callback,
+                segment_callback=segment_callback,
+                cancel_token=cancel_token
             )
             print(f"Transcription result: {result}") # Add logging
             
             # Extract word count from segments
             # word_count = sum(len(segment.get('text', '').split()) for segment in result.get('segments', []))
-            transcription_stats = result.get('transcription_stats', {}) 
-            print(f"Transcription stats: {transcription_stats}") # Add logging
-
-            audio_path = os.path.splitext(file_path)[0] + ".wav"
-            if not os.path.exists(audio_path):
-                video = mp.VideoFileClip(file_path)
-                video.audio.write_audiofile(audio_path)
-                video.close()
-            
-            
+            print(f"Transcription stats: {result.get('transcription_stats', {})}") # Add logging
 
+            data = self._data(result)
             return {
                 "status": "success",
-                "data": {
-                    "word_count": transcription_stats.get('total_words', 0),
-                    "duration": transcription_stats.get('total_duration', 0),
-                    "detected_language": transcription_stats.get('language', 'unknown'),
-                    "srt_filename": os.path.basename(result.get('srt_path', '')),
-                    "srt_path": result.get('srt_path', ''),
-                    "audio_path": os.path.splitext(result.get('srt_path', ''))[0] + ".wav",
-                    "json_path": os.path.splitext(result.get('srt_path', ''))[0] + ".json"
-                },
+                "data": data,
+                # Progressive jobs carry their final outputs too, in the same shape as the preview's
+                **(read_outputs(data["srt_path"], data["json_path"]) if progressive == "1" else {}),
                 "error": None
             }
         except Exception as e:
@@ -57,4 +68,39 @@ class VideoProcessor:
                 "status": "error",
                 "data": None,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+
+    def _preview(self, file_path: str, output_dir: str, engine: Optional[str],
+                 preview_callback: Callable[[Dict], None],
+                 cancel_token: Optional[CancellationToken] = None) -> None:
+        """Hand a fast PREVIEW_MODEL pass to preview_callback; a failed preview only loses the preview."""
+        from video_transcriber import VideoTranscriber
+
+        try:
+            print(f"Previewing video file: {file_path}")
+            # Segment output, so the preview SRT is complete whatever the small model's confidence
+            preview = VideoTranscriber(model_name=PREVIEW_MODEL, engine=engine, profile="fast", output="segments")
+            result = preview.process_video(file_path, os.path.join(output_dir, "preview"), min_confidence=0.5,
+                                           cancel_token=cancel_token)
+            preview_callback(preview_result(self._data(result), keep=file_path))
+        except JobCancelled:
+            raise
+        except Exception as e:
+            print(f"Error previewing video: {str(e)}")
+
+    def _data(self, result: Dict) -> Dict:
+        transcription_stats = result.get('transcription_stats', {})
+        return {
+            "word_count": transcription_stats.get('total_words', 0),
+            "duration": transcription_stats.get('total_duration', 0),
+            "detected_language": transcription_stats.get('language', 'unknown'),
+            "srt_filename": os.path.basename(result.get('srt_path', '')),
+            "srt_path": result.get('srt_path', ''),
+            "audio_path": result.get('audio_path', ''),
+            "json_path": os.path.splitext(result.get('srt_path', ''))[0] + ".json",
+            "speech_ratio": transcription_stats.get('speech_ratio'),
+            "escalated_ratio": transcription_stats.get('escalated_ratio'),
+            "profile": transcription_stats.get('profile'),
+            "model": transcription_stats.get('model'),
+            "output": transcription_stats.get('output')
+        }
@@ -0,0 +1,240 @@
+import os
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+from uuid import uuid4
+from typing import Dict, Optional
+
+from cancellation import CancellationToken
+from job_queue import JobQueue
+
+HEARTBEAT_INTERVAL = 10.0
+PURGE_INTERVAL = 600.0
+# How often a worker looks for jobs left running by a worker that stopped heartbeating
+REQUEUE_INTERVAL = 30.0
+# How long main waits before replacing a worker process that exited
+RESPAWN_DELAY = 5.0
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_HOURS", "24")) * 3600
+
+
+def default_torch_threads(num_workers: int) -> int:
+    """Split the node's cores evenly between inference workers."""
+    return max(1, (os.cpu_count() or 1) // max(1, num_workers))
+
+
+def configure_torch_threads(num_threads: int) -> None:
+    """Pin intra-op threads before any model is loaded to avoid oversubscription."""
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+    import torch
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set once, before any inter-op parallel work has started
+        pass
+
+
+def run_job(job: Dict, queue: JobQueue) -> None:
+    """Run a queued job through its processor, publish the outputs and record the outcome."""
+    payload = dict(job["payload"])
+    publish = payload.pop("publish", None)
+    job_id = job["id"]
+    # Fires on POST /cancel, or when the client waiting on /transcribe disconnects;
+    # the pipeline checks it between windows and stages
+    token = CancellationToken(lambda: queue.is_cancel_requested(job_id))
+    payload["cancel_token"] = token
+
+    def on_progress(done: int, total: int) -> None:
+        queue.update_progress(job_id, done, total)
+        token.check()
+
+    # Progressive jobs publish a preview result while the final pass runs
+    if payload.get("progressive") == "1":
+        payload["preview_callback"] = lambda preview: queue.set_preview(job_id, preview)
+    # Segments are streamed to clients window by window (see the stream endpoint)
+    if job["kind"] in ("audio", "video"):
+        payload["segment_callback"] = lambda segments, done, total, replaces=None: queue.add_segments(
+            job_id, segments, done, total, replaces)
+
+    if job["kind"] == "audio":
+        from handlers.process_audio import AudioProcessor
+
+        processor = AudioProcessor()
+    elif job["kind"] == "video":
+        from handlers.process_video import VideoProcessor
+
+        processor = VideoProcessor()
+    elif job["kind"] == "align":
+        from handlers.process_alignment import AlignmentProcessor
+
+        processor = AlignmentProcessor()
+    else:
+        raise ValueError(f"Unknown job kind: {job['kind']}")
+
+    result = processor.run_job(progress_callback=on_progress, **payload)
+
+    try:
+        # Nothing is uploaded or charged for a job that was cancelled meanwhile
+        if token.cancelled:
+            queue.mark_cancelled(job_id)
+            print(f"[InferenceWorker] Job {job_id} cancelled")
+            return
+        if result["status"] == "error":
+            queue.fail(job_id, result["error"])
+            return
+        if publish and job["kind"] == "align":
+            from publisher import publish_alignment
+
+            result["upload_record"] = publish_alignment(result["data"], publish)
+        elif publish:
+            from publisher import publish_transcription
+
+            result["upload_record"] = publish_transcription(job["kind"], result["data"], publish)
+        queue.complete(job_id, result)
+    finally:
+        if publish:
+            from publisher import cleanup_job_files
+
+            cleanup_job_files(result.get("data"), publish)
+
+
+class _Heartbeat:
+    """Keeps the worker row fresh while the main thread is busy transcribing."""
+
+    def __init__(self, queue: JobQueue, worker_id: str, info: Dict):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.info = info
+        self.state = "starting"
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="worker-heartbeat", daemon=True)
+
+    def start(self) -> None:
+        self.queue.heartbeat(self.worker_id, self.state, self.info)
+        self._thread.start()
+
+    def set(self, state: str, **info) -> None:
+        self.state = state
+        self.info.update(info)
+        self.queue.heartbeat(self.worker_id, self.state, self.info)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.queue.heartbeat(self.worker_id, "stopped", self.info)
+
+    def _run(self) -> None:
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                self.queue.heartbeat(self.worker_id, self.state, self.info)
+            except Exception as e:
+                print(f"[InferenceWorker] Heartbeat failed: {e}")
+
+
+def run_worker(worker_id: str, torch_threads: int, poll_interval: float = 0.5,
+               db_path: Optional[str] = None) -> None:
+    """Load models once, then consume jobs from the local queue until stopped."""
+    configure_torch_threads(torch_threads)
+
+    from startup import ReadinessState, preload_and_warm
+
+    queue = JobQueue(db_path)
+    heartbeat = _Heartbeat(queue, worker_id, {"torch_threads": torch_threads})
+    heartbeat.start()
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    state = ReadinessState()
+    preload_and_warm(state, engines=["whisper_timestamped"])
+    snapshot = state.snapshot()
+    if not snapshot["ready"]:
+        heartbeat.set("failed", error=snapshot["error"])
+        return
+    heartbeat.set("ready", models=snapshot["models"])
+    print(f"[InferenceWorker] {worker_id} ready with {torch_threads} torch threads")
+
+    last_purge = 0.0
+    last_requeue = 0.0
+    try:
+        while not stopping.is_set():
+            if time.time() - last_purge > PURGE_INTERVAL:
+                queue.purge_finished(JOB_RETENTION_SECONDS)
+                last_purge = time.time()
+            # Not only at startup: a sibling worker can die while this one keeps running
+            if time.time() - last_requeue > REQUEUE_INTERVAL:
+                requeued = queue.requeue_orphaned()
+                if requeued:
+                    print(f"[InferenceWorker] Requeued {requeued} jobs left running by a stopped worker")
+                last_requeue = time.time()
+
+            job = queue.claim(worker_id)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+
+            heartbeat.set("busy", job_id=job["id"])
+            print(f"[InferenceWorker] {worker_id} running job {job['id']} ({job['kind']})")
+            try:
+                run_job(job, queue)
+            except Exception as e:
+                print(f"[InferenceWorker] Job {job['id']} failed: {e}")
+                queue.fail(job["id"], str(e))
+            heartbeat.set("ready", job_id=None)
+    finally:
+        heartbeat.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run inference workers that consume the local transcription queue")
+    parser.add_argument("--workers", "-w", type=int, default=int(os.getenv("INFERENCE_WORKERS", "1")),
+                        help="Number of inference worker processes")
+    parser.add_argument("--torch-threads", "-t", type=int, default=int(os.getenv("TORCH_NUM_THREADS", "0")),
+                        help="Intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--poll-interval", type=float, default=0.5,
+                        help="Seconds to sleep when the queue is empty")
+    args = parser.parse_args()
+
+    torch_threads = args.torch_threads or default_torch_threads(args.workers)
+    ctx = multiprocessing.get_context("spawn")
+
+    def spawn(index: int) -> multiprocessing.Process:
+        # A fresh id per process, so the jobs of a dead one are seen as orphaned
+        worker_id = f"{os.uname().nodename}-{index}-{uuid4().hex[:6]}"
+        process = ctx.Process(
+            target=run_worker,
+            args=(worker_id, torch_threads, args.poll_interval),
+            name=f"inference-worker-{index}",
+        )
+        process.start()
+        return process
+
+    processes = [spawn(index) for index in range(args.workers)]
+    print(f"Started {args.workers} inference workers with {torch_threads} torch threads each")
+
+    stopping = threading.Event()
+
+    def shutdown(*_):
+        stopping.set()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    # Replace workers that die (e.g. killed for memory) until asked to stop
+    while not stopping.wait(RESPAWN_DELAY):
+        for index, process in enumerate(processes):
+            if not process.is_alive() and not stopping.is_set():
+                print(f"[InferenceWorker] {process.name} exited with code {process.exitcode}; restarting it")
+                processes[index] = spawn(index)
+    for process in processes:
+        process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
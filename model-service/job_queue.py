@@ -0,0 +1,358 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+from contextlib import contextmanager
+from uuid import uuid4
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_DB_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join("jobs", "jobs.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    preview TEXT,
+    error TEXT,
+    worker_id TEXT,
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_segments (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    segments TEXT NOT NULL,
+    samples_done INTEGER NOT NULL,
+    samples_total INTEGER NOT NULL,
+    replaces TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER,
+    state TEXT NOT NULL,
+    info TEXT,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first schema version, applied to existing databases
+MIGRATIONS = {
+    ("jobs", "progress_done"): "ALTER TABLE jobs ADD COLUMN progress_done INTEGER NOT NULL DEFAULT 0",
+    ("jobs", "progress_total"): "ALTER TABLE jobs ADD COLUMN progress_total INTEGER NOT NULL DEFAULT 0",
+    ("jobs", "cancel_requested"): "ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0",
+    ("jobs", "preview"): "ALTER TABLE jobs ADD COLUMN preview TEXT",
+    ("job_segments", "replaces"): "ALTER TABLE job_segments ADD COLUMN replaces TEXT",
+}
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobQueue:
+    """
+    Local job queue shared by the HTTP workers and the inference workers.
+
+    Backed by a single SQLite file so every process on the node sees the
+    same queue without an external broker.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            for (table, column), statement in MIGRATIONS.items():
+                columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, kind: str, payload: Dict) -> str:
+        """Queue a job and return its id."""
+        job_id = str(uuid4())
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), time.time()),
+            )
+        return job_id
+
+    def claim(self, worker_id: str, kinds: Optional[List[str]] = None) -> Optional[Dict]:
+        """Atomically move the oldest queued job to running and return it."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            query = "SELECT * FROM jobs WHERE status = 'queued'"
+            params: list = []
+            if kinds:
+                query += f" AND kind IN ({','.join('?' for _ in kinds)})"
+                params.extend(kinds)
+            query += " ORDER BY created_at LIMIT 1"
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, started_at = ? WHERE id = ?",
+                (worker_id, time.time(), row["id"]),
+            )
+            conn.execute("COMMIT")
+            job = self._row_to_job(row)
+            job["status"] = "running"
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, result: Dict) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'completed', result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id),
+            )
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a job. Queued jobs are cancelled immediately; running jobs are
+        flagged and stopped by their worker.
+
+        Returns:
+            Optional[str]: The job status after the request, or None if unknown
+        """
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                (job_id,),
+            )
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["status"] if row else None
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._connection() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def mark_cancelled(self, job_id: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def update_progress(self, job_id: str, done: int, total: int) -> None:
+        """Record how many chunks of the job have been transcribed."""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress_done = ?, progress_total = ? WHERE id = ?",
+                (done, total, job_id),
+            )
+
+    def set_preview(self, job_id: str, preview: Dict) -> None:
+        """Store the preview result of a progressive job while its final pass runs."""
+        with self._connection() as conn:
+            conn.execute("UPDATE jobs SET preview = ? WHERE id = ?", (json.dumps(preview), job_id))
+
+    def add_segments(self, job_id: str, segments: List[Dict], samples_done: int, samples_total: int,
+                     replaces: Optional[Tuple[float, float]] = None) -> None:
+        """
+        Append the segments of one transcribed window, for clients streaming
+        the job. With replaces=(start, end), they supersede the segments
+        already appended within those times (a tiered profile's escalation).
+        """
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO job_segments (job_id, seq, segments, samples_done, samples_total, replaces, created_at) "
+                "SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?, ?, ? FROM job_segments WHERE job_id = ?",
+                # Batched decodes can leave numpy floats in the timestamps
+                (job_id, json.dumps(segments, default=float), samples_done, samples_total,
+                 json.dumps(replaces, default=float) if replaces else None, time.time(), job_id),
+            )
+
+    def segments_since(self, job_id: str, seq: int = 0) -> List[Dict]:
+        """Windows of segments appended after seq, in order."""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM job_segments WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, seq)
+            ).fetchall()
+        return [
+            {
+                "seq": row["seq"],
+                "segments": json.loads(row["segments"]),
+                "samples_done": row["samples_done"],
+                "samples_total": row["samples_total"],
+                "replaces": json.loads(row["replaces"]) if row["replaces"] else None,
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        ]
+
+    def requeue_orphaned(self, max_age: float = 60.0) -> int:
+        """
+        Put running jobs back in the queue when their worker stopped
+        heartbeating, e.g. after a crash or container restart.
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        orphaned = (
+            "status = 'running' AND (worker_id IS NULL OR worker_id NOT IN "
+            "(SELECT id FROM workers WHERE heartbeat_at >= ? AND state != 'stopped'))"
+        )
+        cutoff = time.time() - max_age
+        with self._connection() as conn:
+            # Jobs the user already cancelled are finished, not retried
+            conn.execute(
+                f"UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE cancel_requested = 1 AND {orphaned}",
+                (time.time(), cutoff),
+            )
+            # The next attempt streams its segments from the start again
+            conn.execute(f"DELETE FROM job_segments WHERE job_id IN (SELECT id FROM jobs WHERE {orphaned})", (cutoff,))
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL, started_at = NULL, "
+                f"progress_done = 0 WHERE {orphaned}",
+                (cutoff,),
+            )
+            return cursor.rowcount
+
+    def purge_finished(self, older_than: float) -> int:
+        """Delete terminal jobs that finished more than older_than seconds ago."""
+        placeholders = ",".join("?" for _ in TERMINAL_STATUSES)
+        with self._connection() as conn:
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                (*TERMINAL_STATUSES, time.time() - older_than),
+            )
+            conn.execute("DELETE FROM job_segments WHERE job_id NOT IN (SELECT id FROM jobs)")
+            return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def heartbeat(self, worker_id: str, state: str, info: Optional[Dict] = None) -> None:
+        """Record an inference worker's state for readiness reporting."""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO workers (id, pid, state, info, heartbeat_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET pid = excluded.pid, state = excluded.state, "
+                "info = excluded.info, heartbeat_at = excluded.heartbeat_at",
+                (worker_id, os.getpid(), state, json.dumps(info or {}), time.time()),
+            )
+
+    def workers(self, max_age: float = 30.0) -> List[Dict]:
+        """Return inference workers that reported within max_age seconds."""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM workers WHERE heartbeat_at >= ?", (time.time() - max_age,)
+            ).fetchall()
+        return [
+            {
+                "id": row["id"],
+                "pid": row["pid"],
+                "state": row["state"],
+                "info": json.loads(row["info"] or "{}"),
+                "heartbeat_at": row["heartbeat_at"],
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "payload": json.loads(row["payload"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "preview": json.loads(row["preview"]) if row["preview"] else None,
+            "error": row["error"],
+            "worker_id": row["worker_id"],
+            "progress": {
+                "done": row["progress_done"],
+                "total": row["progress_total"],
+                "percent": round(100.0 * row["progress_done"] / row["progress_total"], 1)
+                if row["progress_total"] else 0.0,
+            },
+            "cancel_requested": bool(row["cancel_requested"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return the queue for this process, creating the database on first use."""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
+
+
+async def wait_for_job(job_id: str, poll_interval: float = 0.5, queue: Optional[JobQueue] = None,
+                       is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                       timeout: Optional[float] = None) -> Optional[Dict]:
+    """
+    Poll until a job reaches a terminal state and return the final record.
+    Returns None instead once is_disconnected (e.g. Request.is_disconnected)
+    reports that the client waiting for the job has gone.
+
+    Raises:
+        TimeoutError: The job was not finished after timeout seconds; it keeps running
+    """
+    queue = queue or get_job_queue()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        # sqlite3 is blocking; keep it off the event loop
+        job = await asyncio.to_thread(queue.get, job_id)
+        if job is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        if job["status"] in TERMINAL_STATUSES:
+            return job
+        if is_disconnected and await is_disconnected():
+            return None
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Job {job_id} did not finish within {timeout:g} seconds")
+        await asyncio.sleep(poll_interval)
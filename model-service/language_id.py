@@ -0,0 +1,80 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import whisper
+
+from batched_inference import batched_log_mel
+from transcription_cache import TranscriptionCache
+
+# Windows sampled across the file for language ID; 0 or 1 detects inside the first window's decode instead,
+# which scores the same window from the encoder pass the decode needs anyway
+LANGUAGE_ID_WINDOWS = int(os.getenv("LANGUAGE_ID_WINDOWS", "1"))
+
+
+def sample_windows(count: int, samples: int) -> List[int]:
+    """Indices of up to samples windows spread evenly over count windows, always including the first."""
+    if count <= samples:
+        return list(range(count))
+    return sorted({int(round(i * (count - 1) / (samples - 1))) for i in range(samples)}) if samples > 1 else [0]
+
+
+def identify_language(model, model_name: str, windows: List[np.ndarray], samples: int = LANGUAGE_ID_WINDOWS,
+                      cache: Optional[TranscriptionCache] = None) -> Tuple[str, float]:
+    """
+    Identify the spoken language from the encoder output and a single
+    language-token decoder step, without transcribing anything.
+
+    Up to samples windows spread across the file are scored in one batched
+    pass and their probabilities averaged (a soft vote), so a music intro
+    or a foreign-language quote in the first window does not decide alone.
+    Per-window scores are kept in the window cache.
+
+    Args:
+        model: Loaded Whisper model
+        model_name (str): Model name, part of the cache key
+        windows (List[np.ndarray]): Decode windows at 16 kHz, in file order
+        samples (int): Windows that vote
+        cache (TranscriptionCache, optional): Window store
+
+    Returns:
+        Tuple[str, float]: Language code and its averaged probability
+    """
+    if not model.is_multilingual:
+        return "en", 1.0
+
+    chosen = sample_windows(len(windows), max(1, samples))
+    scores: Dict[int, Dict[str, float]] = {}
+    keys = {}
+    for index in chosen:
+        if cache is None:
+            continue
+        keys[index] = cache.make_key(windows[index], model=model_name, task="language_id")
+        cached = cache.get(keys[index])
+        if cached is not None:
+            scores[index] = cached["language_probs"]
+
+    missing = [index for index in chosen if index not in scores]
+    if missing:
+        with torch.inference_mode():
+            mel = batched_log_mel([windows[index] for index in missing], model.dims.n_mels, model.device)
+            # Features of the right shape are used as-is; only the language token is decoded
+            _, probs = whisper.detect_language(model, model.embed_audio(mel))
+        for index, language_probs in zip(missing, probs):
+            scores[index] = {code: float(p) for code, p in language_probs.items()}
+            if cache is not None:
+                cache.put(keys[index], {"language_probs": scores[index]})
+
+    totals: Dict[str, float] = {}
+    for language_probs in scores.values():
+        for code, p in language_probs.items():
+            totals[code] = totals.get(code, 0.0) + p / len(scores)
+    language = max(totals, key=totals.get)
+    return language, round(totals[language], 4)
+
+
+def language_from_result(result: Dict) -> Tuple[Optional[str], float]:
+    """Language and its probability from a whisper_timestamped result decoded without a language."""
+    language = result.get("language")
+    return language, round(result.get("language_probs", {}).get(language, 0.0), 4)
@@ -4,6 +4,8 @@ from fastapi.responses import FileResponse
 from api.audio_api import router as audio_router
 from api.video_api import router as video_router
 from api.stats_api import router as stats_router
+from api.jobs_api import router as jobs_router
+from api.uploads_api import router as uploads_router
 from api.livetranscribe_api import router as livetranscribe_router
 from api.stripe_checkout_api import router as stripe_checkout_router
 from api.stripe_webhook_api import router as stripe_webhook_router
@@ -37,14 +39,41 @@ app.add_middleware(
 # Register routers
 app.include_router(audio_router, prefix="/analyze/audio", tags=["Audio"])
 app.include_router(video_router, prefix="/analyze/video", tags=["Video"])
+app.include_router(jobs_router, prefix="/analyze/audio", tags=["Audio"])
+app.include_router(jobs_router, prefix="/analyze/video", tags=["Video"])
+app.include_router(uploads_router, prefix="/analyze", tags=["Resumable Uploads"])
 app.include_router(stats_router, prefix="/api", tags=["Stats"])
 app.include_router(livetranscribe_router, prefix="/analyze", tags=["Live Transcription"])
 app.include_router(stripe_checkout_router)
 app.include_router(stripe_webhook_router)
 
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
 import requests
 from fastapi import Request, Query
+from startup import readiness, start_background_preload
+from job_queue import get_job_queue
+
+
+@app.on_event("startup")
+def preload_models():
+    """Load the live-transcription model; file models live in the inference workers."""
+    start_background_preload(engines=["faster_whisper"])
+
+
+@app.get("/healthz", tags=["Health"])
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", tags=["Health"])
+def readyz():
+    """Readiness: configured models are resident and warmed, and an inference worker is up."""
+    state = readiness.snapshot()
+    workers = get_job_queue().workers()
+    state["inference_workers"] = workers
+    ready = state["ready"] and any(w["state"] in ("ready", "busy") for w in workers)
+    return JSONResponse(status_code=200 if ready else 503, content=state)
 
 @app.get("/download/srt")
 def proxy_srt_download(srt_url: str = Query(...)):
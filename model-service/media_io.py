@@ -0,0 +1,108 @@
+import os
+import wave
+from typing import Dict, Optional, Tuple
+
+import ffmpeg
+import numpy as np
+
+SAMPLE_RATE = 16000
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+
+def _parse_rate(rate: Optional[str]) -> Optional[float]:
+    """Parse an ffprobe rational such as "30000/1001"."""
+    if not rate or rate == "0/0":
+        return None
+    if "/" in rate:
+        num, den = rate.split("/", 1)
+        return float(num) / float(den) if float(den) else None
+    return float(rate)
+
+
+def probe_media(path: str) -> Dict:
+    """
+    Read container and stream metadata with a single ffprobe call.
+
+    Args:
+        path (str): Path to an audio or video file
+
+    Returns:
+        Dict: duration, has_audio, has_video, fps, size and audio_fps
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Media file not found: {path}")
+    try:
+        probe = ffmpeg.probe(path)
+    except ffmpeg.Error as e:
+        raise RuntimeError(f"Failed to probe media: {e.stderr.decode(errors='ignore')}")
+
+    streams = probe.get("streams", [])
+    audio_stream = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    video_stream = next((s for s in streams if s.get("codec_type") == "video"), None)
+    duration = probe.get("format", {}).get("duration")
+    if duration is None:
+        duration = (audio_stream or video_stream or {}).get("duration", 0)
+
+    return {
+        "duration": float(duration or 0),
+        "has_audio": audio_stream is not None,
+        "has_video": video_stream is not None,
+        "fps": _parse_rate(video_stream.get("avg_frame_rate")) if video_stream else None,
+        "size": [video_stream.get("width"), video_stream.get("height")] if video_stream else None,
+        "audio_fps": int(audio_stream["sample_rate"]) if audio_stream and audio_stream.get("sample_rate") else None,
+    }
+
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode the default audio stream straight into a mono float32 buffer
+    through an ffmpeg pipe, resampling inside ffmpeg.
+
+    Args:
+        path (str): Path to an audio or video file
+        sample_rate (int): Target sample rate
+
+    Returns:
+        np.ndarray: Mono float32 samples in [-1, 1]
+    """
+    try:
+        out, _ = (
+            ffmpeg
+            .input(path)
+            .output('pipe:', format='f32le', acodec='pcm_f32le', ac=1, ar=sample_rate, vn=None, loglevel='error')
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}")
+    return np.frombuffer(out, np.float32)
+
+
+def load_media(path: str, sample_rate: int = SAMPLE_RATE) -> Tuple[np.ndarray, Dict]:
+    """
+    Probe once and decode once. Every later stage shares the returned buffer.
+
+    Files without an audio stream yield an empty buffer without running a
+    decode; metadata["duration"] then keeps the container duration.
+
+    Returns:
+        Tuple[np.ndarray, Dict]: Samples and metadata; metadata["duration"]
+        comes from the sample count whenever audio was decoded
+    """
+    metadata = probe_media(path)
+    if metadata["has_audio"]:
+        audio = decode_audio(path, sample_rate)
+        metadata["duration"] = len(audio) / sample_rate
+    else:
+        audio = np.zeros(0, dtype=np.float32)
+    return audio, metadata
+
+
+def write_wav(audio: np.ndarray, path: str, sample_rate: int = SAMPLE_RATE) -> str:
+    """Write a float32 buffer to a 16-bit PCM WAV file without decoding the source again."""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return path
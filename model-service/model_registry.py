@@ -0,0 +1,221 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import torch
+
+# (engine, model_name, device, compute_type)
+ModelKey = Tuple[str, str, str, str]
+
+# Approximate resident size (MB) used when the loaded object does not expose
+# torch parameters (e.g. CTranslate2 models used by faster-whisper).
+APPROX_MODEL_SIZE_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 1000,
+    "medium": 3000,
+    "large": 6000,
+    "large-v2": 6000,
+    "large-v3": 6000,
+    "turbo": 3200,
+}
+
+
+def default_device() -> str:
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _quantize_linear_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Dynamic int8 quantization of every Linear layer (CPU only). Whisper's
+    Linear subclass is swapped for a plain nn.Linear first, because
+    quantize_dynamic matches module types exactly.
+    """
+    for parent in list(model.modules()):
+        for name, child in parent.named_children():
+            if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                linear.load_state_dict(child.state_dict())
+                setattr(parent, name, linear)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_whisper_timestamped(model_name: str, device: str, compute_type: str):
+    import whisper_timestamped as whisper_ts
+
+    model = whisper_ts.load_model(model_name, device=device).eval()
+    if compute_type == "float16" and device == "cuda":
+        model = model.half()
+    elif compute_type == "int8" and device == "cpu":
+        model = _quantize_linear_int8(model)
+    if os.getenv("TORCH_COMPILE_ENCODER", "0") == "1":
+        # The encoder always sees (n_mels, 3000) inputs, so it compiles once;
+        # the decoder's shapes change every step and it keeps eager mode
+        model.encoder = torch.compile(model.encoder, dynamic=False)
+    return model
+
+
+def _load_faster_whisper(model_name: str, device: str, compute_type: str):
+    from faster_whisper import WhisperModel
+
+    # 0 leaves CTranslate2 on OMP_NUM_THREADS, which inference workers pin to their share of the cores
+    cpu_threads = int(os.getenv("FASTER_WHISPER_CPU_THREADS", "0"))
+    return WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of loaded speech models.
+
+    Each (engine, model_name, device, compute_type) is loaded at most once per
+    worker process. When a memory budget is configured, the least recently
+    used models are dropped from the registry once the budget is exceeded.
+    Callers that still hold a reference to an evicted model can keep using it;
+    it is released when the last reference goes away.
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None):
+        """
+        Args:
+            memory_budget_mb (float, optional): Maximum estimated size of all
+                registered models. None or 0 disables eviction.
+        """
+        self.memory_budget_mb = memory_budget_mb or None
+        self._models: "OrderedDict[ModelKey, Any]" = OrderedDict()
+        self._sizes: Dict[ModelKey, float] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._loaders: Dict[str, Callable[[str, str, str], Any]] = {
+            "whisper_timestamped": _load_whisper_timestamped,
+            "faster_whisper": _load_faster_whisper,
+        }
+
+    def register_loader(self, engine: str, loader: Callable[[str, str, str], Any]) -> None:
+        """Register a loader callable(model_name, device, compute_type) for an engine."""
+        with self._lock:
+            self._loaders[engine] = loader
+
+    def get(
+        self,
+        model_name: str,
+        engine: str = "whisper_timestamped",
+        device: Optional[str] = None,
+        compute_type: str = "float32",
+    ) -> Any:
+        """
+        Return a loaded model, loading it on first use.
+
+        Concurrent callers asking for the same key wait for a single load;
+        different keys load independently.
+        """
+        device = device or default_device()
+        key: ModelKey = (engine, model_name, device, compute_type)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            if engine not in self._loaders:
+                raise ValueError(f"Unknown model engine: {engine}")
+            loader = self._loaders[engine]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+
+            print(f"Loading {engine} model '{model_name}' on {device} ({compute_type})")
+            model = loader(model_name, device, compute_type)
+            size_mb = self._estimate_size_mb(model, model_name)
+
+            with self._lock:
+                self._models[key] = model
+                self._sizes[key] = size_mb
+                self._evict_if_needed(keep=key)
+            return model
+
+    def is_loaded(
+        self,
+        model_name: str,
+        engine: str = "whisper_timestamped",
+        device: Optional[str] = None,
+        compute_type: str = "float32",
+    ) -> bool:
+        key = (engine, model_name, device or default_device(), compute_type)
+        with self._lock:
+            return key in self._models
+
+    def evict(self, model_name: str, engine: str = "whisper_timestamped",
+              device: Optional[str] = None, compute_type: str = "float32") -> bool:
+        """Drop a model from the registry. Returns True if it was loaded."""
+        key = (engine, model_name, device or default_device(), compute_type)
+        with self._lock:
+            if key not in self._models:
+                return False
+            self._drop(key)
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "memory_budget_mb": self.memory_budget_mb,
+                "resident_mb": round(sum(self._sizes.values()), 1),
+                "models": [
+                    {
+                        "engine": key[0],
+                        "model_name": key[1],
+                        "device": key[2],
+                        "compute_type": key[3],
+                        "size_mb": round(self._sizes[key], 1),
+                    }
+                    for key in self._models
+                ],
+            }
+
+    def _evict_if_needed(self, keep: ModelKey) -> None:
+        if not self.memory_budget_mb:
+            return
+        while sum(self._sizes.values()) > self.memory_budget_mb:
+            victim = next((key for key in self._models if key != keep), None)
+            if victim is None:
+                # A single model larger than the budget is still allowed
+                break
+            print(f"Evicting model {victim} to stay within {self.memory_budget_mb} MB")
+            self._drop(victim)
+
+    def _drop(self, key: ModelKey) -> None:
+        self._models.pop(key, None)
+        self._sizes.pop(key, None)
+        self._key_locks.pop(key, None)
+        if key[2] == "cuda" and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    @staticmethod
+    def _estimate_size_mb(model: Any, model_name: str) -> float:
+        if isinstance(model, torch.nn.Module):
+            n_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+            n_bytes += sum(b.numel() * b.element_size() for b in model.buffers())
+            # Packed int8 weights of dynamically quantized layers are neither parameters nor buffers
+            n_bytes += sum(m.weight().numel() for m in model.modules()
+                           if isinstance(m, torch.ao.nn.quantized.dynamic.Linear))
+            return n_bytes / (1024 ** 2)
+        return float(APPROX_MODEL_SIZE_MB.get(model_name, 1000))
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the registry shared by every handler in this worker process."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                budget = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0") or 0)
+                _registry = ModelRegistry(memory_budget_mb=budget)
+    return _registry
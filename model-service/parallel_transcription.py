@@ -0,0 +1,169 @@
+import os
+import itertools
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.multiprocessing
+
+from audio_segmentation import split_at_silence
+from cancellation import CancellationToken
+from engines import compute_type
+from media_io import SAMPLE_RATE
+
+# Opt-in: 0 or 1 keeps transcription in the calling process
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_SPAN_WORKERS", "0"))
+SPAN_SECONDS = float(os.getenv("PARALLEL_SPAN_SECONDS", "300"))
+COMPILE_ENCODER = os.getenv("TORCH_COMPILE_ENCODER", "0") == "1"
+# Live pools per process; each holds its own worker processes, so the least recently used is shut down beyond this
+MAX_POOLS = int(os.getenv("PARALLEL_SPAN_POOLS", "2"))
+# How often a running file checks its cancel token while spans are decoding
+CANCEL_POLL_SECONDS = 0.5
+
+# Set in each pool process by _init_span_worker; one transcriber per decoding profile and output, all sharing the model
+_span_transcribers: Dict[Tuple, object] = {}
+_span_args: Dict = {}
+# Set by the parent when the file being transcribed is cancelled; running spans stop at their next window
+_cancel_event = None
+
+
+def _init_span_worker(model, model_name: str, device: str, num_threads: int, batch_size: int,
+                      cancel_event) -> None:
+    global _cancel_event
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+    _cancel_event = cancel_event
+    # model is the parent's copy in shared memory on CPU; otherwise each process loads its own
+    _span_args.update(model_name=model_name, device=device, model=model, batch_size=batch_size,
+                      parallel_workers=0, engine="whisper_timestamped")
+
+
+def _transcribe_span(audio: np.ndarray, language: str, use_cache: bool, profile: Optional[str],
+                     output: Optional[str]) -> List[Dict]:
+    from transcriber import Transcriber
+
+    if (profile, output) not in _span_transcribers:
+        _span_transcribers[profile, output] = Transcriber(profile=profile, output=output, **_span_args)
+        # The parent escalates the merged segments of a two-tier profile, so spans are drafts only
+        _span_transcribers[profile, output].profile["escalate_model"] = None
+        # Loaded by the first transcriber of this process, or mapped from the parent
+        _span_args["model"] = _span_transcribers[profile, output].model
+    transcriber = _span_transcribers[profile, output]
+    cancel_token = CancellationToken(_cancel_event.is_set) if _cancel_event is not None else None
+    result = transcriber.transcribe(audio, language=language, use_cache=use_cache, cancel_token=cancel_token)
+    return result["transcription"]["segments"]
+
+
+class SpanPool:
+    """
+    Worker processes that each transcribe independent spans of one file.
+
+    Spans are cut at silence, so no window crosses a span boundary and no
+    context is carried between them. On CPU the parent's weights are moved
+    to shared memory and mapped by every pool process instead of loaded N
+    times.
+    """
+
+    def __init__(self, model, model_name: str, device: str, workers: int, batch_size: int = 1):
+        shared_model = None
+        # Quantized or compiled models do not pickle into shared memory; each process loads its own
+        if device == "cpu" and compute_type("whisper_timestamped", device) == "float32" and not COMPILE_ENCODER:
+            for tensor in itertools.chain(model.parameters(), model.buffers()):
+                # The sparse alignment-heads mask is tiny and is pickled by value
+                if not tensor.is_sparse:
+                    tensor.share_memory_()
+            shared_model = model
+        num_threads = max(1, torch.get_num_threads() // workers)
+        context = torch.multiprocessing.get_context("spawn")
+        self.workers = workers
+        self.batch_size = batch_size
+        self.cancel_event = context.Event()
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_span_worker,
+            initargs=(shared_model, model_name, device, num_threads, batch_size, self.cancel_event),
+        )
+
+    def transcribe(self, audio: np.ndarray, language: str, use_cache: bool = True,
+                   progress_callback: Optional[Callable[[int, int], None]] = None,
+                   span_seconds: float = SPAN_SECONDS, profile: Optional[str] = None,
+                   output: Optional[str] = None, cancel_token: Optional[CancellationToken] = None) -> List[Dict]:
+        """
+        Transcribe silence-delimited spans in parallel and merge their
+        segments on the original timeline. cancel_token is polled while
+        spans decode; once it fires, spans not yet started are dropped and
+        running ones stop at their next window.
+
+        Returns:
+            List[Dict]: Segments in timestamp order
+        """
+        spans = split_at_silence(audio, span_seconds)
+        futures = {
+            self.executor.submit(_transcribe_span, audio[start:end], language, use_cache, profile, output): index
+            for index, (start, end) in enumerate(spans)
+        }
+        span_segments: Dict[int, List[Dict]] = {}
+        pending = set(futures)
+        try:
+            while pending:
+                finished, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    span_segments[futures[future]] = future.result()
+                if cancel_token:
+                    cancel_token.check()
+                if finished and progress_callback:
+                    progress_callback(len(span_segments), len(spans))
+        except BaseException:
+            # On failure or cancellation do not keep the pool busy with the rest of this file
+            for future in pending:
+                future.cancel()
+            self.cancel_event.set()
+            # Spans already decoding raise JobCancelled at their next window; the pool is free once they have
+            wait(pending)
+            self.cancel_event.clear()
+            raise
+
+        merged = []
+        last_end_time = 0
+        for index, (start, _) in enumerate(spans):
+            offset = start / SAMPLE_RATE
+            for segment in span_segments[index]:
+                segment["start"] = max(segment["start"] + offset, last_end_time)
+                segment["end"] += offset
+                for word in segment["words"]:
+                    word["start"] = max(word["start"] + offset, last_end_time)
+                    word["end"] += offset
+                merged.append(segment)
+                last_end_time = segment["end"]
+        return merged
+
+    def shutdown(self) -> None:
+        self.cancel_event.set()
+        self.executor.shutdown(cancel_futures=True)
+
+
+# Least recently used first
+_pools: "OrderedDict[Tuple[str, str], SpanPool]" = OrderedDict()
+
+
+def get_span_pool(model, model_name: str, device: str, workers: int, batch_size: int = 1) -> SpanPool:
+    """
+    Return the pool for this model, started on first use and kept for later
+    jobs. A pool started with another worker count or batch size is shut
+    down and replaced, and at most PARALLEL_SPAN_POOLS pools stay alive.
+    """
+    key = (model_name, device)
+    pool = _pools.get(key)
+    if pool is not None and (pool.workers, pool.batch_size) != (workers, batch_size):
+        _pools.pop(key).shutdown()
+        pool = None
+    if pool is None:
+        while _pools and len(_pools) >= max(1, MAX_POOLS):
+            _, idle = _pools.popitem(last=False)
+            idle.shutdown()
+        pool = _pools[key] = SpanPool(model, model_name, device, workers, batch_size)
+    _pools.move_to_end(key)
+    return pool
@@ -0,0 +1,90 @@
+import os
+from typing import Dict, Optional
+
+# Named trade-offs between speed and accuracy. "balanced" is what every
+# upload used before profiles existed: turbo, greedy, whisper_timestamped alignment.
+PROFILES: Dict[str, Dict] = {
+    "fast": {
+        "model_name": "base",
+        "beam_size": None,
+        "best_of": None,
+        "temperature": 0.0,
+        "condition_on_previous_text": False,
+        # Words carry their segment's times; no cross-attention alignment pass
+        "word_timestamps": False,
+    },
+    "balanced": {
+        "model_name": "turbo",
+        "beam_size": None,
+        "best_of": None,
+        "temperature": 0.0,
+        "condition_on_previous_text": True,
+        "word_timestamps": True,
+    },
+    "accurate": {
+        "model_name": "large-v3",
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        "condition_on_previous_text": True,
+        "word_timestamps": True,
+    },
+    "tiered": {
+        # A small model drafts the whole file...
+        "model_name": os.getenv("TIERED_DRAFT_MODEL", "base"),
+        "beam_size": None,
+        "best_of": None,
+        "temperature": 0.0,
+        "condition_on_previous_text": True,
+        "word_timestamps": True,
+        # ...and segments whose mean word confidence is below escalate_below are decoded again with escalate_model
+        "escalate_model": os.getenv("TIERED_ESCALATE_MODEL", "turbo"),
+        "escalate_below": float(os.getenv("TIERED_ESCALATE_BELOW", "0.5")),
+    },
+}
+
+DEFAULT_PROFILE = os.getenv("TRANSCRIBE_PROFILE", "balanced")
+
+# "words" writes word-timed SRT cues; "segments" one cue per decoded segment, with no word alignment
+OUTPUTS = ("words", "segments")
+DEFAULT_OUTPUT = os.getenv("TRANSCRIBE_OUTPUT", "words")
+
+
+def get_profile(name: Optional[str] = None, output: Optional[str] = None) -> Dict:
+    """
+    Return the decoding profile called name (DEFAULT_PROFILE when None),
+    with its name under "name" and the output granularity (DEFAULT_OUTPUT
+    when None) under "output".
+
+    Raises:
+        ValueError: Unknown profile name or output
+    """
+    name = name or DEFAULT_PROFILE
+    output = output or DEFAULT_OUTPUT
+    if name not in PROFILES:
+        raise ValueError(f"Unknown decoding profile: {name}")
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output: {output}")
+    profile = dict(PROFILES[name], name=name, output=output)
+    if output == "segments":
+        # Segment cues need neither aligned word times nor word confidences
+        profile["word_timestamps"] = False
+    return profile
+
+
+def decode_options(profile: Dict) -> Dict:
+    """The profile's settings that engines take per decode."""
+    return {key: profile[key] for key in ("beam_size", "best_of", "temperature", "word_timestamps")}
+
+
+def profile_key(profile: Dict) -> Dict:
+    """
+    Cache-key parameters of a profile; empty for balanced with word output
+    so earlier cache entries stay valid.
+    """
+    key = {} if profile["name"] == "balanced" else {"profile": profile["name"]}
+    if profile["word_timestamps"] != PROFILES[profile["name"]]["word_timestamps"]:
+        key["word_timestamps"] = profile["word_timestamps"]
+    if profile.get("escalate_model"):
+        key.update(escalate_model=profile["escalate_model"], escalate_below=profile["escalate_below"])
+    return key
@@ -0,0 +1,141 @@
+import os
+from typing import Dict, Optional
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SUPABASE_BUCKET = "transcriptions"
+
+_supabase: Optional[Client] = None
+
+
+def get_supabase() -> Client:
+    """Return a Supabase client for this process, created on first use."""
+    global _supabase
+    if _supabase is None:
+        _supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    return _supabase
+
+
+def upload_to_storage(supabase: Client, bucket: str, local_path: str, storage_path: str,
+                      upsert: bool = False) -> str:
+    """Upload a local file to Supabase Storage and return its public URL."""
+    with open(local_path, "rb") as f:
+        supabase.storage.from_(bucket).upload(storage_path, f, file_options={"upsert": "true"} if upsert else None)
+    return supabase.storage.from_(bucket).get_public_url(storage_path)
+
+
+def fetch_from_storage(storage_path: str, local_path: str) -> str:
+    """Download an object of the transcriptions bucket to local_path and return local_path."""
+    content = get_supabase().storage.from_(SUPABASE_BUCKET).download(storage_path)
+    with open(local_path, "wb") as f:
+        f.write(content)
+    return local_path
+
+
+def stored_objects(kind: str, data: Dict, publish: Dict) -> Dict:
+    """
+    Storage paths publish_transcription uses for a job: its "media" (None
+    when a video had no audible sound), "srt", and "json" (None unless the
+    job was transcribed with segment output).
+    """
+    storage_path = f"{publish['user_id']}/{publish['file_id']}"
+    # Audio uploads store the original file; videos store the extracted audio track
+    media_path = publish["file_path"] if kind == "audio" else data.get("audio_path")
+    return {
+        "media": f"{storage_path}.{media_path.split('.')[-1].lower()}" if media_path else None,
+        "srt": f"{storage_path}.srt",
+        "json": f"{storage_path}.json" if data.get("output") == "segments" else None,
+    }
+
+
+def record_upload_and_charge(supabase: Client, upload_record: Dict, user_id: str, duration: int) -> None:
+    """Insert the upload metadata, deduct credits and write the usage log."""
+    supabase.table("uploads").insert(upload_record).execute()
+
+    user_data = supabase.table("user_credits").select("*").eq("id", user_id).single().execute()
+    current_credits = user_data.data["credits_remaining"]
+
+    new_credits = current_credits - duration
+    supabase.table("user_credits").update({"credits_remaining": new_credits}).eq("id", user_id).execute()
+
+    supabase.table("usage_logs").insert({
+        "user_id": user_id,
+        "description": f"Processed {duration} min file"
+    }).execute()
+
+
+def publish_transcription(kind: str, data: Dict, publish: Dict) -> Dict:
+    """
+    Upload the outputs of a finished transcription job, store its metadata
+    and charge the user.
+
+    Args:
+        kind (str): "audio" or "video"
+        data (Dict): The "data" block returned by the processor
+        publish (Dict): user_id, file_id, filename, duration and file_path of the upload
+
+    Returns:
+        Dict: The upload record inserted into the uploads table
+    """
+    supabase = get_supabase()
+    objects = stored_objects(kind, data, publish)
+
+    audio_url = None
+    if objects["media"]:
+        media_path = publish["file_path"] if kind == "audio" else data["audio_path"]
+        audio_url = upload_to_storage(supabase, SUPABASE_BUCKET, media_path, objects["media"])
+        print(f"[Publisher] Uploaded media to {objects['media']}")
+    srt_url = upload_to_storage(supabase, SUPABASE_BUCKET, data["srt_path"], objects["srt"])
+    print(f"[Publisher] Uploaded SRT to {objects['srt']}")
+    if objects["json"]:
+        # Kept so word timestamps can be added later without transcribing again
+        upload_to_storage(supabase, SUPABASE_BUCKET, data["json_path"], objects["json"])
+        print(f"[Publisher] Uploaded JSON to {objects['json']}")
+
+    upload_record = {
+        "user_id": publish["user_id"],
+        "file_id": publish["file_id"],
+        "filename": publish["filename"],
+        "type": kind,
+        "audio_url": audio_url,
+        "srt_url": srt_url,
+        "duration": data.get("duration"),
+        "word_count": data.get("word_count"),
+        "language": data.get("detected_language"),
+    }
+    if kind == "video":
+        upload_record["video_url"] = None
+
+    record_upload_and_charge(supabase, upload_record, publish["user_id"], publish["duration"])
+    print(f"[Publisher] Metadata inserted to DB: {upload_record}")
+    return upload_record
+
+
+def publish_alignment(data: Dict, publish: Dict) -> Dict:
+    """
+    Upload the word-level SRT and JSON of an alignment job next to the
+    outputs of the job it aligned. Alignment is not charged.
+
+    Returns:
+        Dict: srt_url, json_url and word_count
+    """
+    supabase = get_supabase()
+    storage_path = f"{publish['user_id']}/{publish['file_id']}"
+    # Aligning the same job again replaces the earlier word-level outputs
+    srt_url = upload_to_storage(supabase, SUPABASE_BUCKET, data["srt_path"], f"{storage_path}.words.srt", upsert=True)
+    json_url = upload_to_storage(supabase, SUPABASE_BUCKET, data["json_path"], f"{storage_path}.words.json",
+                                 upsert=True)
+    print(f"[Publisher] Uploaded word-level outputs to {storage_path}.words.*")
+    return {"srt_url": srt_url, "json_url": json_url, "word_count": data.get("word_count")}
+
+
+def cleanup_job_files(data: Optional[Dict], publish: Dict) -> None:
+    """Remove the temporary files that belong to one job."""
+    paths = [publish.get("file_path")]
+    if data:
+        paths += [data.get("audio_path"), data.get("srt_path"), data.get("json_path")]
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
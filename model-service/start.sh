@@ -0,0 +1,24 @@
+#!/bin/sh
+# Starts M inference workers (one model copy each) and N lightweight HTTP workers.
+# HTTP workers only queue jobs, except live WebSocket transcription, which decodes
+# in the web process with faster-whisper on LIVE_TRANSCRIBE_THREADS threads.
+set -e
+
+HTTP_WORKERS="${HTTP_WORKERS:-2}"
+INFERENCE_WORKERS="${INFERENCE_WORKERS:-1}"
+
+python inference_worker.py --workers "$INFERENCE_WORKERS" &
+WORKER_PID=$!
+
+FASTER_WHISPER_CPU_THREADS="${LIVE_TRANSCRIBE_THREADS:-4}" \
+    uvicorn main:app --host 0.0.0.0 --port 8000 --workers "$HTTP_WORKERS" &
+HTTP_PID=$!
+
+trap 'kill -TERM $HTTP_PID $WORKER_PID 2>/dev/null' TERM INT
+
+# Exit (and let the orchestrator restart us) as soon as either side dies
+while kill -0 $HTTP_PID 2>/dev/null && kill -0 $WORKER_PID 2>/dev/null; do
+    sleep 2
+done
+kill -TERM $HTTP_PID $WORKER_PID 2>/dev/null || true
+wait
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from engines import compute_type as engine_compute_type
+from model_registry import default_device, get_model_registry
+
+logger = logging.getLogger(__name__)
+
+
+def configured_models(engines: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    """
+    Parse PRELOAD_MODELS into (engine, model_name) pairs.
+
+    Entries are comma separated and may carry an engine prefix,
+    e.g. "turbo,faster_whisper:small". Plain names use whisper_timestamped.
+    When engines is given, only entries for those engines are returned.
+    """
+    raw = os.getenv("PRELOAD_MODELS", "turbo,faster_whisper:small")
+    models = []
+    for entry in raw.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if ":" in entry:
+            engine, model_name = entry.split(":", 1)
+        else:
+            engine, model_name = "whisper_timestamped", entry
+        if engines is None or engine.strip() in engines:
+            models.append((engine.strip(), model_name.strip()))
+    return models
+
+
+class ReadinessState:
+    """Tracks the startup phase so /readyz can report when a worker is warm."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.ready = False
+        self.phase = "starting"
+        self.error: Optional[str] = None
+        self.models: Dict[str, Dict] = {}
+
+    def update_model(self, name: str, **fields) -> None:
+        with self._lock:
+            self.models.setdefault(name, {}).update(fields)
+
+    def set_phase(self, phase: str, ready: bool = False, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.phase = phase
+            self.ready = ready
+            self.error = error
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "phase": self.phase,
+                "error": self.error,
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+                "models": {name: dict(info) for name, info in self.models.items()},
+            }
+
+
+readiness = ReadinessState()
+
+
+def preload_and_warm(state: ReadinessState = readiness, engines: Optional[List[str]] = None) -> None:
+    """Load the configured models and run one warm-up decode per Whisper model."""
+    warmup_enabled = os.getenv("WARMUP_ENABLED", "1") != "0"
+    try:
+        registry = get_model_registry()
+        for engine, model_name in configured_models(engines):
+            name = f"{engine}:{model_name}"
+            state.set_phase(f"loading {name}")
+            started = time.perf_counter()
+            # Loaded the way the engines ask for them (see WHISPER_CPU_COMPUTE_TYPE and FASTER_WHISPER_COMPUTE_TYPE)
+            registry.get(model_name, engine=engine, compute_type=engine_compute_type(engine, default_device()))
+            state.update_model(name, loaded=True, load_seconds=round(time.perf_counter() - started, 2))
+            logger.info(f"[Startup] Loaded {name}")
+
+            if warmup_enabled and engine == "whisper_timestamped":
+                from transcriber import Transcriber
+
+                state.set_phase(f"warming {name}")
+                warmup_seconds = Transcriber(model_name=model_name).warmup()
+                state.update_model(name, warmed=True, warmup_seconds=round(warmup_seconds, 2))
+                logger.info(f"[Startup] Warmed {name} in {warmup_seconds:.2f}s")
+
+        state.set_phase("ready", ready=True)
+    except Exception as e:
+        logger.exception(f"[Startup] Model preload failed: {e}")
+        state.set_phase("failed", ready=False, error=str(e))
+
+
+def start_background_preload(state: ReadinessState = readiness,
+                             engines: Optional[List[str]] = None) -> threading.Thread:
+    """Run preload_and_warm off the event loop so /healthz answers immediately."""
+    thread = threading.Thread(target=preload_and_warm, args=(state, engines), name="model-preload", daemon=True)
+    thread.start()
+    return thread
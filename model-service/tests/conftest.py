@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules of the service are imported from model-service, as uvicorn and the workers do
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,46 @@
+import numpy as np
+
+from audio_segmentation import adaptive_windows, silence_aligned_spans, split_at_silence
+from media_io import SAMPLE_RATE
+
+
+def speech_like(seconds: float, pauses=()) -> np.ndarray:
+    """Noise with 0.5 s pauses starting at the given seconds."""
+    rng = np.random.default_rng(0)
+    audio = (0.3 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+    for start in pauses:
+        audio[int(start * SAMPLE_RATE):int((start + 0.5) * SAMPLE_RATE)] = 0.0
+    return audio
+
+
+def test_spans_cut_in_the_pause():
+    audio = speech_like(70, pauses=[27.0, 55.0])
+    spans = silence_aligned_spans(audio, 30.0, tolerance_seconds=5.0)
+    cuts = [end / SAMPLE_RATE for _, end in spans[:-1]]
+    assert len(cuts) == 2
+    assert 27.0 <= cuts[0] <= 27.5 and 55.0 <= cuts[1] <= 55.5
+    assert all(end - start <= 30 * SAMPLE_RATE for start, end in spans)
+
+
+def test_spans_are_contiguous_and_bounded():
+    audio = speech_like(200)
+    spans = silence_aligned_spans(audio, 30.0, tolerance_seconds=5.0)
+    assert spans[0][0] == 0 and spans[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+    assert all(end - start <= 30 * SAMPLE_RATE for start, end in spans)
+
+
+def test_no_search_range_cuts_at_the_target():
+    # A tolerance shorter than a frame leaves lo >= hi: the cut falls on the target instead of failing
+    audio = speech_like(100)
+    spans = silence_aligned_spans(audio, 30.0, tolerance_seconds=0.0)
+    assert [end for _, end in spans[:-1]] == [30 * SAMPLE_RATE, 60 * SAMPLE_RATE, 90 * SAMPLE_RATE]
+    spans = split_at_silence(audio, 30.0, search_seconds=0.01)
+    assert all(end - start > 0 for start, end in spans)
+
+
+def test_short_audio_is_one_window():
+    audio = speech_like(20)
+    windows = adaptive_windows(audio)
+    assert len(windows) == 1
+    assert windows[0].pieces == [(0, 0, len(audio))]
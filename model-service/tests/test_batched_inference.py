@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+import batched_inference
+from batched_inference import decode_windows, iter_window_results
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    return Whisper(ModelDimensions(80, 1500, 384, 6, 2, 51865, 448, 384, 6, 2)).eval()
+
+
+def test_batched_matches_sequential(model, monkeypatch):
+    # A random-weight model fails whisper's quality checks; without them both paths keep their greedy decode
+    monkeypatch.setattr(batched_inference, "COMPRESSION_RATIO_THRESHOLD", float("inf"))
+    monkeypatch.setattr(batched_inference, "LOGPROB_THRESHOLD", float("-inf"))
+    rng = np.random.default_rng(0)
+    windows = [(0.1 * rng.standard_normal(seconds * 16000)).astype(np.float32) for seconds in (30, 12, 30)]
+
+    def window_params(index):
+        return {"language": "en"}
+
+    def fallback(index):
+        raise AssertionError("no window should fall back")
+
+    def sequential(index):
+        # The same greedy decode, one window per forward pass
+        return decode_windows(model, [windows[index]], "en", fallback=fallback, word_timestamps=False)[0]
+
+    one = list(iter_window_results(model, windows, window_params, sequential, batch_size=1, word_timestamps=False))
+    batched = list(iter_window_results(model, windows, window_params, fallback, batch_size=2,
+                                       word_timestamps=False))
+
+    assert [index for index, _ in batched] == [0, 1, 2]
+    for (_, expected), (_, result) in zip(one, batched):
+        assert [s["text"] for s in result["segments"]] == [s["text"] for s in expected["segments"]]
+        assert [(s["start"], s["end"]) for s in result["segments"]] == \
+            pytest.approx([(s["start"], s["end"]) for s in expected["segments"]], abs=0.02)
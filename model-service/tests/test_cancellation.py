@@ -0,0 +1,96 @@
+import pytest
+
+import inference_worker
+from cancellation import CancellationToken, JobCancelled
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_token_cancel_and_check():
+    token = CancellationToken()
+    token.check()
+    assert not token.cancelled
+    token.cancel()
+    assert token.cancelled
+    with pytest.raises(JobCancelled):
+        token.check()
+
+
+def test_token_follows_the_queue_flag(queue):
+    job_id = queue.submit("audio", {})
+    queue.claim("worker-a")
+    polls = []
+
+    def poll():
+        polls.append(1)
+        return queue.is_cancel_requested(job_id)
+
+    token = CancellationToken(poll)
+    assert not token.cancelled
+    # A running job is flagged, not finished; its worker stops at the next check
+    assert queue.cancel(job_id) == "running"
+    with pytest.raises(JobCancelled):
+        token.check()
+    # Once fired, the queue is not asked again
+    seen = len(polls)
+    assert token.cancelled and len(polls) == seen
+
+
+def test_queued_job_is_cancelled_at_once(queue):
+    job_id = queue.submit("audio", {})
+    assert queue.cancel(job_id) == "cancelled"
+    assert queue.claim("worker-a") is None
+
+
+def test_cancelled_job_is_not_published(queue, monkeypatch):
+    from handlers.process_audio import AudioProcessor
+
+    published = []
+    job_id = queue.submit("audio", {"file_path": "a.wav", "output_dir": "out", "publish": {"user_id": "u1"}})
+    job = queue.claim("worker-a")
+
+    def run_job(self, progress_callback=None, cancel_token=None, **kwargs):
+        progress_callback(1, 2)
+        # The user cancels while the second window decodes
+        queue.cancel(job_id)
+        return {"status": "success", "data": {"srt_path": "x.srt"}, "error": None}
+
+    import publisher
+
+    monkeypatch.setattr(AudioProcessor, "run_job", run_job)
+    monkeypatch.setattr(publisher, "publish_transcription", lambda *args: published.append(args))
+    monkeypatch.setattr(publisher, "cleanup_job_files", lambda *args: None)
+
+    inference_worker.run_job(job, queue)
+    assert queue.get(job_id)["status"] == "cancelled"
+    assert published == []
+
+
+def test_cancel_stops_at_the_next_window(queue, monkeypatch):
+    from handlers.process_audio import AudioProcessor
+
+    job_id = queue.submit("audio", {"file_path": "a.wav", "output_dir": "out"})
+    job = queue.claim("worker-a")
+    windows = []
+
+    def run_job(self, progress_callback=None, cancel_token=None, **kwargs):
+        try:
+            for index in range(5):
+                windows.append(index)
+                if index == 1:
+                    queue.cancel(job_id)
+                progress_callback(index + 1, 5)
+            return {"status": "success", "data": {}, "error": None}
+        except Exception as e:
+            # The processors turn any exception into an error result
+            return {"status": "error", "data": None, "error": str(e)}
+
+    monkeypatch.setattr(AudioProcessor, "run_job", run_job)
+    # The progress callback checks the token, so the pipeline stops after the window it is in
+    inference_worker.run_job(job, queue)
+    assert windows == [0, 1]
+    assert queue.get(job_id)["status"] == "cancelled"
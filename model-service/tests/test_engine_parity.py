@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import benchmark_engines
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Any short speech recording; the default location is not checked in
+CLIP = os.getenv("PARITY_CLIP", os.path.join(os.path.dirname(__file__), "fixtures", "parity_clip.wav"))
+MODEL = os.getenv("PARITY_MODEL", "tiny")
+MAX_WER = 0.05
+MAX_MEAN_DRIFT = 0.2
+
+
+def _weights_cached(model_name: str) -> bool:
+    # openai-whisper keeps downloaded checkpoints here
+    root = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "whisper")
+    return os.path.isfile(os.path.join(root, f"{model_name}.pt"))
+
+
+pytestmark = [
+    pytest.mark.skipif(not os.path.isfile(CLIP), reason=f"no fixture clip at {CLIP}"),
+    pytest.mark.skipif(not _weights_cached(MODEL), reason=f"whisper '{MODEL}' weights are not cached"),
+]
+
+
+def _run(config: str) -> subprocess.CompletedProcess:
+    # A process per configuration, as the benchmark does: compute type and compilation are read at load time
+    return subprocess.run(
+        [sys.executable, "benchmark_engines.py", CLIP, "--model", MODEL, "--device", "cpu",
+         "--threads", "2", "--single", config],
+        cwd=SERVICE_DIR, capture_output=True, text=True,
+        env=dict(os.environ, **benchmark_engines.CONFIGS[config][1]),
+    )
+
+
+def _words(completed: subprocess.CompletedProcess) -> list:
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])["words"]
+
+
+@pytest.fixture(scope="module")
+def reference_words():
+    words = _words(_run("whisper_timestamped"))
+    assert words, "the fp32 reference transcribed no words"
+    return words
+
+
+def _assert_parity(reference: list, candidate: list) -> None:
+    parity = benchmark_engines.compare_words(reference, candidate)
+    assert parity["wer"] <= MAX_WER, parity
+    assert parity["mean_drift"] <= MAX_MEAN_DRIFT, parity
+
+
+def test_int8_matches_fp32(reference_words):
+    _assert_parity(reference_words, _words(_run("whisper_timestamped-int8")))
+
+
+def test_compiled_encoder_matches_fp32(reference_words):
+    completed = _run("whisper_timestamped-compile")
+    if completed.returncode != 0 and "compile" in completed.stderr.lower():
+        pytest.skip("torch.compile is not available here")
+    _assert_parity(reference_words, _words(completed))
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import engines
+from engines import FasterWhisperEngine, WhisperTimestampedEngine, compute_type, load_engine, unaligned_words
+
+
+def test_compute_type_rules(monkeypatch):
+    monkeypatch.setattr(engines, "FASTER_WHISPER_COMPUTE_TYPE", "")
+    monkeypatch.setattr(engines, "WHISPER_CPU_COMPUTE_TYPE", "int8")
+    assert compute_type("faster_whisper", "cpu") == "int8"
+    assert compute_type("faster_whisper", "cuda") == "float16"
+    assert compute_type("whisper_timestamped", "cpu") == "int8"
+    # PyTorch int8 quantization is CPU only
+    assert compute_type("whisper_timestamped", "cuda") == "float32"
+
+    monkeypatch.setattr(engines, "FASTER_WHISPER_COMPUTE_TYPE", "int8_float16")
+    assert compute_type("faster_whisper", "cuda") == "int8_float16"
+
+
+def test_quantized_models_have_their_own_cache_name(monkeypatch):
+    monkeypatch.setattr(engines, "WHISPER_CPU_COMPUTE_TYPE", "int8")
+    assert WhisperTimestampedEngine("base", "cpu", model=object()).cache_name == "base:int8"
+    monkeypatch.setattr(engines, "WHISPER_CPU_COMPUTE_TYPE", "float32")
+    assert WhisperTimestampedEngine("base", "cpu", model=object()).cache_name == "base"
+
+
+def test_unaligned_words_carry_segment_times():
+    assert unaligned_words("hello  there", 1.0, 2.5, 0.7) == [
+        {"text": "hello", "start": 1.0, "end": 2.5, "confidence": 0.7},
+        {"text": "there", "start": 1.0, "end": 2.5, "confidence": 0.7},
+    ]
+    assert unaligned_words("", 1.0, 2.5, 0.7) == []
+
+
+class FakeFasterWhisper:
+    def __init__(self):
+        self.kwargs = None
+
+    def transcribe(self, audio, **kwargs):
+        self.kwargs = kwargs
+        words = [SimpleNamespace(word=" Hello", start=0.51, end=0.904, probability=0.91234),
+                 SimpleNamespace(word=" ", start=0.9, end=0.9, probability=0.1),
+                 SimpleNamespace(word=" world.", start=1.0, end=1.5, probability=0.8)]
+        segment = SimpleNamespace(id=0, seek=0, start=0.5, end=1.5, text=" Hello world.", tokens=[1, 2],
+                                  temperature=0.0, avg_logprob=-0.1, compression_ratio=1.2, no_speech_prob=0.01,
+                                  words=words if kwargs["word_timestamps"] else None)
+        info = SimpleNamespace(language="en", language_probability=0.98, all_language_probs=[("en", 0.98)])
+        return iter([segment]), info
+
+
+def test_faster_whisper_results_use_the_whisper_timestamped_schema():
+    model = FakeFasterWhisper()
+    engine = FasterWhisperEngine("small", "cpu", model=model)
+    result = engine.transcribe(np.zeros(16000, dtype=np.float32), language="en")
+
+    # Greedy unless a beam is asked for
+    assert model.kwargs["beam_size"] == 1 and model.kwargs["best_of"] == 1
+    assert result["language"] == "en" and result["text"] == "Hello world."
+    segment = result["segments"][0]
+    assert segment["text"] == "Hello world."
+    assert segment["confidence"] == pytest.approx(0.905, abs=0.001)
+    assert segment["words"] == [
+        {"text": "Hello", "start": 0.51, "end": 0.9, "confidence": 0.912},
+        {"text": "world.", "start": 1.0, "end": 1.5, "confidence": 0.8},
+    ]
+
+
+def test_faster_whisper_segment_output_has_unaligned_words():
+    engine = FasterWhisperEngine("small", "cpu", model=FakeFasterWhisper())
+    result = engine.transcribe(np.zeros(16000, dtype=np.float32), word_timestamps=False)
+    assert [w["text"] for w in result["segments"][0]["words"]] == ["Hello", "world."]
+    assert {(w["start"], w["end"]) for w in result["segments"][0]["words"]} == {(0.5, 1.5)}
+
+
+def test_load_engine_rejects_unknown_engines():
+    with pytest.raises(ValueError):
+        load_engine("nope", "base", "cpu", model=object())
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from escalation import ESCALATION_PADDING, escalate_segments, escalation_regions
+from media_io import SAMPLE_RATE
+from profiles import get_profile
+
+PROFILE = dict(get_profile("tiered"), escalate_below=0.5)
+
+
+def segment(start: float, end: float, confidence: float, text: str = "draft") -> dict:
+    return {"start": start, "end": end, "text": text,
+            "words": [{"text": text, "start": start, "end": end, "confidence": confidence}]}
+
+
+class FakeEngine:
+    """Returns one segment spanning whatever region it is asked to decode, in region-relative times."""
+
+    cache_name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append(len(audio) / SAMPLE_RATE)
+        duration = len(audio) / SAMPLE_RATE
+        return {"segments": [segment(0.1, duration - 0.1, 0.9, "better")], "language": "en"}
+
+
+def test_regions_cover_low_confidence_runs():
+    segments = [segment(0, 2, 0.9), segment(3, 5, 0.2), segment(5.2, 7, 0.3), segment(9, 10, 0.9),
+                segment(12, 13, 0.1)]
+    regions = escalation_regions(segments, 0.5, duration=13.2)
+    assert [(first, last) for _, _, first, last in regions] == [(1, 3), (4, 5)]
+    # Padded into the gaps, never past the kept neighbours or the end of the audio
+    assert regions[0][:2] == pytest.approx((3 - ESCALATION_PADDING, 7 + ESCALATION_PADDING))
+    assert regions[1][:2] == pytest.approx((12 - ESCALATION_PADDING, 13.2))
+
+
+def test_regions_are_bounded_by_one_window():
+    segments = [segment(i * 4.0, i * 4.0 + 4.0, 0.1) for i in range(12)]
+    regions = escalation_regions(segments, 0.5, duration=48.0)
+    assert len(regions) > 1
+    assert all(end - start <= 30.0 for start, end, _, _ in regions)
+    # Every segment is in exactly one region
+    assert [index for _, _, first, last in regions for index in range(first, last)] == list(range(12))
+
+
+def test_confident_segments_need_no_regions():
+    assert escalation_regions([segment(0, 2, 0.9), segment(2, 4, 0.6)], 0.5, duration=4.0) == []
+
+
+def test_escalate_segments_replaces_drafts():
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    segments = [segment(0, 2, 0.9, "kept"), segment(3, 5, 0.2), segment(7, 9, 0.9, "also kept")]
+    replaced = []
+    engine = FakeEngine()
+
+    merged, seconds = escalate_segments(engine, audio, segments, "en", PROFILE,
+                                        region_callback=lambda new, replaces: replaced.append((new, replaces)))
+
+    assert [s["text"] for s in merged] == ["kept", "better", "also kept"]
+    assert merged[1]["escalated"] and merged[1]["start"] >= 2.0 and merged[1]["end"] <= 7.0
+    assert seconds == pytest.approx(engine.calls[0])
+    # The stream hears which draft times the re-decoded segments supersede
+    assert len(replaced) == 1
+    assert replaced[0][1] == (3, 5)
+    assert replaced[0][0] == [merged[1]]
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+# How long the blocking stubs hold their thread, and how long a health check may take meanwhile
+TRANSCRIBE_SECONDS = 3.0
+CREDITS_SECONDS = 1.0
+RESPONSIVE_TIMEOUT = 0.5
+POLL_SECONDS = 0.2
+
+
+class _Result:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class _Query:
+    def __init__(self, table):
+        self.table = table
+
+    def __getattr__(self, name):
+        # select, eq, single, ...: the query builder returns itself
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        if self.table == "user_credits":
+            time.sleep(CREDITS_SECONDS)
+            return _Result({"credits_remaining": 100})
+        return _Result([], count=0)
+
+
+class BlockingSupabase:
+    """Synchronous stand-in for the Supabase client; the credit lookup blocks its thread like a slow network call."""
+
+    def table(self, name):
+        return _Query(name)
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    # The routers log to transcription.log in the working directory
+    monkeypatch.chdir(tmp_path)
+    import supabase
+
+    monkeypatch.setattr(supabase, "create_client", lambda *args, **kwargs: BlockingSupabase())
+
+    import job_queue
+    from job_queue import JobQueue
+
+    monkeypatch.setattr(job_queue, "_queue", JobQueue(str(tmp_path / "jobs.sqlite3")))
+
+    # The routers create their Supabase clients at import
+    import main
+    from api import ingest, jobs_api
+
+    monkeypatch.setattr(jobs_api, "UPLOAD_DIR", "uploads")
+
+    async def probe_duration(path):
+        return 60.0
+
+    monkeypatch.setattr(ingest, "probe_duration", probe_duration)
+    return main.app
+
+
+@pytest.fixture
+def inference_worker(monkeypatch):
+    """An inference worker on a thread whose processor blocks for TRANSCRIBE_SECONDS."""
+    import inference_worker
+    import publisher
+    from handlers.process_audio import AudioProcessor
+    from job_queue import get_job_queue
+
+    def run_job(self, file_path, output_dir, **kwargs):
+        time.sleep(TRANSCRIBE_SECONDS)
+        return {"status": "success", "data": {"duration": 60.0, "word_count": 0}, "error": None}
+
+    monkeypatch.setattr(AudioProcessor, "run_job", run_job)
+    monkeypatch.setattr(publisher, "publish_transcription", lambda kind, data, publish: {"file_id": publish["file_id"]})
+
+    stop = threading.Event()
+
+    def consume():
+        queue = get_job_queue()
+        while not stop.is_set():
+            job = queue.claim("test-worker")
+            if job is None:
+                time.sleep(0.05)
+                continue
+            inference_worker.run_job(job, queue)
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+def test_endpoints_stay_responsive_during_transcription(app, inference_worker):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            transcription = asyncio.create_task(client.post(
+                "/analyze/audio/transcribe",
+                data={"user_id": "user-1", "duration": "1"},
+                files={"file": ("speech.mp3", b"\0" * 1024, "audio/mpeg")},
+                timeout=TRANSCRIBE_SECONDS * 5,
+            ))
+
+            # Through the credit lookup and the transcription both, the event loop keeps serving.
+            # Rounds are timed on the wall clock: a blocked loop cannot fire a wait_for timeout
+            checks = 0
+            started = time.monotonic()
+            while time.monotonic() - started < CREDITS_SECONDS + TRANSCRIBE_SECONDS / 2:
+                round_started = time.monotonic()
+                await asyncio.sleep(POLL_SECONDS)
+                health = await client.get("/healthz")
+                stats = await client.get("/api/stats")
+                assert time.monotonic() - round_started < POLL_SECONDS + RESPONSIVE_TIMEOUT
+                assert health.status_code == 200
+                assert stats.status_code == 200
+                assert not transcription.done()
+                checks += 1
+
+            response = await transcription
+            return checks, response
+
+    checks, response = asyncio.run(scenario())
+    assert checks > 5
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import os
+from typing import Iterable, Iterator
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from api.ingest import UploadRejected, ingest_upload
+
+BOUNDARY = "test-boundary"
+MAX_BYTES = 64 * 1024
+
+
+def make_app(dest_dir: str) -> FastAPI:
+    app = FastAPI()
+    validated = []
+
+    async def validate(fields):
+        validated.append(dict(fields))
+        if fields["user_id"] == "refused":
+            raise UploadRejected(402, "Insufficient credits")
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        try:
+            result = await ingest_upload(request, dest_dir, required_fields=("user_id", "duration"),
+                                         validate_fields=validate, max_bytes=MAX_BYTES)
+        except UploadRejected as e:
+            return JSONResponse(status_code=e.status_code, content={"message": e.message})
+        return {**result, "validated": validated}
+
+    return app
+
+
+def form_parts(fields: dict, filename: str, file_chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """A multipart body with the fields first, yielded in pieces so it has no Content-Length."""
+    for name, value in fields.items():
+        yield (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n").encode()
+    yield (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+           "Content-Type: application/octet-stream\r\n\r\n").encode()
+    yield from file_chunks
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def post(dest_dir: str, body: Iterable[bytes]) -> httpx.Response:
+    async def send():
+        transport = httpx.ASGITransport(app=make_app(dest_dir))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def stream():
+                for part in body:
+                    yield part
+
+            return await client.post("/upload", content=stream(),
+                                     headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"})
+
+    return asyncio.run(send())
+
+
+def test_form_is_parsed_and_file_stored(tmp_path):
+    data = os.urandom(10_000)
+    response = post(str(tmp_path), form_parts({"user_id": "u1", "duration": "3"}, "talk.MP3",
+                                              [data[:4000], data[4000:]]))
+    assert response.status_code == 200
+    result = response.json()
+    assert result["fields"] == {"user_id": "u1", "duration": "3"}
+    assert result["validated"] == [{"user_id": "u1", "duration": "3"}]
+    assert result["filename"] == "talk.MP3"
+    assert result["size"] == len(data)
+    assert result["sha256"] == hashlib.sha256(data).hexdigest()
+    assert result["file_path"] == os.path.join(str(tmp_path), f"{result['file_id']}.mp3")
+    with open(result["file_path"], "rb") as f:
+        assert f.read() == data
+
+
+def test_oversized_upload_is_refused_while_streaming(tmp_path):
+    sent = []
+
+    def chunks():
+        # Far more than the limit; the request must stop being read soon after crossing it
+        for _ in range(100):
+            sent.append(1)
+            yield b"\0" * 16 * 1024
+
+    response = post(str(tmp_path), form_parts({"user_id": "u1", "duration": "3"}, "big.wav", chunks()))
+    assert response.status_code == 413
+    assert len(sent) < 10
+    # The partial file is removed
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_fields_are_validated_before_the_file_arrives(tmp_path):
+    sent = []
+
+    def chunks():
+        for _ in range(3):
+            sent.append(1)
+            yield b"\0" * 1024
+
+    response = post(str(tmp_path), form_parts({"user_id": "refused", "duration": "3"}, "a.wav", chunks()))
+    assert response.status_code == 402
+    assert sent == []
+
+
+def test_missing_fields_are_rejected(tmp_path):
+    response = post(str(tmp_path), form_parts({"user_id": "u1"}, "a.wav", [b"abc"]))
+    assert response.status_code == 422
+    assert "duration" in response.json()["message"]
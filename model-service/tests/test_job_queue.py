@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+import pytest
+
+from job_queue import JobQueue, wait_for_job
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(os.path.join(str(tmp_path), "jobs.sqlite3"))
+
+
+def test_wait_for_job_times_out_while_the_job_runs(queue):
+    job_id = queue.submit("audio", {})
+    with pytest.raises(TimeoutError):
+        asyncio.run(wait_for_job(job_id, poll_interval=0.01, queue=queue, timeout=0.05))
+    # The job itself is left alone and can still be polled
+    assert queue.get(job_id)["status"] == "queued"
+
+
+def test_wait_for_job_returns_finished_job_before_timeout(queue):
+    job_id = queue.submit("audio", {})
+    queue.complete(job_id, {"status": "success"})
+    job = asyncio.run(wait_for_job(job_id, queue=queue, timeout=0.05))
+    assert job["status"] == "completed"
+
+
+def test_requeue_orphaned_keeps_jobs_of_live_workers(queue):
+    queue.heartbeat("worker-a", "busy")
+    job_id = queue.submit("audio", {})
+    queue.claim("worker-a")
+    assert queue.requeue_orphaned(max_age=60.0) == 0
+    assert queue.get(job_id)["status"] == "running"
+
+
+def test_requeue_orphaned_requeues_jobs_of_stale_workers(queue):
+    queue.heartbeat("worker-a", "busy")
+    job_id = queue.submit("audio", {})
+    queue.claim("worker-a")
+    queue.add_segments(job_id, [{"start": 0.0, "end": 1.0, "text": "hi"}], 16000, 32000)
+    # Any heartbeat is older than a zero max age
+    assert queue.requeue_orphaned(max_age=0.0) == 1
+    job = queue.get(job_id)
+    assert job["status"] == "queued" and job["worker_id"] is None
+    assert queue.segments_since(job_id) == []
+
+
+def test_segments_carry_replaced_times(queue):
+    job_id = queue.submit("audio", {})
+    queue.add_segments(job_id, [{"start": 0.0, "end": 2.0, "text": "draft"}], 32000, 32000)
+    queue.add_segments(job_id, [{"start": 0.1, "end": 1.9, "text": "better"}], 32000, 32000, replaces=(0.0, 2.0))
+    windows = queue.segments_since(job_id)
+    assert [window["replaces"] for window in windows] == [None, [0.0, 2.0]]
+    assert windows[1]["segments"][0]["text"] == "better"
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+import transcriber as transcriber_module
+from language_id import sample_windows
+from transcriber import Transcriber
+
+
+@pytest.fixture
+def transcriber(monkeypatch, tmp_path):
+    # The caches are created under the working directory
+    monkeypatch.chdir(tmp_path)
+    torch.manual_seed(0)
+    model = Whisper(ModelDimensions(80, 1500, 384, 6, 2, 51865, 448, 384, 6, 2)).eval()
+    t = Transcriber(model_name="tiny", device="cpu", model=model, batch_size=1, parallel_workers=0, vad=False,
+                    profile="fast")
+    calls = []
+
+    def transcribe(audio, language=None, **kwargs):
+        calls.append(language)
+        return {"segments": [], "language": language or "de", "language_probs": {"de": 0.9, "en": 0.1}}
+
+    monkeypatch.setattr(t.engine, "transcribe", transcribe)
+    t.decode_calls = calls
+    return t
+
+
+def test_sample_windows_spread_over_the_file():
+    assert sample_windows(3, 5) == [0, 1, 2]
+    assert sample_windows(10, 3) == [0, 4, 9]
+    assert sample_windows(10, 1) == [0]
+
+
+def noise(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (0.1 * rng.standard_normal(int(seconds * 16000))).astype(np.float32)
+
+
+def test_single_window_vote_is_taken_from_the_first_decode(transcriber, monkeypatch):
+    monkeypatch.setattr(transcriber_module, "LANGUAGE_ID_WINDOWS", 1)
+
+    def identify_language(*args, **kwargs):
+        raise AssertionError("window 0 must not go through the encoder for a separate language pass")
+
+    monkeypatch.setattr(transcriber.engine, "identify_language", identify_language)
+    result = transcriber.transcribe(noise(45), use_cache=False)
+
+    assert result["language"] == "de"
+    assert result["language_confidence"] == 0.9
+    # Window 0 detects, later windows decode in its language; none is decoded twice
+    assert transcriber.decode_calls == [None, "de"]
+
+
+def test_several_windows_vote_before_decoding(transcriber, monkeypatch):
+    monkeypatch.setattr(transcriber_module, "LANGUAGE_ID_WINDOWS", 3)
+    monkeypatch.setattr(transcriber.engine, "identify_language", lambda windows, cache=None: ("fr", 0.8))
+    result = transcriber.transcribe(noise(45), use_cache=False)
+
+    assert result["language"] == "fr"
+    assert transcriber.decode_calls == ["fr", "fr"]
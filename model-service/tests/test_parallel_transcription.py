@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import parallel_transcription
+from cancellation import CancellationToken, JobCancelled
+from media_io import SAMPLE_RATE
+from parallel_transcription import SpanPool
+
+
+def in_process_pool(workers: int = 2) -> SpanPool:
+    """A SpanPool whose spans run on threads of this process instead of spawned workers."""
+    pool = SpanPool.__new__(SpanPool)
+    pool.workers = workers
+    pool.batch_size = 1
+    pool.cancel_event = threading.Event()
+    pool.executor = ThreadPoolExecutor(max_workers=workers)
+    return pool
+
+
+def two_span_audio() -> np.ndarray:
+    # 10 s of noise, a 2 s pause, 10 s of noise: split at 10 s, it cuts inside the pause
+    rng = np.random.default_rng(0)
+    noise = (0.3 * rng.standard_normal(10 * SAMPLE_RATE)).astype(np.float32)
+    return np.concatenate([noise, np.zeros(2 * SAMPLE_RATE, dtype=np.float32), noise])
+
+
+def fake_span(audio, language, use_cache, profile, output):
+    seconds = len(audio) / SAMPLE_RATE
+    # The first, longer span finishes last
+    time.sleep(0.3 if seconds > 11 else 0.0)
+    return [{"start": 0.5, "end": 1.5, "text": f"{seconds:.2f}",
+             "words": [{"text": f"{seconds:.2f}", "start": 0.5, "end": 1.5}]}]
+
+
+def test_spans_merge_in_timeline_order(monkeypatch):
+    monkeypatch.setattr(parallel_transcription, "_transcribe_span", fake_span)
+    audio = two_span_audio()
+    spans = parallel_transcription.split_at_silence(audio, 10.0)
+    assert len(spans) == 2
+
+    pool = in_process_pool()
+    try:
+        merged = pool.transcribe(audio, "en", span_seconds=10.0)
+    finally:
+        pool.shutdown()
+
+    # Each span's segments, in span order, shifted by where the span starts
+    assert [s["text"] for s in merged] == [f"{(end - start) / SAMPLE_RATE:.2f}" for start, end in spans]
+    assert [s["start"] for s in merged] == pytest.approx([start / SAMPLE_RATE + 0.5 for start, _ in spans])
+    assert [s["end"] for s in merged] == pytest.approx([start / SAMPLE_RATE + 1.5 for start, _ in spans])
+    assert [s["words"][0]["start"] for s in merged] == [s["start"] for s in merged]
+
+
+def test_cancel_stops_running_spans(monkeypatch):
+    pool = in_process_pool()
+
+    def slow_span(audio, language, use_cache, profile, output):
+        # Stands in for a span worker that checks the pool's cancel event between windows
+        if pool.cancel_event.wait(10.0):
+            raise JobCancelled("Job was cancelled")
+        return []
+
+    monkeypatch.setattr(parallel_transcription, "_transcribe_span", slow_span)
+    cancel_at = time.monotonic() + 0.2
+    token = CancellationToken(lambda: time.monotonic() >= cancel_at)
+    started = time.monotonic()
+    try:
+        with pytest.raises(JobCancelled):
+            pool.transcribe(two_span_audio(), "en", span_seconds=10.0, cancel_token=token)
+        assert time.monotonic() - started < 5.0
+        # Cleared again for the next file
+        assert not pool.cancel_event.is_set()
+    finally:
+        pool.shutdown()
+
+
+def test_pools_are_capped(monkeypatch):
+    started = []
+
+    class FakePool:
+        def __init__(self, model, model_name, device, workers, batch_size=1):
+            self.model_name, self.workers, self.batch_size = model_name, workers, batch_size
+            self.stopped = False
+            started.append(self)
+
+        def shutdown(self):
+            self.stopped = True
+
+    monkeypatch.setattr(parallel_transcription, "SpanPool", FakePool)
+    monkeypatch.setattr(parallel_transcription, "MAX_POOLS", 2)
+    monkeypatch.setattr(parallel_transcription, "_pools", parallel_transcription.OrderedDict())
+
+    base = parallel_transcription.get_span_pool(None, "base", "cpu", 2)
+    turbo = parallel_transcription.get_span_pool(None, "turbo", "cpu", 2)
+    # base is used again, so turbo is the least recently used when a third model arrives
+    assert parallel_transcription.get_span_pool(None, "base", "cpu", 2) is base
+    parallel_transcription.get_span_pool(None, "large-v3", "cpu", 2)
+
+    assert turbo.stopped and not base.stopped
+    assert list(parallel_transcription._pools) == [("base", "cpu"), ("large-v3", "cpu")]
+    assert len(started) == 3
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+from handlers.preview import preview_result, read_outputs
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def outputs(tmp_path):
+    paths = {name: str(tmp_path / name) for name in ("upload.wav", "out.srt", "out.json", "out.audio.wav")}
+    for path in paths.values():
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("x")
+    with open(paths["out.srt"], "w", encoding="utf-8") as f:
+        f.write("1\n00:00:00,000 --> 00:00:01,000\nhello\n\n")
+    with open(paths["out.json"], "w", encoding="utf-8") as f:
+        json.dump({"transcription": {"segments": [{"text": "hello"}]}}, f)
+    return paths
+
+
+def test_read_outputs(outputs):
+    result = read_outputs(outputs["out.srt"], outputs["out.json"])
+    assert result["srt"].endswith("hello\n\n")
+    assert result["transcript"]["transcription"]["segments"][0]["text"] == "hello"
+
+
+def test_preview_result_packages_outputs_and_removes_files(outputs):
+    data = {"srt_path": outputs["out.srt"], "json_path": outputs["out.json"],
+            "audio_path": outputs["upload.wav"], "language": "en", "word_count": 1}
+    preview = preview_result(data, keep=outputs["upload.wav"])
+
+    # No local paths leak into the job record
+    assert preview["data"] == {"language": "en", "word_count": 1}
+    assert preview["srt"].endswith("hello\n\n") and preview["transcript"]["transcription"]["segments"]
+    assert not os.path.exists(outputs["out.srt"]) and not os.path.exists(outputs["out.json"])
+    # The final pass still needs the upload
+    assert os.path.exists(outputs["upload.wav"])
+
+
+def test_preview_is_served_until_the_final_result(tmp_path):
+    from api.jobs_api import result_response
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.submit("audio", {"progressive": "1"})
+    queue.claim("worker-a")
+    assert result_response(queue.get(job_id)).status_code == 202
+    assert queue.get(job_id)["preview"] is None
+
+    queue.set_preview(job_id, {"data": {"language": "en"}, "srt": "draft", "transcript": {}})
+    response = result_response(queue.get(job_id))
+    body = json.loads(response.body)
+    assert response.status_code == 202
+    assert body["version"] == "preview" and body["data"] == {"language": "en"}
+
+    queue.complete(job_id, {"status": "success", "data": {"language": "en"}, "srt": "final", "transcript": {}})
+    body = json.loads(result_response(queue.get(job_id)).body)
+    assert body["version"] == "final"
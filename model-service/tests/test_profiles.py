@@ -0,0 +1,66 @@
+import pytest
+
+from profiles import decode_options, get_profile, profile_key
+from transcriber import Transcriber
+
+
+def test_balanced_cache_key_is_unchanged():
+    # Results cached before profiles existed stay valid
+    assert profile_key(get_profile("balanced", "words")) == {}
+
+
+def test_other_profiles_and_outputs_have_their_own_keys():
+    assert profile_key(get_profile("fast", "words")) == {"profile": "fast"}
+    assert profile_key(get_profile("balanced", "segments")) == {"word_timestamps": False}
+    assert profile_key(get_profile("accurate", "segments")) == {"profile": "accurate", "word_timestamps": False}
+    tiered = profile_key(get_profile("tiered"))
+    assert tiered["profile"] == "tiered" and "escalate_model" in tiered and "escalate_below" in tiered
+
+
+def test_segment_output_skips_alignment():
+    assert get_profile("accurate", "segments")["word_timestamps"] is False
+    assert decode_options(get_profile("accurate", "segments")) == {
+        "beam_size": 5, "best_of": 5, "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0), "word_timestamps": False,
+    }
+
+
+def test_unknown_profile_or_output():
+    with pytest.raises(ValueError):
+        get_profile("turbo")
+    with pytest.raises(ValueError):
+        get_profile("fast", "paragraphs")
+
+
+def transcriber_with(profile: str, output: str) -> Transcriber:
+    # generate_srt needs only the profile
+    transcriber = Transcriber.__new__(Transcriber)
+    transcriber.profile = get_profile(profile, output)
+    return transcriber
+
+
+TRANSCRIPTION = {"segments": [
+    {"start": 0.0, "end": 2.0, "text": "quiet words",
+     "words": [{"text": "quiet", "start": 0.0, "end": 1.0, "confidence": 0.2},
+               {"text": "words", "start": 1.0, "end": 2.0, "confidence": 0.3}]},
+    {"start": 2.5, "end": 4.0, "text": "clear words",
+     "words": [{"text": "clear", "start": 2.5, "end": 3.0, "confidence": 0.9},
+               {"text": "words", "start": 3.1, "end": 4.0, "confidence": 0.8}]},
+]}
+
+
+def test_segment_srt_keeps_every_segment(tmp_path):
+    path = str(tmp_path / "out.srt")
+    transcriber_with("fast", "words").generate_srt(TRANSCRIPTION, path, min_confidence=0.5)
+    with open(path, encoding="utf-8") as f:
+        srt = f.read()
+    # Unaligned words carry no per-word confidence, so low-confidence segments are not filtered out
+    assert srt == ("1\n00:00:00,000 --> 00:00:02,000\nquiet words\n\n"
+                   "2\n00:00:02,500 --> 00:00:04,000\nclear words\n\n")
+
+
+def test_word_srt_filters_by_confidence(tmp_path):
+    path = str(tmp_path / "out.srt")
+    transcriber_with("balanced", "words").generate_srt(TRANSCRIPTION, path, min_confidence=0.5)
+    with open(path, encoding="utf-8") as f:
+        srt = f.read()
+    assert srt == "1\n00:00:02,500 --> 00:00:04,000\nclear words\n\n"
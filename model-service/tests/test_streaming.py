@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(monkeypatch, tmp_path):
+    import job_queue
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(job_queue, "_queue", queue)
+    return queue
+
+
+def segment(start: float, end: float, text: str) -> dict:
+    return {"start": start, "end": end, "text": text, "words": []}
+
+
+def test_segments_since_returns_windows_in_order(queue):
+    job_id = queue.submit("audio", {})
+    other = queue.submit("audio", {})
+    for index in range(3):
+        queue.add_segments(job_id, [segment(index, index + 1, f"w{index}")], (index + 1) * 100, 300)
+    queue.add_segments(other, [segment(0, 1, "other")], 100, 100)
+
+    windows = queue.segments_since(job_id)
+    assert [window["seq"] for window in windows] == [1, 2, 3]
+    assert [window["segments"][0]["text"] for window in windows] == ["w0", "w1", "w2"]
+    # A reconnecting client asks for what it has not seen yet
+    assert [window["seq"] for window in queue.segments_since(job_id, 2)] == [3]
+    assert queue.segments_since(job_id, 3) == []
+
+
+def test_progress_event():
+    from api.jobs_api import progress_event
+
+    job = {"started_at": 100.0}
+    event = progress_event(job, {"samples_done": 25, "samples_total": 100, "created_at": 110.0})
+    # A quarter took 10 s, so three quarters are left at 30 s
+    assert event == {"samples_done": 25, "samples_total": 100, "percent": 25.0, "eta_seconds": 30.0}
+
+
+def test_stream_replays_windows_then_ends(queue):
+    from api.jobs_api import router
+
+    job_id = queue.submit("audio", {})
+    queue.claim("worker-a")
+    queue.add_segments(job_id, [segment(0, 1, "first")], 100, 200)
+    queue.add_segments(job_id, [segment(1, 2, "second")], 200, 200)
+    queue.complete(job_id, {"status": "success", "data": {}})
+
+    app = FastAPI()
+    app.include_router(router, prefix="/analyze/audio")
+
+    async def fetch():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(f"/analyze/audio/stream/{job_id}", params={"format": "ndjson"})
+
+    response = asyncio.run(fetch())
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["event"] for event in events] == ["segments", "progress", "segments", "progress", "end"]
+    assert [event["segments"][0]["text"] for event in events if event["event"] == "segments"] == ["first", "second"]
+    assert events[-1]["status"] == "completed"
+    assert events[-1]["result_url"] == f"/analyze/audio/result/{job_id}"
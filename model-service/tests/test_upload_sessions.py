@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from upload_sessions import UploadSessionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadSessionStore(os.path.join(str(tmp_path), "uploads.sqlite3"))
+
+
+def test_session_preallocates_its_file(store, tmp_path):
+    session = store.create("audio", "u1", 3, "talk.MP3", 2500, str(tmp_path / "uploads"), part_size=1000)
+    assert session["status"] == "open"
+    assert session["file_path"].endswith(".mp3")
+    assert os.path.getsize(session["file_path"]) == 2500
+    assert session["total_parts"] == 3
+    assert store.missing_parts(session) == [0, 1, 2]
+
+
+def test_parts_in_any_order_resume(store, tmp_path):
+    session = store.create("audio", "u1", 3, "a.wav", 2500, str(tmp_path), part_size=1000)
+    # The last part is short
+    assert store.part_range(session, 2) == (2000, 500)
+
+    store.record_part(session["id"], 2, 500, "c")
+    store.record_part(session["id"], 0, 1000, "a")
+    session = store.get(session["id"])
+    assert store.missing_parts(session) == [1]
+    assert session["bytes_received"] == 1500
+    assert store.received_ranges(session) == [[0, 1000], [2000, 2500]]
+
+    # A retried part replaces the earlier record
+    store.record_part(session["id"], 1, 1000, "b")
+    store.record_part(session["id"], 1, 1000, "b2")
+    session = store.get(session["id"])
+    assert store.missing_parts(session) == []
+    assert store.received_ranges(session) == [[0, 2500]]
+    assert [p["sha256"] for p in session["parts"]] == ["a", "b2", "c"]
+
+
+def test_mark_only_moves_from_the_expected_status(store, tmp_path):
+    session = store.create("audio", "u1", 3, "a.wav", 10, str(tmp_path))
+    # Two concurrent finalize requests: only one wins
+    assert store.mark(session["id"], "finalizing", expected="open")
+    assert not store.mark(session["id"], "finalizing", expected="open")
+    assert store.get(session["id"])["status"] == "finalizing"
+
+
+def test_purge_stale_removes_sessions_and_files(store, tmp_path):
+    session = store.create("audio", "u1", 3, "a.wav", 10, str(tmp_path))
+    assert store.purge_stale(older_than=3600) == 0
+    assert store.purge_stale(older_than=-1) == 1
+    assert store.get(session["id"]) is None
+    assert not os.path.exists(session["file_path"])
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from audio_segmentation import Window
+from media_io import SAMPLE_RATE
+from vad import detect_speech, is_near_silent, pack_speech_windows
+
+
+def tone(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_detect_speech_finds_tones_between_silence():
+    audio = np.concatenate([silence(2), tone(3), silence(4), tone(2), silence(1)])
+    regions = detect_speech(audio)
+    assert len(regions) == 2
+    # Padded by PAD_SECONDS (0.2 s) on each side
+    assert [sample / SAMPLE_RATE for region in regions for sample in region] == \
+        pytest.approx([1.8, 5.2, 8.8, 11.2], abs=0.05)
+
+
+def test_detect_speech_ignores_blips_and_silence():
+    assert detect_speech(silence(5)) == []
+    # Shorter than MIN_SPEECH_SECONDS
+    assert detect_speech(np.concatenate([silence(2), tone(0.05), silence(2)])) == []
+
+
+def test_short_pauses_are_bridged():
+    audio = np.concatenate([silence(1), tone(1), silence(0.1), tone(1), silence(1)])
+    assert len(detect_speech(audio)) == 1
+
+
+def test_pack_speech_windows_respects_limit():
+    audio = np.concatenate([tone(12), silence(1), tone(12), silence(1), tone(12), silence(1)])
+    regions = detect_speech(audio)
+    windows = pack_speech_windows(audio, regions)
+    assert all(len(window.audio) <= 30 * SAMPLE_RATE for window in windows)
+    # Two regions share the first window; the third does not fit
+    assert [len(window.pieces) for window in windows] == [2, 1]
+    assert sum(len(window.audio) for window in windows) == sum(end - start for start, end in regions)
+
+
+def test_pack_speech_windows_cuts_long_regions():
+    rng = np.random.default_rng(0)
+    audio = (0.3 * rng.standard_normal(75 * SAMPLE_RATE)).astype(np.float32)
+    windows = pack_speech_windows(audio, [(0, len(audio))])
+    assert len(windows) >= 3
+    assert all(len(window.audio) <= 30 * SAMPLE_RATE for window in windows)
+    # The pieces cover the region without gaps or overlap
+    pieces = [(start, start + length) for window in windows for _, start, length in window.pieces]
+    assert pieces[0][0] == 0 and pieces[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(pieces, pieces[1:]))
+
+
+def test_window_to_timeline():
+    # 2 s taken from 10 s in the source, then 3 s from 20 s
+    window = Window(silence(5), [(0, 10 * SAMPLE_RATE, 2 * SAMPLE_RATE),
+                                 (2 * SAMPLE_RATE, 20 * SAMPLE_RATE, 3 * SAMPLE_RATE)])
+    assert window.start == 10.0
+    assert window.to_timeline(1.0) == 11.0
+    assert window.to_timeline(3.5) == 21.5
+    # The junction starts the second piece, but ends the first
+    assert window.to_timeline(2.0) == 20.0
+    assert window.to_timeline(2.0, is_end=True) == 12.0
+    # Times past the end stay within the last piece
+    assert window.to_timeline(6.0) == 23.0
+
+
+def test_near_silent_audio():
+    assert is_near_silent(silence(10))
+    assert is_near_silent(np.zeros(0, dtype=np.float32))
+    # Hiss at about -70 dBFS stays below SILENCE_THRESHOLD_DB
+    rng = np.random.default_rng(0)
+    assert is_near_silent((3e-4 * rng.standard_normal(10 * SAMPLE_RATE)).astype(np.float32))
+    # A click shorter than MIN_SPEECH_SECONDS does not count as sound
+    assert is_near_silent(np.concatenate([silence(5), tone(0.05), silence(5)]))
+
+
+def test_audible_audio_is_not_near_silent():
+    assert not is_near_silent(np.concatenate([silence(5), tone(1.0, amplitude=0.01), silence(5)]))
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+import word_alignment
+from word_alignment import _group_segments, align_segments
+
+EOT = 50257
+
+
+def segment(start: float, end: float, tokens: int, text: str = "hello there") -> dict:
+    # Text tokens plus a timestamp token on each side, which do not count against the context
+    return {"start": start, "end": end, "text": text, "confidence": 0.8,
+            "tokens": [EOT + 100] + [400] * tokens + [EOT + 200]}
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    return Whisper(ModelDimensions(80, 1500, 384, 6, 2, 51865, 448, 384, 6, 2)).eval()
+
+
+def test_groups_split_by_duration():
+    segments = [segment(0, 10, 5), segment(10, 25, 5), segment(25, 40, 5)]
+    assert [len(group) for group in _group_segments(segments, 440, EOT)] == [2, 1]
+
+
+def test_groups_split_by_token_count():
+    # Fast speech: three segments fit in 30 s but not in the text context together
+    segments = [segment(0, 8, 200), segment(8, 16, 200), segment(16, 24, 200)]
+    groups = _group_segments(segments, 440, EOT)
+    assert [len(group) for group in groups] == [2, 1]
+    assert groups[1][0] is segments[2]
+
+
+def test_failed_group_keeps_unaligned_words(model, monkeypatch):
+    def fail(**kwargs):
+        raise RuntimeError("too many tokens")
+
+    monkeypatch.setattr(word_alignment, "add_word_timestamps", fail)
+    audio = np.zeros(20 * 16000, dtype=np.float32)
+    segments = [segment(1.0, 3.0, 4, "hello there"), segment(4.0, 6.0, 4, "general kenobi")]
+
+    aligned = align_segments(model, audio, segments, "en")
+
+    # Words spread over each segment's own times instead of failing the whole file
+    assert [w["text"] for w in aligned[0]["words"]] == ["hello", "there"]
+    assert aligned[0]["words"][0]["start"] == 1.0 and aligned[0]["words"][-1]["end"] == 3.0
+    assert [w["text"] for w in aligned[1]["words"]] == ["general", "kenobi"]
@@ -1,29 +1,65 @@
 import os
+import itertools
 import ffmpeg
-import whisper_timestamped as whisper_ts
-import torch
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Optional, Union
 import json
+import time
 from datetime import datetime
-import soundfile as sf
+from model_registry import default_device
+from engines import load_engine
+from transcription_cache import get_transcription_cache, get_window_cache, memoized_window
+from media_io import SAMPLE_RATE, VIDEO_EXTENSIONS, decode_audio, load_media, write_wav
+from batched_inference import DEFAULT_BATCH_SIZE, iter_window_results
+from parallel_transcription import PARALLEL_WORKERS, SPAN_SECONDS, get_span_pool
+from audio_segmentation import adaptive_windows
+from language_id import LANGUAGE_ID_WINDOWS, language_from_result
+from profiles import decode_options, get_profile, profile_key
+from escalation import escalate_segments
+from cancellation import CancellationToken, JobCancelled
+from vad import VAD_ENABLED, detect_speech, is_near_silent, pack_speech_windows, speech_ratio
 import numpy as np
-import librosa
-from pydub import AudioSegment
 
 class Transcriber:
     
-    def __init__(self, model_name: str = "turbo"):
+    def __init__(self, model_name: Optional[str] = None, device: Optional[str] = None,
+                 batch_size: Optional[int] = None, model=None,
+                 parallel_workers: Optional[int] = None, vad: Optional[bool] = None,
+                 engine: Optional[str] = None, profile: Optional[str] = None,
+                 output: Optional[str] = None):
         """
         Initialize the transcriber with a specified Whisper model.
         
         Args:
-            model_name (str): Name of the Whisper model to use (tiny, base, small, medium, large, large-v3, turbo)
+            model_name (str, optional): Name of the Whisper model to use (tiny, base, small, medium, large,
+                large-v3, turbo); defaults to the profile's model
+            device (str, optional): Device to run on; defaults to CUDA when available
+            batch_size (int, optional): Windows decoded per batched forward pass;
+                defaults to TRANSCRIBE_BATCH_SIZE, 1 decodes windows one by one
+            model (optional): An already loaded model, e.g. one shared by a parent process
+            parallel_workers (int, optional): Processes transcribing spans of long files
+                in parallel; defaults to PARALLEL_SPAN_WORKERS, 0 or 1 disables it
+            vad (bool, optional): Decode only detected speech; defaults to VAD_ENABLED
+            engine (str, optional): whisper_timestamped or faster_whisper; defaults to TRANSCRIBE_ENGINE
+            profile (str, optional): fast, balanced, accurate or tiered decoding; defaults to TRANSCRIBE_PROFILE
+            output (str, optional): words or segments (no word alignment); defaults to TRANSCRIBE_OUTPUT
         """
         try:
-            self.model = whisper_ts.load_model(model_name)
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model.to(self.device)
-            print(f"Model loaded successfully on {self.device}")
+            self.profile = get_profile(profile, output)
+            self.model_name = model_name or self.profile["model_name"]
+            self.device = device or default_device()
+            self.engine = load_engine(engine, self.model_name, self.device, model)
+            self.model = self.engine.model
+            # The larger model of a two-tier profile, loaded when a draft first needs it
+            self.escalation_engine = None
+            # Batched decoding and span pools work on the PyTorch model only
+            self.batch_size = (batch_size or DEFAULT_BATCH_SIZE) if self.engine.torch_model else 1
+            self.parallel_workers = PARALLEL_WORKERS if parallel_workers is None else parallel_workers
+            if not self.engine.torch_model:
+                self.parallel_workers = 0
+            self.vad = VAD_ENABLED if vad is None else vad
+            self.cache = get_transcription_cache()
+            self.window_cache = get_window_cache()
+            print(f"Model ready on {self.device}")
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {str(e)}")
         
@@ -38,9 +74,8 @@ class Transcriber:
             np.ndarray: Audio data in the correct format
         """
         try:
-            # Load audio using librosa
-            audio, sr = librosa.load(audio_path, sr=16000, mono=True)
-            return audio
+            # Decode and resample in one ffmpeg pass straight into memory
+            return decode_audio(audio_path, SAMPLE_RATE)
         except Exception as e:
             raise RuntimeError(f"Failed to load audio file {audio_path}: {str(e)}")
 
@@ -69,80 +104,275 @@ class Transcriber:
         except Exception as e:
             raise RuntimeError(f"Error during audio extraction: {str(e)}")
 
-    def transcribe(self, audio_path: str, language: Optional[str] = None) -> Dict:
+    def transcribe(self, audio_path: Union[str, np.ndarray], language: Optional[str] = None,
+                   progress_callback: Optional[Callable[[int, int], None]] = None,
+                   use_cache: bool = True,
+                   segment_callback: Optional[Callable[[List[Dict], int, int], None]] = None,
+                   cancel_token: Optional[CancellationToken] = None,
+                   near_silent: Optional[bool] = None) -> Dict:
+        """
+        Transcribe audio in silence-aligned windows (or windows of detected
+        speech) and stitch their segments onto one timeline.
+
+        Args:
+            audio_path (str or np.ndarray): Audio file, or samples at 16 kHz
+            language (str, optional): Skip language identification and decode in this language
+            progress_callback (Callable, optional): Called with (chunks_done, chunks_total) after each window
+            use_cache (bool): Look up and store results in the transcription and window caches
+            segment_callback (Callable, optional): Called with (segments, samples_done,
+                samples_total) as soon as each window's segments are stitched; a
+                tiered profile's escalation calls it again with replaces=(start, end)
+                of the draft segments each re-decoded region supersedes
+            cancel_token (CancellationToken, optional): Checked between stages and
+                after each window; JobCancelled is raised once it has fired
+            near_silent (bool, optional): is_near_silent of the audio when the caller
+                already checked it; None checks here
+
+        Returns:
+            Dict: transcription (segments, language, ...), language,
+                language_confidence, speech_ratio and escalated_ratio
+        """
         try:
-            if not os.path.exists(audio_path):
-                raise FileNotFoundError(f"Audio file not found: {audio_path}")
-                
-            audio = self.load_audio(audio_path)
+            if isinstance(audio_path, np.ndarray):
+                audio = audio_path
+            else:
+                if not os.path.exists(audio_path):
+                    raise FileNotFoundError(f"Audio file not found: {audio_path}")
+                audio = self.load_audio(audio_path)
             
 
-            # Process audio in smaller chunks with better overlap handling
-            chunk_duration = 30  # Reduced from 15 to 10 seconds
-            overlap_duration = 1  # Reduced from 2 to 1 second
+            # Nothing audible: answer right away without touching the model
+            if near_silent is None:
+                near_silent = is_near_silent(audio)
+            if near_silent:
+                print("No audible signal; skipping transcription")
+                if progress_callback:
+                    progress_callback(1, 1)
+                return {
+                    "transcription": {"segments": [], "language": language, "language_probability": 0.0,
+                                      "speech_ratio": 0.0},
+                    "language": language,
+                    "language_confidence": 0.0,
+                    "speech_ratio": 0.0
+                }
+
+            # Windows end in pauses (see audio_segmentation), so they need no overlap
+            chunk_duration = 30
+            overlap_duration = 0
             sample_rate = 16000
             all_segments = []
             last_end_time = 0
             min_segment_length = 0.1  # Minimum segment length in seconds
             max_repetition_count = 3  # Maximum times a character can repeat
+            # Long files can be cut at silence into spans transcribed by a process pool
+            parallel = self.parallel_workers > 1 and len(audio) > 2 * SPAN_SECONDS * sample_rate
+
+            # Identical audio with identical decode parameters gives an identical result
+            cache = self.cache if use_cache else None
+            if cache:
+                cache_key = cache.make_key(
+                    audio,
+                    pipeline="transcriber",
+                    model=self.engine.cache_name,
+                    language=language,
+                    chunk_duration=chunk_duration,
+                    overlap_duration=overlap_duration,
+                    min_segment_length=min_segment_length,
+                    max_repetition_count=max_repetition_count,
+                    # Batched decoding is not bit-identical to the sequential path
+                    **({"batched": True} if self.batch_size > 1 else {}),
+                    **({"parallel_span_seconds": SPAN_SECONDS} if parallel else {}),
+                    **({"vad": True} if self.vad else {}),
+                    # More than one voting window may pick another language
+                    **({"language_id_windows": LANGUAGE_ID_WINDOWS} if LANGUAGE_ID_WINDOWS != 1 else {}),
+                    **profile_key(self.profile),
+                )
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    print("Transcription cache hit")
+                    if progress_callback:
+                        progress_callback(1, 1)
+                    if segment_callback:
+                        segment_callback(cached["transcription"]["segments"], len(audio), len(audio))
+                    return cached
             
-            # First detect language from a small sample
-            initial_chunk = audio[:min(len(audio), 30 * sample_rate)]
-            initial_result = whisper_ts.transcribe(self.model, initial_chunk)
-            detected_language = initial_result["language"]
-            lang_confidence = initial_result.get("language_probability", 0.0)
+            window_cache = self.window_cache if use_cache else None
+
+            # Only speech is decoded; silence and near-silent beds are skipped
+            speech_regions = detect_speech(audio) if self.vad else [(0, len(audio))]
+            if self.vad:
+                windows = pack_speech_windows(audio, speech_regions, chunk_duration)
+            else:
+                windows = adaptive_windows(audio, chunk_duration)
+
+            if cancel_token:
+                cancel_token.check()
+
+            # Identify the language unless the caller knows it
+            first_result = None
+            if language:
+                detected_language = language
+                lang_confidence = 1.0
+            elif not windows:
+                # Nothing to listen to
+                detected_language = None
+                lang_confidence = 0.0
+            elif LANGUAGE_ID_WINDOWS > 1 or (parallel and LANGUAGE_ID_WINDOWS == 1):
+                # Encoder plus one language-token step per voting window, no transcription.
+                # A single vote is window 0's alone, so below its decode detects from the
+                # same encoder pass; span workers decode window 0 apart, so they vote here
+                detected_language, lang_confidence = self.engine.identify_language(
+                    [window.audio for window in windows], cache=window_cache
+                )
+            else:
+                # No separate pass: the first window is decoded with detection and its result kept
+                first_result = memoized_window(
+                    window_cache, windows[0].audio,
+                    {"model": self.engine.cache_name, "language": None, "condition_on_previous_text": False,
+                     **profile_key(self.profile)},
+                    lambda: self.engine.transcribe(windows[0].audio, condition_on_previous_text=False,
+                                                   **decode_options(self.profile))
+                )
+                detected_language, lang_confidence = language_from_result(first_result)
             
-            # Process the full audio in chunks
-            for i in range(0, len(audio), int((chunk_duration - overlap_duration) * sample_rate)):
-                start_sample = i
-                end_sample = min(i + chunk_duration * sample_rate, len(audio))
-                audio_chunk = audio[start_sample:end_sample]
-                
-                chunk_result = whisper_ts.transcribe(
-                    self.model, 
-                    audio_chunk, 
-                    language=detected_language,
-                    condition_on_previous_text=True if i > 0 else False
+            if parallel:
+                pool = get_span_pool(self.model, self.model_name, self.device,
+                                     self.parallel_workers, self.batch_size)
+                all_segments = pool.transcribe(audio, detected_language, use_cache=use_cache,
+                                               progress_callback=progress_callback,
+                                               profile=self.profile["name"], output=self.profile["output"],
+                                               cancel_token=cancel_token)
+                if segment_callback:
+                    # Spans finish out of order; their segments are stitched only once all are in
+                    segment_callback(all_segments, len(audio), len(audio))
+            else:
+                # Process the full audio in chunks
+                def condition(chunk_index: int) -> bool:
+                    return self.profile["condition_on_previous_text"] and chunk_index > 0
+
+                def window_params(chunk_index: int) -> Dict:
+                    return {"model": self.engine.cache_name, "language": detected_language,
+                            "condition_on_previous_text": condition(chunk_index), **profile_key(self.profile)}
+
+                def transcribe_window(chunk_index: int) -> Dict:
+                    return self.engine.transcribe(
+                        windows[chunk_index].audio, 
+                        language=detected_language,
+                        condition_on_previous_text=condition(chunk_index),
+                        **decode_options(self.profile)
+                    )
+
+                # Windows whose audio did not change since an earlier upload are not decoded again;
+                # with batch_size > 1 the rest are encoded and decoded K at a time
+                first = 0 if first_result is None else 1
+                window_results = iter_window_results(
+                    self.model, [window.audio for window in windows[first:]],
+                    lambda index: window_params(index + first), lambda index: transcribe_window(index + first),
+                    cache=window_cache,
+                    # The batched decoder is greedy; beam-search profiles decode window by window
+                    batch_size=self.batch_size if self.profile["beam_size"] is None else 1,
+                    word_timestamps=self.profile["word_timestamps"],
                 )
+                window_results = ((index + first, result) for index, result in window_results)
+                if first_result is not None:
+                    window_results = itertools.chain([(0, first_result)], window_results)
+                # Progress in samples, since windows of packed speech differ in length
+                samples_done = 0
+                samples_total = sum(len(window.audio) for window in windows)
+                for chunk_index, chunk_result in window_results:
+                    window = windows[chunk_index]
+                    stitched = len(all_segments)
                 
-                for segment in chunk_result["segments"]:
-                    # Adjust timestamps
-                    segment_start = max(segment["start"] + (i / sample_rate), last_end_time)
-                    segment_end = segment["end"] + (i / sample_rate)
+                    for segment in chunk_result["segments"]:
+                        # Map window-relative timestamps back onto the original timeline
+                        segment_start = max(window.to_timeline(segment["start"]), last_end_time)
+                        segment_end = window.to_timeline(segment["end"], is_end=True)
                     
-                    # Skip if segment is too short
-                    if segment_end - segment_start < min_segment_length:
-                        continue
+                        # Skip if segment is too short
+                        if segment_end - segment_start < min_segment_length:
+                            continue
                     
-                    # Check for excessive repetition
-                    current_text = " ".join(w["text"] for w in segment["words"])
-                    if self._has_excessive_repetition(current_text, max_repetition_count):
-                        continue
+                        # Check for excessive repetition
+                        current_text = " ".join(w["text"] for w in segment["words"])
+                        if self._has_excessive_repetition(current_text, max_repetition_count):
+                            continue
                     
-                    # Update segment timestamps
-                    segment["start"] = segment_start
-                    segment["end"] = segment_end
-                    for word in segment["words"]:
-                        word["start"] = max(word["start"] + (i / sample_rate), last_end_time)
-                        word["end"] = word["end"] + (i / sample_rate)
+                        # Update segment timestamps
+                        segment["start"] = segment_start
+                        segment["end"] = segment_end
+                        for word in segment["words"]:
+                            word["start"] = max(window.to_timeline(word["start"]), last_end_time)
+                            word["end"] = window.to_timeline(word["end"], is_end=True)
                     
-                    all_segments.append(segment)
-                    last_end_time = segment_end
+                        all_segments.append(segment)
+                        last_end_time = segment_end
+
+                    samples_done += len(window.audio)
+                    if segment_callback:
+                        segment_callback(all_segments[stitched:], samples_done, samples_total)
+                    if progress_callback:
+                        progress_callback(chunk_index + 1, len(windows))
+                    # Stops before the next window is decoded
+                    if cancel_token:
+                        cancel_token.check()
+
+            # Two-tier profiles decode the draft's low-confidence stretches again with the larger model
+            escalated_ratio = None
+            if self.profile.get("escalate_model"):
+                if self.escalation_engine is None:
+                    self.escalation_engine = load_engine(self.engine.name, self.profile["escalate_model"], self.device)
+                all_segments, escalated_seconds = escalate_segments(
+                    self.escalation_engine, audio, all_segments, detected_language, self.profile, window_cache,
+                    cancel_token=cancel_token,
+                    # Streamed draft segments are superseded region by region
+                    region_callback=(lambda segments, replaces: segment_callback(
+                        segments, len(audio), len(audio), replaces=replaces)) if segment_callback else None
+                )
+                escalated_ratio = round(escalated_seconds * sample_rate / len(audio), 4)
+                print(f"Re-decoded {escalated_ratio:.1%} of the audio with {self.profile['escalate_model']}")
             
             result = {
                 "segments": all_segments,
                 "language": detected_language,
-                "language_probability": lang_confidence
+                "language_probability": lang_confidence,
+                "speech_ratio": speech_ratio(speech_regions, len(audio)),
+                "escalated_ratio": escalated_ratio
             }
             
-            return {
+            output = {
                 "transcription": result,
                 "language": detected_language,
-                "language_confidence": lang_confidence
+                "language_confidence": lang_confidence,
+                "speech_ratio": result["speech_ratio"],
+                "escalated_ratio": escalated_ratio
             }
+            if cache:
+                cache.put(cache_key, output)
+            return output
+        except JobCancelled:
+            raise
         except Exception as e:
             raise RuntimeError(f"Transcription failed: {str(e)}")
 
+    def warmup(self, seconds: float = 2.0) -> float:
+        """
+        Run a short synthetic decode through transcribe() so the first real
+        request does not pay for allocator and kernel warm-up.
+
+        Args:
+            seconds (float): Length of the synthetic clip
+
+        Returns:
+            float: Wall-clock time of the warm-up decode in seconds
+        """
+        sample_rate = 16000
+        t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+        # Low-level tone plus noise so the decoder runs at least one step
+        audio = 0.1 * np.sin(2 * np.pi * 220 * t) + 0.01 * np.random.randn(len(t))
+        started = time.perf_counter()
+        self.transcribe(audio.astype(np.float32), language="en", use_cache=False)
+        return time.perf_counter() - started
+
     def _has_excessive_repetition(self, text: str, max_repeat: int) -> bool:
         """Check if text has excessive character repetition."""
         if not text:
@@ -177,6 +407,14 @@ class Transcriber:
             entry_num = 1
 
             for segment in transcription["segments"]:
+                if not self.profile["word_timestamps"]:
+                    # One cue per decoded segment: unaligned words only carry the segment's
+                    # exp(avg_logprob), which is no word confidence to filter by
+                    srt_entries.append(f"{entry_num}\n{format_time(segment['start'])} --> "
+                                       f"{format_time(segment['end'])}\n{segment['text'].strip()}\n\n")
+                    entry_num += 1
+                    continue
+
                 words = [w for w in segment["words"] if w["confidence"] >= min_confidence]
                 if not words:
                     continue
@@ -217,7 +455,12 @@ class Transcriber:
         except Exception as e:
             raise RuntimeError(f"Failed to generate SRT file: {str(e)}")
 
-    def process_media(self, input_path: str, output_dir: str, min_confidence: float = 0.5) -> Dict:
+    def process_media(self, input_path: str, output_dir: str, min_confidence: float = 0.5,
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      segment_callback: Optional[Callable[[List[Dict], int, int], None]] = None,
+                      cancel_token: Optional[CancellationToken] = None) -> Dict:
+        # Files written here; removed again if the job fails or is cancelled part way
+        written = []
         try:
             if not os.path.exists(input_path):
                 raise FileNotFoundError(f"Input file not found: {input_path}")
@@ -225,16 +468,26 @@ class Transcriber:
             os.makedirs(output_dir, exist_ok=True)
             base_name = os.path.splitext(os.path.basename(input_path))[0]
             
-            # Extract audio if input is video
-            if input_path.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                audio_path = os.path.join(output_dir, f"{base_name}.wav")
-                self.extract_audio(input_path, audio_path)
+            # Probe and decode once; every later stage shares this buffer
+            audio, metadata = load_media(input_path)
+            duration = metadata["duration"]
+            if cancel_token:
+                cancel_token.check()
+
+            # Keep a WAV next to the outputs for video inputs, written from the buffer.
+            # Inputs without audible sound get no WAV; transcribe() returns empty for them
+            near_silent = not metadata["has_audio"] or is_near_silent(audio)
+            if near_silent:
+                audio_path = None if input_path.lower().endswith(VIDEO_EXTENSIONS) else input_path
+            elif input_path.lower().endswith(VIDEO_EXTENSIONS):
+                audio_path = write_wav(audio, os.path.join(output_dir, f"{base_name}.wav"))
+                written.append(audio_path)
             else:
                 audio_path = input_path
 
             # Transcribe (includes language detection)
-            result = self.transcribe(audio_path)
-            duration = len(AudioSegment.from_file(audio_path)) / 1000.0
+            result = self.transcribe(audio, progress_callback=progress_callback, segment_callback=segment_callback,
+                                     cancel_token=cancel_token, near_silent=near_silent)
 
             # Calculate total words from transcription result
             total_words = sum(len(segment["words"]) for segment in result["transcription"]["segments"])
@@ -242,15 +495,29 @@ class Transcriber:
             # Generate outputs
             srt_path = os.path.join(output_dir, f"{base_name}.srt")
             json_path = os.path.join(output_dir, f"{base_name}.json")
+            written += [srt_path, json_path]
             
             self.generate_srt(result["transcription"], srt_path, min_confidence)
+
+            transcription = result["transcription"]
+            if self.profile["output"] == "segments":
+                # Segment-level JSON; the tokens stay so words can be aligned later (see align_media)
+                transcription = dict(transcription, segments=[
+                    {key: value for key, value in segment.items() if key != "words"}
+                    for segment in transcription["segments"]
+                ])
             
             # Save detailed results
             with open(json_path, "w", encoding="utf-8") as f:
                 json.dump({
                     "language": result["language"],
                     "language_confidence": result["language_confidence"],
-                    "transcription": result["transcription"],
+                    "speech_ratio": result.get("speech_ratio"),
+                    "escalated_ratio": result.get("escalated_ratio"),
+                    "profile": self.profile["name"],
+                    "model": self.model_name,
+                    "output": self.profile["output"],
+                    "transcription": transcription,
                     "processing_time": datetime.now().isoformat()
                 }, f, indent=2, ensure_ascii=False)
             
@@ -262,7 +529,65 @@ class Transcriber:
                 "srt_path": srt_path,
                 "json_path": json_path,
                 "language": result["language"],
-                "language_confidence": result["language_confidence"]
+                "language_confidence": result["language_confidence"],
+                "speech_ratio": result.get("speech_ratio"),
+                "escalated_ratio": result.get("escalated_ratio"),
+                "profile": self.profile["name"],
+                "model": self.model_name,
+                "output": self.profile["output"]
+            }
+        except Exception as e:
+            # A failed or cancelled job leaves no partial outputs behind
+            for path in written:
+                if os.path.exists(path):
+                    os.remove(path)
+            if isinstance(e, JobCancelled):
+                raise
+            raise RuntimeError(f"Media processing failed: {str(e)}")
+
+    def align_media(self, audio_path: Optional[str], json_path: str, output_dir: str,
+                    min_confidence: float = 0.5,
+                    progress_callback: Optional[Callable[[int, int], None]] = None,
+                    cancel_token: Optional[CancellationToken] = None) -> Dict:
+        """
+        Add word timestamps to a transcription written with segment output,
+        without decoding the audio again, and write its word-level SRT and JSON.
+
+        Args:
+            audio_path (str, optional): The transcribed audio; None when it had no audible sound
+            json_path (str): JSON written by process_media or process_video with segment output
+            output_dir (str): Directory for the word-level outputs
+            min_confidence (float): Minimum confidence threshold for words in the SRT
+
+        Returns:
+            Dict: word_count, srt_path and json_path of the word-level outputs
+        """
+        from word_alignment import align_segments
+
+        try:
+            with open(json_path, encoding="utf-8") as f:
+                data = json.load(f)
+            transcription = data["transcription"]
+            audio = self.load_audio(audio_path) if audio_path else np.zeros(0, dtype=np.float32)
+            align_segments(self.model, audio, transcription["segments"], transcription.get("language"),
+                           progress_callback=progress_callback, cancel_token=cancel_token)
+            data["output"] = "words"
+
+            os.makedirs(output_dir, exist_ok=True)
+            base_name = os.path.splitext(os.path.basename(json_path))[0]
+            srt_path = os.path.join(output_dir, f"{base_name}.words.srt")
+            aligned_json_path = os.path.join(output_dir, f"{base_name}.words.json")
+            self.generate_srt(transcription, srt_path, min_confidence)
+            with open(aligned_json_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+
+            return {
+                "word_count": sum(len(segment["words"]) for segment in transcription["segments"]),
+                "srt_path": srt_path,
+                "json_path": aligned_json_path,
+                "language": transcription.get("language")
             }
+        except JobCancelled:
+            raise
         except Exception as e:
-            raise RuntimeError(f"Media processing failed: {str(e)}")
\ No newline at end of file
+            raise RuntimeError(f"Word alignment failed: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class TranscriptionCache:
+    """
+    Content-addressed, size-bounded on-disk store of transcription results.
+
+    Keys hash the decoded 16 kHz PCM samples (not the container bytes, so a
+    re-muxed or re-encoded upload of the same audio still hits) together with
+    every parameter that changes the output. Results are JSON files; a small
+    SQLite index tracks sizes, recency and hit/miss counters so every worker
+    process shares one LRU.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir (str): Directory holding the entries and the index
+            max_bytes (int): Total size of stored entries before LRU eviction
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, "index.sqlite3")
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(audio: np.ndarray, **params) -> str:
+        """Hash the PCM samples together with the decode parameters."""
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._count("misses")
+            return None
+
+        with self._connection() as conn:
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._count("hits")
+        return value
+
+    def put(self, key: str, value: Dict) -> None:
+        """Store a result and evict least recently used entries above the size bound."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        # Atomic so concurrent readers never see a partial entry
+        os.replace(tmp_path, path)
+
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, size, last_access) VALUES (?, ?, ?)",
+                (key, os.path.getsize(path), time.time()),
+            )
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._connection() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for row in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._path(row["key"]))
+                except FileNotFoundError:
+                    pass
+                conn.execute("DELETE FROM entries WHERE key = ?", (row["key"],))
+                total -= row["size"]
+                self._count("evictions", conn=conn)
+
+    def _count(self, name: str, conn: Optional[sqlite3.Connection] = None) -> None:
+        statement = (
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1"
+        )
+        if conn is not None:
+            conn.execute(statement, (name,))
+            return
+        with self._connection() as conn:
+            conn.execute(statement, (name,))
+
+    def stats(self) -> Dict:
+        with self._connection() as conn:
+            counters = {row["name"]: row["value"] for row in conn.execute("SELECT * FROM counters")}
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+
+
+_cache: Optional[TranscriptionCache] = None
+
+
+def get_transcription_cache() -> Optional[TranscriptionCache]:
+    """Return the shared cache, or None when TRANSCRIPTION_CACHE_ENABLED=0."""
+    global _cache
+    if os.getenv("TRANSCRIPTION_CACHE_ENABLED", "1") == "0":
+        return None
+    if _cache is None:
+        _cache = TranscriptionCache(
+            cache_dir=os.getenv("TRANSCRIPTION_CACHE_DIR", os.path.join("cache", "transcriptions")),
+            max_bytes=int(float(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "2048")) * 1024 * 1024),
+        )
+    return _cache
+
+
+_window_cache: Optional[TranscriptionCache] = None
+
+
+def get_window_cache() -> Optional[TranscriptionCache]:
+    """Return the per-window result store, or None when WINDOW_CACHE_ENABLED=0."""
+    global _window_cache
+    if os.getenv("WINDOW_CACHE_ENABLED", "1") == "0":
+        return None
+    if _window_cache is None:
+        _window_cache = TranscriptionCache(
+            cache_dir=os.getenv("WINDOW_CACHE_DIR", os.path.join("cache", "windows")),
+            max_bytes=int(float(os.getenv("WINDOW_CACHE_MAX_MB", "1024")) * 1024 * 1024),
+        )
+    return _window_cache
+
+
+def memoized_window(cache: Optional[TranscriptionCache], audio_chunk: np.ndarray, params: Dict,
+                    transcribe_fn: Callable[[], Dict]) -> Dict:
+    """
+    Return the Whisper result for one window, decoding only if this exact
+    window audio was not seen before with the same parameters.
+
+    Results are stored with window-relative timestamps, so a window that
+    moved on the timeline of an edited file is re-stitched by the caller's
+    usual offset arithmetic.
+
+    Args:
+        cache (TranscriptionCache, optional): Window store; None always decodes
+        audio_chunk (np.ndarray): The window's 16 kHz samples
+        params (Dict): Everything besides the audio that changes the result
+        transcribe_fn (Callable): Runs Whisper on the window
+
+    Returns:
+        Dict: A fresh copy of the window result, safe to mutate
+    """
+    if cache is None:
+        return transcribe_fn()
+    key = cache.make_key(audio_chunk, **params)
+    result = cache.get(key)
+    if result is None:
+        result = transcribe_fn()
+        cache.put(key, result)
+        # Hand back a copy: callers shift timestamps in place
+        result = json.loads(json.dumps(result))
+    return result
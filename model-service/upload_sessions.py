@@ -0,0 +1,174 @@
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+from uuid import uuid4
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_DB_PATH = os.getenv("UPLOAD_SESSIONS_PATH", os.path.join("jobs", "uploads.sqlite3"))
+DEFAULT_PART_BYTES = int(float(os.getenv("UPLOAD_PART_MB", "8")) * 1024 * 1024)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    part_size INTEGER NOT NULL,
+    file_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parts (
+    upload_id TEXT NOT NULL,
+    part_number INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    received_at REAL NOT NULL,
+    PRIMARY KEY (upload_id, part_number)
+);
+"""
+
+
+class UploadSessionStore:
+    """
+    Bookkeeping for resumable uploads, shared by every HTTP worker.
+
+    Each session owns one preallocated file; parts are written in place at
+    part_number * part_size, so nothing is copied when the upload is
+    finalized. Only the received parts are tracked here.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create(self, kind: str, user_id: str, duration: int, filename: str, size: int,
+               upload_dir: str, part_size: int = DEFAULT_PART_BYTES) -> Dict:
+        """Open a session and preallocate its file at the announced size."""
+        upload_id = str(uuid4())
+        file_ext = filename.split(".")[-1].lower()
+        os.makedirs(upload_dir, exist_ok=True)
+        file_path = os.path.join(upload_dir, f"{upload_id}.{file_ext}")
+        with open(file_path, "wb") as f:
+            f.truncate(size)
+
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO uploads (id, kind, user_id, duration, filename, size, part_size, file_path, "
+                "status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'open', ?, ?)",
+                (upload_id, kind, user_id, duration, filename, size, part_size, file_path, now, now),
+            )
+        return self.get(upload_id)
+
+    def get(self, upload_id: str) -> Optional[Dict]:
+        """Return the session with its received parts, or None if unknown."""
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM uploads WHERE id = ?", (upload_id,)).fetchone()
+            if row is None:
+                return None
+            parts = conn.execute(
+                "SELECT part_number, size, sha256 FROM parts WHERE upload_id = ? ORDER BY part_number",
+                (upload_id,),
+            ).fetchall()
+        session = dict(row)
+        session["total_parts"] = self.total_parts(session)
+        session["parts"] = [dict(p) for p in parts]
+        session["bytes_received"] = sum(p["size"] for p in parts)
+        return session
+
+    @staticmethod
+    def total_parts(session: Dict) -> int:
+        return max(1, -(-session["size"] // session["part_size"]))
+
+    @staticmethod
+    def part_range(session: Dict, part_number: int) -> Tuple[int, int]:
+        """Return (offset, length) of a part in the assembled file."""
+        offset = part_number * session["part_size"]
+        return offset, min(session["part_size"], session["size"] - offset)
+
+    @staticmethod
+    def received_ranges(session: Dict) -> List[List[int]]:
+        """Merge the received parts into [start, end) byte ranges."""
+        ranges: List[List[int]] = []
+        for part in session["parts"]:
+            start = part["part_number"] * session["part_size"]
+            end = start + part["size"]
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return ranges
+
+    def missing_parts(self, session: Dict) -> List[int]:
+        received = {p["part_number"] for p in session["parts"]}
+        return [n for n in range(self.total_parts(session)) if n not in received]
+
+    def record_part(self, upload_id: str, part_number: int, size: int, sha256: str) -> None:
+        """Mark a part as received; a retried part replaces the earlier record."""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parts (upload_id, part_number, size, sha256, received_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (upload_id, part_number, size, sha256, now),
+            )
+            conn.execute("UPDATE uploads SET updated_at = ? WHERE id = ?", (now, upload_id))
+
+    def mark(self, upload_id: str, status: str, expected: Optional[str] = None) -> bool:
+        """Set the session status; with expected, only if it is currently that status."""
+        with self._connection() as conn:
+            query = "UPDATE uploads SET status = ?, updated_at = ? WHERE id = ?"
+            params: list = [status, time.time(), upload_id]
+            if expected is not None:
+                query += " AND status = ?"
+                params.append(expected)
+            return conn.execute(query, params).rowcount == 1
+
+    def delete(self, upload_id: str, remove_file: bool = True) -> None:
+        with self._connection() as conn:
+            row = conn.execute("SELECT file_path FROM uploads WHERE id = ?", (upload_id,)).fetchone()
+            conn.execute("DELETE FROM parts WHERE upload_id = ?", (upload_id,))
+            conn.execute("DELETE FROM uploads WHERE id = ?", (upload_id,))
+        if remove_file and row is not None and os.path.exists(row["file_path"]):
+            os.remove(row["file_path"])
+
+    def purge_stale(self, older_than: float) -> int:
+        """Drop sessions (and their partial files) idle for more than older_than seconds."""
+        cutoff = time.time() - older_than
+        with self._connection() as conn:
+            stale = [row["id"] for row in conn.execute(
+                "SELECT id FROM uploads WHERE updated_at < ?", (cutoff,)
+            )]
+        for upload_id in stale:
+            self.delete(upload_id)
+        return len(stale)
+
+
+_store: Optional[UploadSessionStore] = None
+
+
+def get_upload_sessions() -> UploadSessionStore:
+    """Return the process-wide upload session store."""
+    global _store
+    if _store is None:
+        _store = UploadSessionStore()
+    return _store
@@ -0,0 +1,132 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from audio_segmentation import FRAME_SECONDS, WINDOW_SECONDS, Window, frame_rms, silence_aligned_spans
+from media_io import SAMPLE_RATE
+
+# Opt-in: dropping non-speech changes which audio is decoded, so transcripts can differ from full decoding
+VAD_ENABLED = os.getenv("VAD_ENABLED", "0") == "1"
+# Audio whose loudest stretch stays below this level (dBFS) is not transcribed at all
+SILENCE_THRESHOLD_DB = float(os.getenv("SILENCE_THRESHOLD_DB", "-60"))
+
+# Frames below this level are never speech
+ABSOLUTE_FLOOR_DB = -55.0
+# Speech must clear the noise floor by this much...
+NOISE_MARGIN_DB = 10.0
+# ...unless that would also drop frames this far below the loud part of the file
+SPEECH_RANGE_DB = 25.0
+MIN_SPEECH_SECONDS = 0.2
+MIN_SILENCE_SECONDS = 0.3
+PAD_SECONDS = 0.2
+
+
+def is_near_silent(audio: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                   threshold_db: float = SILENCE_THRESHOLD_DB) -> bool:
+    """
+    Fast RMS scan: True when less than MIN_SPEECH_SECONDS of the audio is
+    louder than threshold_db, so isolated clicks do not count as sound.
+    """
+    if len(audio) == 0:
+        return True
+    loud_frames = np.count_nonzero(20 * np.log10(frame_rms(audio, sample_rate) + 1e-10) >= threshold_db)
+    return loud_frames * FRAME_SECONDS < MIN_SPEECH_SECONDS
+
+
+def detect_speech(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """
+    Energy-based voice activity detection.
+
+    The threshold adapts to the file: a frame is voiced if it clears the
+    noise floor (10th percentile level) by NOISE_MARGIN_DB, capped so that
+    nothing within SPEECH_RANGE_DB of the loud frames (90th percentile) is
+    dropped. Continuous speech therefore stays whole; only real silence and
+    near-silent beds are removed. Loud music is kept, which errs on the side
+    of transcribing too much rather than losing words.
+
+    Returns:
+        List[Tuple[int, int]]: (start_sample, end_sample) of speech regions
+    """
+    if len(audio) == 0:
+        return []
+    level_db = 20 * np.log10(frame_rms(audio, sample_rate) + 1e-10)
+    noise_floor, loud = np.percentile(level_db, [10, 90])
+    threshold = max(ABSOLUTE_FLOOR_DB, min(noise_floor + NOISE_MARGIN_DB, loud - SPEECH_RANGE_DB))
+    voiced = level_db > threshold
+
+    frame = int(FRAME_SECONDS * sample_rate)
+    regions: List[List[int]] = []
+    for index in np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))):
+        # Rising and falling edges alternate
+        if not regions or len(regions[-1]) == 2:
+            regions.append([index * frame])
+        else:
+            regions[-1].append(index * frame)
+
+    # Bridge short pauses, drop blips, then pad so word onsets and tails survive
+    merged: List[List[int]] = []
+    for start, end in regions:
+        if merged and start - merged[-1][1] < MIN_SILENCE_SECONDS * sample_rate:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    pad = int(PAD_SECONDS * sample_rate)
+    speech = []
+    for start, end in merged:
+        if end - start < MIN_SPEECH_SECONDS * sample_rate:
+            continue
+        start, end = max(0, start - pad), min(len(audio), end + pad)
+        if speech and start <= speech[-1][1]:
+            speech[-1] = (speech[-1][0], end)
+        else:
+            speech.append((start, end))
+    return speech
+
+
+def speech_ratio(regions: List[Tuple[int, int]], total_samples: int) -> float:
+    """Fraction of the file covered by speech regions."""
+    if total_samples == 0:
+        return 0.0
+    return round(sum(end - start for start, end in regions) / total_samples, 4)
+
+
+def pack_speech_windows(audio: np.ndarray, regions: List[Tuple[int, int]], window_seconds: float = WINDOW_SECONDS,
+                        sample_rate: int = SAMPLE_RATE) -> List[Window]:
+    """
+    Pack speech regions back to back into decode windows of at most
+    window_seconds. Regions longer than a window are cut at their quietest
+    points first, so no window boundary falls inside a word and windows
+    need no overlap.
+
+    Returns:
+        List[Window]: Windows whose to_timeline() maps back to the original file
+    """
+    limit = int(window_seconds * sample_rate)
+    pieces: List[Tuple[int, int]] = []
+    for start, end in regions:
+        if end - start <= limit:
+            pieces.append((start, end))
+            continue
+        for sub_start, sub_end in silence_aligned_spans(audio[start:end], window_seconds, sample_rate=sample_rate):
+            pieces.append((start + sub_start, start + sub_end))
+
+    windows = []
+    current: List[Tuple[int, int, int]] = []
+    filled = 0
+    for start, end in pieces:
+        if current and filled + (end - start) > limit:
+            windows.append(_build_window(audio, current, sample_rate))
+            current, filled = [], 0
+        current.append((filled, start, end - start))
+        filled += end - start
+    if current:
+        windows.append(_build_window(audio, current, sample_rate))
+    return windows
+
+
+def _build_window(audio: np.ndarray, pieces: List[Tuple[int, int, int]], sample_rate: int) -> Window:
+    if len(pieces) == 1:
+        _, start, length = pieces[0]
+        return Window(audio[start:start + length], pieces, sample_rate)
+    return Window(np.concatenate([audio[start:start + length] for _, start, length in pieces]), pieces, sample_rate)
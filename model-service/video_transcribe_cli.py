@@ -1,14 +1,25 @@
 import argparse
 import os
 from video_transcriber import VideoTranscriber
+from engines import ENGINES
+from profiles import OUTPUTS, PROFILES
+from inference_worker import configure_torch_threads
 from tqdm import tqdm
 
 def main():
     parser = argparse.ArgumentParser(description="Transcribe video files with word-level timestamps and confidence scores")
     parser.add_argument("input", help="Path to input video file or directory")
     parser.add_argument("--output-dir", "-o", default="output", help="Directory to save transcription outputs")
-    parser.add_argument("--model", "-m", default="turbo", choices=["tiny", "base", "small", "medium", "large","turbo"],
-                      help="Whisper model size to use")
+    parser.add_argument("--model", "-m", default=None, choices=["tiny", "base", "small", "medium", "large","turbo"],
+                      help="Whisper model size to use (default: the profile's model)")
+    parser.add_argument("--profile", "-p", default=None, choices=list(PROFILES),
+                      help="Decoding profile: fast, balanced, accurate or tiered (default: TRANSCRIBE_PROFILE or balanced)")
+    parser.add_argument("--output", default=None, choices=list(OUTPUTS),
+                      help="SRT granularity; segments skips word alignment (default: TRANSCRIBE_OUTPUT or words)")
+    parser.add_argument("--engine", "-e", default=None, choices=list(ENGINES),
+                      help="Transcription engine (default: TRANSCRIBE_ENGINE or whisper_timestamped)")
+    parser.add_argument("--threads", "-t", type=int, default=int(os.getenv("TORCH_NUM_THREADS", "0")),
+                      help="torch intra-op threads (default: TORCH_NUM_THREADS or torch's own choice)")
     parser.add_argument("--min-confidence", "-c", type=float, default=0.5,
                       help="Minimum confidence threshold for words in SRT output")
     parser.add_argument("--recursive", "-r", action="store_true",
@@ -16,8 +27,12 @@ def main():
     
     args = parser.parse_args()
     
+    if args.threads:
+        configure_torch_threads(args.threads)
+
     # Initialize transcriber
-    transcriber = VideoTranscriber(model_name=args.model)
+    transcriber = VideoTranscriber(model_name=args.model, engine=args.engine, profile=args.profile,
+                                    output=args.output)
     
     def process_file(file_path):
         try:
@@ -1,114 +1,63 @@
 import os
-import ffmpeg
-import whisper_timestamped as whisper_ts
-import torch
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Optional
 import json
+import itertools
 from datetime import datetime
+from model_registry import default_device
+from engines import load_engine
+from transcription_cache import get_transcription_cache, get_window_cache, memoized_window
+from media_io import load_media, write_wav
+from batched_inference import DEFAULT_BATCH_SIZE, iter_window_results
+from audio_segmentation import adaptive_windows
+from language_id import LANGUAGE_ID_WINDOWS, language_from_result
+from profiles import decode_options, get_profile, profile_key
+from escalation import escalate_segments
+from cancellation import CancellationToken, JobCancelled
+from vad import VAD_ENABLED, detect_speech, is_near_silent, pack_speech_windows, speech_ratio
 import numpy as np
-import cv2
-from moviepy.editor import VideoFileClip
-import tempfile
 
 class VideoTranscriber:
-    def __init__(self, model_name: str = "turbo"):
+    def __init__(self, model_name: Optional[str] = None, device: Optional[str] = None,
+                 batch_size: Optional[int] = None, vad: Optional[bool] = None,
+                 engine: Optional[str] = None, profile: Optional[str] = None,
+                 output: Optional[str] = None):
         """
         Initialize the video transcriber with a specified Whisper model.
         
         Args:
-            model_name (str): Name of the Whisper model to use (tiny, base, small, medium, large, turbo)
+            model_name (str, optional): Name of the Whisper model to use (tiny, base, small, medium, large, turbo);
+                defaults to the profile's model
+            device (str, optional): Device to run on; defaults to CUDA when available
+            batch_size (int, optional): Windows decoded per batched forward pass;
+                defaults to TRANSCRIBE_BATCH_SIZE, 1 decodes windows one by one
+            vad (bool, optional): Decode only detected speech; defaults to VAD_ENABLED
+            engine (str, optional): whisper_timestamped or faster_whisper; defaults to TRANSCRIBE_ENGINE
+            profile (str, optional): fast, balanced, accurate or tiered decoding; defaults to TRANSCRIBE_PROFILE
+            output (str, optional): words or segments (no word alignment); defaults to TRANSCRIBE_OUTPUT
         """
         try:
-            self.model = whisper_ts.load_model(model_name)
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model.to(self.device)
-            print(f"Model loaded successfully on {self.device}")
+            self.profile = get_profile(profile, output)
+            self.model_name = model_name or self.profile["model_name"]
+            self.device = device or default_device()
+            self.engine = load_engine(engine, self.model_name, self.device)
+            self.model = self.engine.model
+            # The larger model of a two-tier profile, loaded when a draft first needs it
+            self.escalation_engine = None
+            # Batched decoding works on the PyTorch model only
+            self.batch_size = (batch_size or DEFAULT_BATCH_SIZE) if self.engine.torch_model else 1
+            self.vad = VAD_ENABLED if vad is None else vad
+            self.cache = get_transcription_cache()
+            self.window_cache = get_window_cache()
+            print(f"Model ready on {self.device}")
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {str(e)}")
 
-    def extract_audio(self, video_path: str, audio_path: str, sample_rate: int = 16000) -> Dict:
-        """
-        Extract audio from video file with enhanced error handling and metadata.
-        If video has no audio, creates a silent audio track.
-        
-        Args:
-            video_path (str): Path to input video file
-            audio_path (str): Path to save extracted audio
-            sample_rate (int): Target sample rate for audio
-            
-        Returns:
-            Dict: Video metadata including duration, fps, and resolution
-        """
-        try:
-            if not os.path.exists(video_path):
-                raise FileNotFoundError(f"Video file not found: {video_path}")
-
-            # Get video metadata using moviepy
-            video = VideoFileClip(video_path)
-            metadata = {
-                "duration": video.duration,
-                "fps": video.fps,
-                "size": video.size,
-                "audio_fps": video.audio.fps if video.audio else None
-            }
-            video.close()
-
-            # Check if video has audio
-            probe = ffmpeg.probe(video_path)
-            has_audio = any(stream['codec_type'] == 'audio' for stream in probe['streams'])
-            
-            # Ensure the output directory exists
-            os.makedirs(os.path.dirname(audio_path), exist_ok=True)
-
-            if not has_audio:
-                # Create silent audio track with the same duration as the video
-                duration = float(probe['format']['duration'])
-                (
-                    ffmpeg
-                    .input('anullsrc', t=duration, f='lavfi')
-                    .output(
-                        audio_path,
-                        ac=1,  # mono
-                        ar=sample_rate,  # sample rate
-                        acodec='pcm_s16le',  # high quality PCM
-                        loglevel='error'
-                    )
-                    .run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
-                )
-                print(f"Created silent audio track for video without audio")
-            else:
-                # Extract audio using ffmpeg with high quality settings
-                try:
-                    stream = (
-                        ffmpeg
-                        .input(video_path)
-                        .output(
-                            audio_path,
-                            ac=1,  # mono
-                            ar=sample_rate,  # sample rate
-                            acodec='pcm_s16le',  # high quality PCM
-                            loglevel='error'
-                        )
-                    )
-                    
-                    # Run the command
-                    stream.run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
-                    
-                except ffmpeg.Error as e:
-                    raise RuntimeError(f"Failed to extract audio: {str(e)}")
-
-            # Verify the output file exists and has content
-            if not os.path.exists(audio_path):
-                raise RuntimeError(f"Output file was not created: {audio_path}")
-            if os.path.getsize(audio_path) == 0:
-                raise RuntimeError(f"Output file is empty: {audio_path}")
-                
-            return metadata
-
-        except Exception as e:
-            raise RuntimeError(f"Error during audio extraction: {str(e)}")
-
-    def process_video(self, video_path: str, output_dir: str, min_confidence: float = 0.5) -> Dict:
+    def process_video(self, video_path: str, output_dir: str, min_confidence: float = 0.5,
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      segment_callback: Optional[Callable[[List[Dict], int, int], None]] = None,
+                      cancel_token: Optional[CancellationToken] = None) -> Dict:
+        # Files written here; removed again if the job fails or is cancelled part way
+        written = []
         try:
             print("Step 1: Checking video file existence")
             # First try with the prefix
@@ -131,150 +80,316 @@ class VideoTranscriber:
             os.makedirs(output_dir, exist_ok=True)
             base_name = os.path.splitext(os.path.basename(full_path))[0]
 
-            print("Step 3: Creating temporary directory")
-            with tempfile.TemporaryDirectory() as temp_dir:
-                print("Step 4: Extracting audio")
-                temp_audio = os.path.join(temp_dir, "temp_audio.wav")
-                try:
-                    # Use full_path instead of video_path here
-                    metadata = self.extract_audio(full_path, temp_audio)
-                    print("Audio extraction completed successfully")
-                except Exception as e:
-                    print(f"Audio extraction failed: {str(e)}")
-                    raise
-
-                print("Step 5: Loading audio file")
-                try:
-                    audio = whisper_ts.load_audio(temp_audio)
-                    print("Audio loaded successfully")
-                except Exception as e:
-                    print(f"Audio loading failed: {str(e)}")
-                    raise
-
-                print("Step 6: Transcribing audio")
-                try:
-                    # Process audio in smaller chunks with improved overlap handling
-                    chunk_duration = 30  # reduced from 15 to 10 seconds for better control
-                    overlap_duration = 1  # reduced overlap to minimize duplicates
-                    sample_rate = 16000
-                    all_segments = []
-                    last_text = None
-                    duplicate_threshold = 0.6  # reduced threshold for stricter duplicate detection
-                    
-                    # Add text cleaning function
-                    def clean_text(text: str) -> str:
-                        # Remove repeated words
-                        words = text.split()
-                        cleaned_words = []
-                        for i, word in enumerate(words):
-                            if i == 0 or word != words[i-1]:
-                                cleaned_words.append(word)
-                        return ' '.join(cleaned_words)
-                    
-                    for i in range(0, len(audio), int((chunk_duration - overlap_duration) * sample_rate)):
-                        start_sample = i
-                        end_sample = min(i + chunk_duration * sample_rate, len(audio))
-                        audio_chunk = audio[start_sample:end_sample]
-                        
-                        # Use the same language for all chunks once detected
-                        if i == 0:
-                            chunk_result = whisper_ts.transcribe(self.model, audio_chunk)
-                            detected_language = chunk_result["language"]
-                        else:
-                            chunk_result = whisper_ts.transcribe(self.model, audio_chunk, language=detected_language)
-                        
-                        # Process segments and remove duplicates with improved cleaning
-                        for segment in chunk_result["segments"]:
-                            # Adjust timestamps
-                            segment_start = segment["start"] + (i / sample_rate)
-                            segment_end = segment["end"] + (i / sample_rate)
-                            
-                            # Clean and check the text
-                            current_text = clean_text(" ".join(w["text"] for w in segment["words"]))
-                            
-                            # Skip if this is a duplicate or contains excessive repetition
-                            if last_text and (self._text_similarity(current_text, last_text) > duplicate_threshold 
-                                             or len(set(current_text.split())) < len(current_text.split()) / 2):
-                                continue
-                            
-                            # Update segment timestamps and words
-                            segment["start"] = segment_start
-                            segment["end"] = segment_end
-                            
-                            # Clean up words to remove immediate repetitions
-                            cleaned_words = []
-                            last_word = None
-                            for word in segment["words"]:
-                                if not last_word or word["text"] != last_word["text"]:
-                                    word["start"] += (i / sample_rate)
-                                    word["end"] += (i / sample_rate)
-                                    cleaned_words.append(word)
-                                    last_word = word
-                            
-                            segment["words"] = cleaned_words
-                            all_segments.append(segment)
-                            last_text = current_text
-                    
-                    result = {
-                        "segments": all_segments,
-                        "language": detected_language,
-                        "language_probability": chunk_result.get("language_probability", 0.0)
-                    }
-                    print("Transcription completed successfully")
-                except Exception as e:
-                    print(f"Transcription failed: {str(e)}")
-                    raise
-
-                # Calculate segment statistics
-                segments = result["segments"]
-                total_duration = metadata["duration"]
-                total_words = sum(len(segment["words"]) for segment in segments)
-                avg_words_per_second = total_words / total_duration if total_duration > 0 else 0
-
-                # Generate outputs
-                srt_path = os.path.join(output_dir, f"{base_name}.srt")
-                json_path = os.path.join(output_dir, f"{base_name}.json")
-
-                # Generate SRT with confidence scores
-                self.generate_srt(result, srt_path, min_confidence)
-
-                # Save detailed results with video metadata
-                output_data = {
-                    "video_metadata": metadata,
-                    "transcription_stats": {
-                        "total_duration": total_duration,
-                        "total_words": total_words,
-                        "avg_words_per_second": avg_words_per_second,
-                        "language": result["language"],
-                        "language_confidence": result.get("language_probability", 0.0)
-                    },
-                    "transcription": result,
-                    "processing_time": datetime.now().isoformat()
-                }
-
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(output_data, f, indent=2, ensure_ascii=False)
-
-                print("\nVideo Processing Statistics:")
-                print(f"Duration: {total_duration:.2f} seconds")
+            print("Step 3: Probing and decoding audio")
+            try:
+                # One ffprobe call for metadata, one ffmpeg pipe into a 16 kHz float32 buffer
+                audio, metadata = load_media(full_path)
+                print("Audio decoded successfully")
+            except Exception as e:
+                print(f"Audio decoding failed: {str(e)}")
+                raise
+            if cancel_token:
+                cancel_token.check()
+
+            # Write the WAV that is published with the transcript from the same buffer.
+            # Videos without audible sound get no WAV; transcribe_audio() returns empty for them
+            near_silent = not metadata["has_audio"] or is_near_silent(audio)
+            if near_silent:
+                print("No audible audio track; skipping audio extraction")
+                audio_path = None
+            else:
+                audio_path = write_wav(audio, os.path.join(output_dir, f"{base_name}.wav"))
+                written.append(audio_path)
+
+            print("Step 4: Transcribing audio")
+            try:
+                result = self.transcribe_audio(audio, progress_callback=progress_callback,
+                                               segment_callback=segment_callback, cancel_token=cancel_token,
+                                               near_silent=near_silent)
+                print("Transcription completed successfully")
+            except Exception as e:
+                print(f"Transcription failed: {str(e)}")
+                raise
+
+            # Calculate segment statistics
+            segments = result["segments"]
+            total_duration = metadata["duration"]
+            total_words = sum(len(segment["words"]) for segment in segments)
+            avg_words_per_second = total_words / total_duration if total_duration > 0 else 0
+
+            # Generate outputs
+            srt_path = os.path.join(output_dir, f"{base_name}.srt")
+            json_path = os.path.join(output_dir, f"{base_name}.json")
+            written += [srt_path, json_path]
+
+            # Generate SRT with confidence scores
+            self.generate_srt(result, srt_path, min_confidence)
+
+            transcription = result
+            if self.profile["output"] == "segments":
+                # Segment-level JSON; the tokens stay so words can be aligned later
+                transcription = dict(result, segments=[
+                    {key: value for key, value in segment.items() if key != "words"}
+                    for segment in segments
+                ])
+
+            # Save detailed results with video metadata
+            output_data = {
+                "video_metadata": metadata,
+                "transcription_stats": {
+                    "total_duration": total_duration,
+                    "total_words": total_words,
+                    "avg_words_per_second": avg_words_per_second,
+                    "language": result["language"],
+                    "language_confidence": result.get("language_probability", 0.0),
+                    "speech_ratio": result.get("speech_ratio"),
+                    "escalated_ratio": result.get("escalated_ratio"),
+                    "profile": self.profile["name"],
+                    "model": self.model_name,
+                    "output": self.profile["output"]
+                },
+                "transcription": transcription,
+                "processing_time": datetime.now().isoformat()
+            }
+
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(output_data, f, indent=2, ensure_ascii=False)
+
+            print("\nVideo Processing Statistics:")
+            print(f"Duration: {total_duration:.2f} seconds")
+            if metadata["size"]:
                 print(f"Resolution: {metadata['size'][0]}x{metadata['size'][1]}")
-                print(f"FPS: {metadata['fps']}")
-                print(f"Total words: {total_words}")
-                print(f"Average words per second: {avg_words_per_second:.2f}")
+            print(f"FPS: {metadata['fps']}")
+            print(f"Total words: {total_words}")
+            print(f"Average words per second: {avg_words_per_second:.2f}")
 
-                return {
-                    "srt_path": srt_path,
-                    "json_path": json_path,
-                    "video_metadata": metadata,
-                    "transcription_stats": output_data["transcription_stats"]
-                }
+            return {
+                "srt_path": srt_path,
+                "json_path": json_path,
+                "audio_path": audio_path,
+                "video_metadata": metadata,
+                "transcription_stats": output_data["transcription_stats"]
+            }
 
         except Exception as e:
+            # A failed or cancelled job leaves no partial outputs behind
+            for path in written:
+                if os.path.exists(path):
+                    os.remove(path)
+            if isinstance(e, JobCancelled):
+                raise
             print(f"\nDetailed error information:")
             print(f"Error type: {type(e).__name__}")
             print(f"Error message: {str(e)}")
             raise RuntimeError(f"Video processing failed: {str(e)}")
 
+    def transcribe_audio(self, audio: np.ndarray,
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         use_cache: bool = True,
+                         segment_callback: Optional[Callable[[List[Dict], int, int], None]] = None,
+                         cancel_token: Optional[CancellationToken] = None,
+                         near_silent: Optional[bool] = None) -> Dict:
+        """
+        Transcribe 16 kHz mono audio in windows of detected speech (or silence-aligned
+        windows with VAD off) and drop duplicated segments.
+
+        Args:
+            audio (np.ndarray): Audio samples at 16 kHz
+            progress_callback (Callable, optional): Called with (chunks_done, chunks_total) after each window
+            use_cache (bool): Look up and store the result in the transcription cache
+            segment_callback (Callable, optional): Called with (segments, samples_done,
+                samples_total) as soon as each window's segments are cleaned; a
+                tiered profile's escalation calls it again with replaces=(start, end)
+                of the draft segments each re-decoded region supersedes
+            cancel_token (CancellationToken, optional): Checked between stages and
+                after each window; JobCancelled is raised once it has fired
+            near_silent (bool, optional): is_near_silent of the audio when the caller
+                already checked it; None checks here
+
+        Returns:
+            Dict: segments, language, language_probability, speech_ratio and
+                escalated_ratio (None unless the profile has two tiers)
+        """
+        # Nothing audible: answer right away without touching the model
+        if near_silent is None:
+            near_silent = is_near_silent(audio)
+        if near_silent:
+            if progress_callback:
+                progress_callback(1, 1)
+            return {"segments": [], "language": None, "language_probability": 0.0, "speech_ratio": 0.0}
+
+        # Windows end in pauses (see audio_segmentation), so they need no overlap
+        chunk_duration = 30
+        overlap_duration = 0
+        sample_rate = 16000
+        all_segments = []
+        last_text = None
+        duplicate_threshold = 0.6  # reduced threshold for stricter duplicate detection
+
+        # Identical audio with identical decode parameters gives an identical result
+        cache = self.cache if use_cache else None
+        if cache:
+            cache_key = cache.make_key(
+                audio,
+                pipeline="video_transcriber",
+                model=self.engine.cache_name,
+                chunk_duration=chunk_duration,
+                overlap_duration=overlap_duration,
+                duplicate_threshold=duplicate_threshold,
+                # Batched decoding is not bit-identical to the sequential path
+                **({"batched": True} if self.batch_size > 1 else {}),
+                **({"vad": True} if self.vad else {}),
+                # More than one voting window may pick another language
+                **({"language_id_windows": LANGUAGE_ID_WINDOWS} if LANGUAGE_ID_WINDOWS != 1 else {}),
+                **profile_key(self.profile),
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print("Transcription cache hit")
+                if progress_callback:
+                    progress_callback(1, 1)
+                if segment_callback:
+                    segment_callback(cached["segments"], len(audio), len(audio))
+                return cached
+
+        # Add text cleaning function
+        def clean_text(text: str) -> str:
+            # Remove repeated words
+            words = text.split()
+            cleaned_words = []
+            for i, word in enumerate(words):
+                if i == 0 or word != words[i-1]:
+                    cleaned_words.append(word)
+            return ' '.join(cleaned_words)
+
+        window_cache = self.window_cache if use_cache else None
+
+        # Only speech is decoded; silence, intros and near-silent beds are skipped
+        speech_regions = detect_speech(audio) if self.vad else [(0, len(audio))]
+        if self.vad:
+            windows = pack_speech_windows(audio, speech_regions, chunk_duration)
+        else:
+            windows = adaptive_windows(audio, chunk_duration)
+
+        if cancel_token:
+            cancel_token.check()
+
+        # The language is identified once and later windows reuse it
+        detected_language = None
+        language_probability = 0.0
+
+        def window_params(chunk_index: int) -> Dict:
+            return {"model": self.engine.cache_name, "language": detected_language, **profile_key(self.profile)}
+
+        def transcribe_window(chunk_index: int) -> Dict:
+            return self.engine.transcribe(windows[chunk_index].audio, language=detected_language,
+                                          condition_on_previous_text=self.profile["condition_on_previous_text"],
+                                          **decode_options(self.profile))
+
+        # Windows whose audio did not change since an earlier upload are not decoded again;
+        # with batch_size > 1 the rest are decoded K at a time
+        window_results = iter(())
+        first = 0
+        if windows:
+            if LANGUAGE_ID_WINDOWS > 1:
+                # Encoder plus one language-token step per voting window, no transcription.
+                # A single vote is window 0's alone, so below its decode detects from the
+                # same encoder pass instead of running the encoder on it twice
+                detected_language, language_probability = self.engine.identify_language(
+                    [window.audio for window in windows], cache=window_cache
+                )
+            else:
+                # No separate pass: the first window is decoded with detection and its result kept
+                first_result = memoized_window(window_cache, windows[0].audio, window_params(0),
+                                               lambda: transcribe_window(0))
+                detected_language, language_probability = language_from_result(first_result)
+                window_results = [(0, first_result)]
+                first = 1
+            window_results = itertools.chain(
+                window_results,
+                ((index + first, result) for index, result in iter_window_results(
+                    self.model, [window.audio for window in windows[first:]], lambda index: window_params(index + first),
+                    lambda index: transcribe_window(index + first),
+                    cache=window_cache,
+                    # The batched decoder is greedy; beam-search profiles decode window by window
+                    batch_size=self.batch_size if self.profile["beam_size"] is None else 1,
+                    word_timestamps=self.profile["word_timestamps"],
+                )),
+            )
+        # Progress in samples, since windows of packed speech differ in length
+        samples_done = 0
+        samples_total = sum(len(window.audio) for window in windows)
+        for chunk_index, chunk_result in window_results:
+            window = windows[chunk_index]
+            stitched = len(all_segments)
+
+            # Process segments and remove duplicates with improved cleaning
+            for segment in chunk_result["segments"]:
+                # Map window-relative timestamps back onto the original timeline
+                segment_start = window.to_timeline(segment["start"])
+                segment_end = window.to_timeline(segment["end"], is_end=True)
+
+                # Clean and check the text
+                current_text = clean_text(" ".join(w["text"] for w in segment["words"]))
+
+                # Skip if this is a duplicate or contains excessive repetition
+                if last_text and (self._text_similarity(current_text, last_text) > duplicate_threshold 
+                                 or len(set(current_text.split())) < len(current_text.split()) / 2):
+                    continue
+
+                # Update segment timestamps and words
+                segment["start"] = segment_start
+                segment["end"] = segment_end
+
+                # Clean up words to remove immediate repetitions
+                cleaned_words = []
+                last_word = None
+                for word in segment["words"]:
+                    if not last_word or word["text"] != last_word["text"]:
+                        word["start"] = window.to_timeline(word["start"])
+                        word["end"] = window.to_timeline(word["end"], is_end=True)
+                        cleaned_words.append(word)
+                        last_word = word
+
+                segment["words"] = cleaned_words
+                all_segments.append(segment)
+                last_text = current_text
+
+            samples_done += len(window.audio)
+            if segment_callback:
+                segment_callback(all_segments[stitched:], samples_done, samples_total)
+            if progress_callback:
+                progress_callback(chunk_index + 1, len(windows))
+            # Stops before the next window is decoded
+            if cancel_token:
+                cancel_token.check()
+
+        # Two-tier profiles decode the draft's low-confidence stretches again with the larger model
+        escalated_ratio = None
+        if self.profile.get("escalate_model"):
+            if self.escalation_engine is None:
+                self.escalation_engine = load_engine(self.engine.name, self.profile["escalate_model"], self.device)
+            all_segments, escalated_seconds = escalate_segments(
+                self.escalation_engine, audio, all_segments, detected_language, self.profile, window_cache,
+                cancel_token=cancel_token,
+                # Streamed draft segments are superseded region by region
+                region_callback=(lambda segments, replaces: segment_callback(
+                    segments, len(audio), len(audio), replaces=replaces)) if segment_callback else None
+            )
+            escalated_ratio = round(escalated_seconds * sample_rate / len(audio), 4)
+            print(f"Re-decoded {escalated_ratio:.1%} of the audio with {self.profile['escalate_model']}")
+
+        result = {
+            "segments": all_segments,
+            "language": detected_language,
+            "language_probability": language_probability,
+            "speech_ratio": speech_ratio(speech_regions, len(audio)),
+            "escalated_ratio": escalated_ratio
+        }
+        if cache:
+            cache.put(cache_key, result)
+        return result
+
     def generate_srt(self, transcription: Dict, output_path: str, min_confidence: float = 0.5) -> None:
         """
         Generate SRT subtitle file from transcription results with confidence scores.
@@ -297,6 +412,14 @@ class VideoTranscriber:
             entry_num = 1
 
             for segment in transcription["segments"]:
+                if not self.profile["word_timestamps"]:
+                    # One cue per decoded segment: unaligned words only carry the segment's
+                    # exp(avg_logprob), which is no word confidence to filter by
+                    srt_entries.append(f"{entry_num}\n{format_time(segment['start'])} --> "
+                                       f"{format_time(segment['end'])}\n{segment['text'].strip()}\n\n")
+                    entry_num += 1
+                    continue
+
                 words = [w for w in segment["words"] if w["confidence"] >= min_confidence]
                 if not words:
                     continue
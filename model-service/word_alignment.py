@@ -0,0 +1,117 @@
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+from whisper.audio import HOP_LENGTH, N_SAMPLES, SAMPLE_RATE
+from whisper.timing import add_word_timestamps
+from whisper.tokenizer import get_tokenizer
+
+from batched_inference import batched_log_mel
+from cancellation import CancellationToken
+from engines import unaligned_words
+
+# The decoder attends to one 30 s window at a time
+ALIGN_SECONDS = N_SAMPLES / SAMPLE_RATE
+
+
+def _text_tokens(segment: Dict, eot: int) -> int:
+    # Timestamp and special tokens are dropped before alignment
+    return sum(1 for token in segment.get("tokens") or [] if token < eot)
+
+
+def _group_segments(segments: List[Dict], max_tokens: int, eot: int) -> List[List[Dict]]:
+    """
+    Consecutive segments grouped so that every group fits in one window,
+    both in duration and in the decoder's text context of max_tokens.
+    """
+    groups: List[List[Dict]] = []
+    group_tokens = 0
+    for segment in segments:
+        tokens = _text_tokens(segment, eot)
+        if groups and segment["end"] - groups[-1][0]["start"] <= ALIGN_SECONDS \
+                and group_tokens + tokens <= max_tokens:
+            groups[-1].append(segment)
+            group_tokens += tokens
+        else:
+            groups.append([segment])
+            group_tokens = tokens
+    return groups
+
+
+def align_segments(model, audio: np.ndarray, segments: List[Dict], language: Optional[str],
+                   progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_token: Optional[CancellationToken] = None) -> List[Dict]:
+    """
+    Add aligned words to segments that were decoded without them.
+
+    Nothing is decoded again: the tokens stored with each segment are
+    forced through the decoder, one forward pass per window of segments,
+    and words are placed by DTW over the cross-attention weights, as
+    whisper does after decoding.
+
+    Args:
+        model: Loaded PyTorch Whisper model
+        audio (np.ndarray): The transcribed audio at 16 kHz
+        segments (List[Dict]): Segments on the audio's timeline with their tokens
+        language (str, optional): Language the segments were decoded in
+        cancel_token (CancellationToken, optional): Checked before each window is aligned
+
+    Returns:
+        List[Dict]: The same segments, updated in place, with words carrying
+            text, start, end and confidence. A segment longer than one window,
+            stored without tokens, or in a group that fails to align keeps
+            words at its own times.
+    """
+    tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                              language=language, task="transcribe")
+    # The forced sequence is the SOT prompt, the text tokens, <|notimestamps|> and <|endoftext|>
+    max_tokens = model.dims.n_text_ctx - len(tokenizer.sot_sequence) - 2
+    groups = _group_segments(segments, max_tokens, tokenizer.eot)
+    for index, group in enumerate(groups):
+        if cancel_token:
+            cancel_token.check()
+        offset = group[0]["start"]
+        window = audio[int(offset * SAMPLE_RATE):int(offset * SAMPLE_RATE) + N_SAMPLES]
+        window_segments = [
+            {"seek": 0, "start": s["start"] - offset, "end": s["end"] - offset, "tokens": s.get("tokens") or []}
+            for s in group
+        ]
+        if len(window) >= HOP_LENGTH and window_segments[-1]["end"] <= ALIGN_SECONDS \
+                and any(s["tokens"] for s in window_segments):
+            try:
+                with torch.inference_mode():
+                    add_word_timestamps(
+                        segments=window_segments,
+                        model=model,
+                        tokenizer=tokenizer,
+                        mel=batched_log_mel([window], model.dims.n_mels, model.device)[0],
+                        num_frames=len(window) // HOP_LENGTH,
+                        last_speech_timestamp=0.0,
+                    )
+            except Exception as e:
+                # e.g. a single segment with more tokens than the text context; the rest of the file still aligns
+                print(f"Word alignment failed for segments at {offset:.2f}s, keeping segment times: {e}")
+                for aligned in window_segments:
+                    aligned.pop("words", None)
+
+        for segment, aligned in zip(group, window_segments):
+            words = [
+                {
+                    "text": w["word"].strip(),
+                    "start": round(w["start"] + offset, 2),
+                    "end": round(w["end"] + offset, 2),
+                    "confidence": round(float(w["probability"]), 3),
+                }
+                for w in aligned.get("words", [])
+                if w["word"].strip()
+            ]
+            if words:
+                segment["confidence"] = round(float(np.mean([w["confidence"] for w in words])), 3)
+            else:
+                words = unaligned_words(segment["text"], segment["start"], segment["end"],
+                                        segment.get("confidence", 0.0))
+            segment["words"] = words
+
+        if progress_callback:
+            progress_callback(index + 1, len(groups))
+    return segments
@@ -1,106 +1,173 @@
 import torch
-from transformers import Wav2Vec2FeatureExtractor, WavLMForSequenceClassification
-import librosa
+from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
 import numpy as np
 import ffmpeg
-import os
 import argparse
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+
+MODEL_ID = "facebook/mms-lid-256"
+SAMPLE_RATE = 16000
+
+# mms-lid labels are ISO 639-3; Whisper's language= argument takes its own (mostly ISO 639-1) codes
+WHISPER_LANGUAGE_CODES = {
+    "eng": "en", "cmn": "zh", "zho": "zh", "deu": "de", "spa": "es", "rus": "ru", "kor": "ko",
+    "fra": "fr", "jpn": "ja", "por": "pt", "tur": "tr", "pol": "pl", "cat": "ca", "nld": "nl",
+    "ara": "ar", "arb": "ar", "swe": "sv", "ita": "it", "ind": "id", "hin": "hi", "fin": "fi",
+    "vie": "vi", "heb": "he", "ukr": "uk", "ell": "el", "msa": "ms", "zlm": "ms", "zsm": "ms",
+    "ces": "cs", "ron": "ro", "dan": "da", "hun": "hu", "tam": "ta", "nor": "no", "nob": "no",
+    "tha": "th", "urd": "ur", "hrv": "hr", "bul": "bg", "lit": "lt", "lat": "la", "mri": "mi",
+    "mal": "ml", "cym": "cy", "slk": "sk", "tel": "te", "fas": "fa", "pes": "fa", "lav": "lv",
+    "lvs": "lv", "ben": "bn", "srp": "sr", "aze": "az", "azj": "az", "slv": "sl", "kan": "kn",
+    "est": "et", "ekk": "et", "mkd": "mk", "bre": "br", "eus": "eu", "isl": "is", "hye": "hy",
+    "nep": "ne", "npi": "ne", "mon": "mn", "khk": "mn", "bos": "bs", "kaz": "kk", "sqi": "sq",
+    "als": "sq", "swa": "sw", "swh": "sw", "glg": "gl", "mar": "mr", "pan": "pa", "sin": "si",
+    "khm": "km", "sna": "sn", "yor": "yo", "som": "so", "afr": "af", "oci": "oc", "kat": "ka",
+    "bel": "be", "tgk": "tg", "snd": "sd", "guj": "gu", "amh": "am", "yid": "yi", "ydd": "yi",
+    "lao": "lo", "uzb": "uz", "uzn": "uz", "fao": "fo", "hat": "ht", "pus": "ps", "pbt": "ps",
+    "tuk": "tk", "nno": "nn", "mlt": "mt", "san": "sa", "ltz": "lb", "mya": "my", "bod": "bo",
+    "tgl": "tl", "mlg": "mg", "plt": "mg", "asm": "as", "tat": "tt", "haw": "haw", "lin": "ln",
+    "hau": "ha", "bak": "ba", "jav": "jw", "sun": "su", "yue": "yue",
+}
+
+# Loaded once per (model, device) and shared by every LanguageDetector
+_loaded_models: Dict[Tuple[str, str], Tuple[Wav2Vec2ForSequenceClassification, Wav2Vec2FeatureExtractor]] = {}
+
+
+def to_whisper_code(label: str) -> Optional[str]:
+    """Whisper language code for an mms-lid label, or None if Whisper does not know the language."""
+    return WHISPER_LANGUAGE_CODES.get(label)
+
 
 class LanguageDetector:
-    def __init__(self):
-        """Initialize the language detector with facebook/mms-lid-256 model."""
+    def __init__(self, device: Optional[str] = None, slice_seconds: float = 8.0,
+                 max_duration: float = 30.0, confidence_threshold: float = 0.9):
+        """
+        Initialize the language detector with facebook/mms-lid-256 model.
+
+        Args:
+            device (str, optional): Device to run on; defaults to CUDA when available
+            slice_seconds (float): Length of the first, cheap slice that is scored
+            max_duration (float): Length scored when the first slice is not conclusive
+            confidence_threshold (float): Softmax confidence that ends scoring after the first slice
+        """
         try:
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model = WavLMForSequenceClassification.from_pretrained("facebook/mms-lid-256")
-            self.feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained("facebook/mms-lid-256")
-            self.model.to(self.device)
-            print(f"Model loaded successfully on {self.device}")
+            self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+            self.slice_seconds = slice_seconds
+            self.max_duration = max_duration
+            self.confidence_threshold = confidence_threshold
+            key = (MODEL_ID, self.device)
+            if key not in _loaded_models:
+                model = Wav2Vec2ForSequenceClassification.from_pretrained(MODEL_ID).to(self.device).eval()
+                _loaded_models[key] = (model, Wav2Vec2FeatureExtractor.from_pretrained(MODEL_ID))
+                print(f"Model loaded successfully on {self.device}")
+            self.model, self.feature_extractor = _loaded_models[key]
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {str(e)}")
 
-    def extract_audio(self, video_path: str, audio_path: str) -> None:
-        """Extract audio from video file."""
+    def load_audio(self, input_path: str, max_duration: Optional[float] = None) -> np.ndarray:
+        """Decode the first max_duration seconds of an audio or video file straight into memory."""
         try:
-            (ffmpeg
-             .input(video_path)
-             .output(audio_path, acodec='pcm_s16le', ac=1, ar='16000')
-             .overwrite_output()
-             .run(capture_stdout=True, capture_stderr=True))
+            out, _ = (
+                ffmpeg
+                .input(input_path, t=max_duration or self.max_duration)
+                .output('pipe:', format='f32le', acodec='pcm_f32le', ac=1, ar=SAMPLE_RATE)
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+            return np.frombuffer(out, np.float32)
         except ffmpeg.Error as e:
-            raise RuntimeError(f"Failed to extract audio: {e.stderr.decode()}")
+            raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}")
+
+    def score(self, audios: List[np.ndarray]) -> List[Dict[str, float]]:
+        """Language probabilities for several clips in one padded forward pass."""
+        inputs = self.feature_extractor(
+            list(audios),
+            sampling_rate=SAMPLE_RATE,
+            padding=True,
+            return_attention_mask=True,
+            return_tensors="pt"
+        ).to(self.device)
+
+        with torch.inference_mode():
+            probabilities = torch.softmax(self.model(**inputs).logits, dim=-1).cpu()
+
+        labels = self.model.config.id2label
+        return [{labels[i]: p for i, p in enumerate(row.tolist())} for row in probabilities]
+
+    def detect_languages(self, audios: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """
+        Detect the language of several clips.
 
-    def load_audio(self, audio_path: str, max_duration: int = 30) -> np.ndarray:
-        """Load audio file and return samples."""
+        Every clip is first scored on a short slice; only clips whose best
+        language stays below confidence_threshold are scored again on up to
+        max_duration seconds, together in one more batch.
+        """
         try:
-            # Load first 30 seconds (or less) of audio at 16kHz
-            audio, sr = librosa.load(audio_path, sr=16000, duration=max_duration)
-            return audio
+            short = int(self.slice_seconds * SAMPLE_RATE)
+            full = int(self.max_duration * SAMPLE_RATE)
+            results: List[Optional[Tuple[str, float]]] = [None] * len(audios)
+            pending = [i for i, audio in enumerate(audios) if len(audio)]
+
+            for length in (short, full):
+                if not pending:
+                    break
+                for i, probabilities in zip(pending, self.score([audios[i][:length] for i in pending])):
+                    language = max(probabilities, key=probabilities.get)
+                    results[i] = (language, probabilities[language])
+                # Clips no longer than the slice were already scored in full
+                pending = [i for i in pending
+                           if results[i][1] < self.confidence_threshold and len(audios[i]) > length]
+
+            return [result or ("und", 0.0) for result in results]
         except Exception as e:
-            raise RuntimeError(f"Failed to load audio: {str(e)}")
+            raise RuntimeError(f"Language detection failed: {str(e)}")
 
     def detect_language(self, audio: np.ndarray) -> Tuple[str, float]:
         """Detect language from audio samples."""
+        return self.detect_languages([audio])[0]
+
+    def whisper_language(self, audio: np.ndarray, min_confidence: float = 0.5) -> Optional[str]:
+        """
+        Cheap pre-pass for Whisper: the code to pass as language=, or None to
+        let Whisper detect it when this detector is unsure.
+        """
+        language, confidence = self.detect_language(audio)
+        return to_whisper_code(language) if confidence >= min_confidence else None
+
+    def process_files(self, input_paths: List[str]) -> List[Dict]:
+        """Detect the language of several audio/video files in shared batches."""
         try:
-            # Prepare audio features
-            inputs = self.feature_extractor(
-                audio, 
-                sampling_rate=16000, 
-                return_tensors="pt"
-            ).to(self.device)
-
-            # Get model predictions
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                confidence, predicted_id = torch.max(predictions, dim=-1)
-
-            # Get language label
-            language = self.model.config.id2label[predicted_id.item()]
-            confidence = confidence.item()
-
-            return language, confidence
+            audios = [self.load_audio(path) for path in input_paths]
+            return [
+                {
+                    "language": language,
+                    "whisper_language": to_whisper_code(language),
+                    "confidence": confidence,
+                    "input_file": path
+                }
+                for path, (language, confidence) in zip(input_paths, self.detect_languages(audios))
+            ]
         except Exception as e:
-            raise RuntimeError(f"Language detection failed: {str(e)}")
+            raise RuntimeError(f"Processing failed: {str(e)}")
 
     def process_media(self, input_path: str) -> Dict:
         """Process audio/video file and detect language."""
-        try:
-            # Handle video files
-            if input_path.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                temp_audio = 'temp_audio.wav'
-                self.extract_audio(input_path, temp_audio)
-                audio_path = temp_audio
-            else:
-                audio_path = input_path
-
-            # Load and process audio
-            audio = self.load_audio(audio_path)
-            language, confidence = self.detect_language(audio)
-
-            # Clean up temporary file
-            if input_path.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                os.remove(temp_audio)
-
-            return {
-                "language": language,
-                "confidence": confidence,
-                "input_file": input_path
-            }
-        except Exception as e:
-            raise RuntimeError(f"Processing failed: {str(e)}")
+        return self.process_files([input_path])[0]
 
 def main():
     parser = argparse.ArgumentParser(description="Detect language in audio/video files")
-    parser.add_argument("input", help="Path to input audio/video file")
+    parser.add_argument("inputs", nargs="+", help="Paths to input audio/video files")
+    parser.add_argument("--slice-seconds", type=float, default=8.0,
+                        help="Length of the first slice scored (default: 8)")
+    parser.add_argument("--threshold", type=float, default=0.9,
+                        help="Confidence at which the first slice is accepted (default: 0.9)")
     args = parser.parse_args()
 
-    detector = LanguageDetector()
+    detector = LanguageDetector(slice_seconds=args.slice_seconds, confidence_threshold=args.threshold)
     try:
-        result = detector.process_media(args.input)
-        print(f"\nResults for: {result['input_file']}")
-        print(f"Detected Language: {result['language']}")
-        print(f"Confidence: {result['confidence']:.2%}")
+        for result in detector.process_files(args.inputs):
+            print(f"\nResults for: {result['input_file']}")
+            print(f"Detected Language: {result['language']} (Whisper: {result['whisper_language']})")
+            print(f"Confidence: {result['confidence']:.2%}")
     except Exception as e:
         print(f"Error: {str(e)}")
         return 1
@@ -108,4 +175,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    exit(main())
@@ -83,11 +83,15 @@ class Transcriber:
             min_segment_length = 0.1  # Minimum segment length in seconds
             max_repetition_count = 3  # Maximum times a character can repeat
             
-            # First detect language from a small sample
-            initial_chunk = audio[:min(len(audio), 30 * sample_rate)]
-            initial_result = whisper_ts.transcribe(self.model, initial_chunk)
-            detected_language = initial_result["language"]
-            lang_confidence = initial_result.get("language_probability", 0.0)
+            # First detect language from a small sample, unless the caller knows it
+            if language:
+                detected_language = language
+                lang_confidence = 1.0
+            else:
+                initial_chunk = audio[:min(len(audio), 30 * sample_rate)]
+                initial_result = whisper_ts.transcribe(self.model, initial_chunk)
+                detected_language = initial_result["language"]
+                lang_confidence = initial_result.get("language_probability", 0.0)
             
             # Process the full audio in chunks
             for i in range(0, len(audio), int((chunk_duration - overlap_duration) * sample_rate)):